@@ -0,0 +1,236 @@
+# basis.py
+"""
+Declarative regression bases for LSMC continuation values.
+
+State columns (as built in lsmc): 0=index, 1=dest, 2=rem_quota_frac, 3=t/T, 4=basis_spread.
+A basis is a list of terms; each term is a product of univariate factors on
+state columns. Values and derivatives (product rule + chain rule) are both
+generated from the same term list, so gradients never drift from the basis.
+"""
+from dataclasses import dataclass
+import numpy as np
+from numpy.polynomial import laguerre, hermite_e
+
+STATE_COLS = {"index": 0, "dest": 1, "quota": 2, "time": 3, "spread": 4}
+QUOTA_COL = STATE_COLS["quota"]
+
+@dataclass(frozen=True)
+class BasisSpec:
+    family: str = "poly"           # market-variable family: poly | laguerre | hermite
+    degree: int = 2                # max degree per market variable
+    variables: tuple = ("index", "dest")
+    cross: bool = True             # pairwise products of degree-1 market terms
+    quota: str = "linear"          # none | linear | poly | pwlinear | spline
+    quota_degree: int = 1          # for quota='poly'
+    quota_knots: tuple = ()        # hinge/spline knots in remaining-quota fraction
+    quota_cross: tuple = ()        # market variables multiplied with the linear quota term
+    time_cross: tuple = ()         # market variables multiplied with t/T
+    scale: tuple = ()              # ((var, center, scale), ...) applied before the family
+
+def _ipow(z, k):
+    # small integer powers by repeated multiplication (much faster than z**k for k>2)
+    out = z
+    for _ in range(k - 1):
+        out = out * z
+    return out
+
+class _Factor:
+    """Univariate factor f((x - center) / scale) on one state column."""
+    def __init__(self, col, kind, k=1, knot=0.0, center=0.0, scale=1.0):
+        self.col, self.kind, self.k, self.knot = col, kind, int(k), float(knot)
+        self.center, self.scale = float(center), float(scale)
+        if kind in ("laguerre", "hermite"):
+            ev, der = ((laguerre.lagval, laguerre.lagder) if kind == "laguerre"
+                       else (hermite_e.hermeval, hermite_e.hermeder))
+            c = np.zeros(self.k + 1); c[-1] = 1.0
+            self._ev, self._c, self._dc = ev, c, der(c)
+
+    def _z(self, x):
+        if self.center == 0.0 and self.scale == 1.0:
+            return x
+        return (x - self.center) / self.scale
+
+    def value(self, x):
+        z = self._z(x)
+        if self.kind == "poly":
+            return _ipow(z, self.k)
+        if self.kind == "hinge":
+            return _ipow(np.maximum(z - self.knot, 0.0), self.k)
+        return self._ev(z, self._c)
+
+    def deriv(self, x):
+        z = self._z(x)
+        if self.kind == "poly":
+            d = np.ones_like(z) if self.k == 1 else self.k * _ipow(z, self.k - 1)
+        elif self.kind == "hinge":
+            d = self.k * _ipow(np.maximum(z - self.knot, 0.0), self.k - 1) * (z > self.knot)
+        else:
+            d = self._ev(z, self._dc)
+        return d / self.scale
+
+def _build_terms(spec: BasisSpec):
+    scale = {v: (c, s) for v, c, s in spec.scale}
+    def fac(var, kind="poly", k=1, knot=0.0):
+        c, s = scale.get(var, (0.0, 1.0))
+        return _Factor(STATE_COLS[var], kind, k, knot, c, s)
+
+    fam = spec.family
+    if fam not in ("poly", "laguerre", "hermite"):
+        raise ValueError(f"Unknown basis family: {fam}")
+    terms = [()]                                              # constant
+    terms += [(fac(v, fam, 1),) for v in spec.variables]      # degree 1
+
+    # remaining-quota terms
+    if spec.quota == "linear":
+        terms.append((fac("quota"),))
+    elif spec.quota == "poly":
+        terms += [(fac("quota", "poly", k),) for k in range(1, spec.quota_degree + 1)]
+    elif spec.quota == "pwlinear":
+        terms.append((fac("quota"),))
+        terms += [(fac("quota", "hinge", 1, kn),) for kn in spec.quota_knots]
+    elif spec.quota == "spline":
+        terms += [(fac("quota", "poly", k),) for k in (1, 2, 3)]
+        terms += [(fac("quota", "hinge", 3, kn),) for kn in spec.quota_knots]
+    elif spec.quota != "none":
+        raise ValueError(f"Unknown quota basis: {spec.quota}")
+
+    if spec.cross:
+        vs = spec.variables
+        terms += [(fac(vs[i], fam, 1), fac(vs[j], fam, 1))
+                  for i in range(len(vs)) for j in range(i + 1, len(vs))]
+    terms += [(fac(v, fam, 1), fac("quota")) for v in spec.quota_cross]
+    terms += [(fac(v, fam, 1), fac("time")) for v in spec.time_cross]
+    for k in range(2, spec.degree + 1):
+        terms += [(fac(v, fam, k),) for v in spec.variables]
+    return terms
+
+class Basis:
+    """Vectorized evaluator for a BasisSpec over an (n, 5) state matrix."""
+    def __init__(self, spec: BasisSpec = None):
+        self.spec = spec if spec is not None else BasisSpec()
+        self.terms = _build_terms(self.spec)
+        qdep = [any(f.col == QUOTA_COL for f in term) for term in self.terms]
+        self.quota_cols = np.flatnonzero(qdep)
+        self.fixed_cols = np.flatnonzero(~np.asarray(qdep))
+
+    @property
+    def size(self):
+        return len(self.terms)
+
+    def matrix(self, state):
+        """Design matrix (n, size)."""
+        n = state.shape[0]
+        X = np.empty((n, self.size), dtype=state.dtype)
+        for j, term in enumerate(self.terms):
+            col = np.ones(n, dtype=state.dtype)
+            for f in term:
+                col = col * f.value(state[:, f.col])
+            X[:, j] = col
+        return X
+
+    def deriv(self, state, wrt="index"):
+        """d(design matrix)/d(state column `wrt`), shape (n, size)."""
+        c = STATE_COLS[wrt] if isinstance(wrt, str) else int(wrt)
+        n = state.shape[0]
+        D = np.zeros((n, self.size), dtype=state.dtype)
+        for j, term in enumerate(self.terms):
+            for i, f in enumerate(term):
+                if f.col != c:
+                    continue
+                col = f.deriv(state[:, c])
+                for g in term[:i] + term[i+1:]:
+                    col = col * g.value(state[:, g.col])
+                D[:, j] += col
+        return D
+
+    def dindex(self, state):
+        """Total derivative wrt the index price (basis_spread = dest - index)."""
+        return self.deriv(state, "index") - self.deriv(state, "spread")
+
+    def ddest(self, state):
+        """Total derivative wrt the destination price."""
+        return self.deriv(state, "dest") + self.deriv(state, "spread")
+
+    def quota_multipliers(self, state):
+        """Quota-independent factor of each quota-dependent term, shape (n, n_quota_cols)."""
+        n = state.shape[0]
+        M = np.ones((n, self.quota_cols.size), dtype=state.dtype)
+        for m, j in enumerate(self.quota_cols):
+            for f in self.terms[j]:
+                if f.col != QUOTA_COL:
+                    M[:, m] = M[:, m] * f.value(state[:, f.col])
+        return M
+
+    def multiplier_deriv(self, state, wrt="index"):
+        """d(quota_multipliers)/d(state column `wrt`), shape (n, n_quota_cols)."""
+        c = STATE_COLS[wrt] if isinstance(wrt, str) else int(wrt)
+        n = state.shape[0]
+        D = np.zeros((n, self.quota_cols.size), dtype=state.dtype)
+        for m, j in enumerate(self.quota_cols):
+            market = [f for f in self.terms[j] if f.col != QUOTA_COL]
+            for i, f in enumerate(market):
+                if f.col != c:
+                    continue
+                col = f.deriv(state[:, c])
+                for g in market[:i] + market[i+1:]:
+                    col = col * g.value(state[:, g.col])
+                D[:, m] += col
+        return D
+
+    def _quota_col(self, m, mult, rem_frac):
+        col = mult[:, m]
+        for f in self.terms[self.quota_cols[m]]:
+            if f.col == QUOTA_COL:
+                col = col * f.value(rem_frac)
+        return col
+
+    def quota_columns(self, mult, rem_frac):
+        """
+        Quota-dependent design columns for candidate rem_frac of shape (..., n),
+        given quota_multipliers; returns (..., n, n_quota_cols).
+        """
+        rem_frac = np.asarray(rem_frac)
+        return np.stack([self._quota_col(m, mult, rem_frac)
+                         for m in range(self.quota_cols.size)], axis=-1)
+
+    def quota_value(self, mult, rem_frac, beta_q):
+        """quota_columns(mult, rem_frac) @ beta_q without materializing the columns."""
+        rem_frac = np.asarray(rem_frac)
+        out = np.zeros(rem_frac.shape, dtype=np.result_type(mult, rem_frac))
+        for m in range(self.quota_cols.size):
+            out += beta_q[m] * self._quota_col(m, mult, rem_frac)
+        return out
+
+# ---------------- registry ----------------
+
+BASIS_REGISTRY = {}
+
+def register_basis(name, spec: BasisSpec):
+    BASIS_REGISTRY[name] = spec
+
+# [1, x0, x1, x2, x0*x1, x1*tf, x0^2, x1^2] -- the original hand-written basis
+register_basis("default", BasisSpec(time_cross=("dest",)))
+# market-only (no quota terms), for the quota-grid DP engine
+register_basis("market", BasisSpec(quota="none"))
+register_basis("poly3_spread", BasisSpec(degree=3, variables=("index", "spread"),
+                                         quota_cross=("spread",)))
+register_basis("laguerre3", BasisSpec(family="laguerre", degree=3,
+                                      scale=(("index", 0.0, 3.0), ("dest", 0.0, 9.0))))
+register_basis("hermite3", BasisSpec(family="hermite", degree=3,
+                                     scale=(("index", 3.0, 1.0), ("dest", 9.0, 2.0))))
+register_basis("pwlinear_quota", BasisSpec(time_cross=("dest",), quota="pwlinear",
+                                           quota_knots=(0.25, 0.5, 0.75)))
+register_basis("spline_quota", BasisSpec(time_cross=("dest",), quota="spline",
+                                         quota_knots=(0.33, 0.67), quota_cross=("spread",)))
+
+def get_basis(basis=None) -> Basis:
+    """Resolve None / registry name / BasisSpec / Basis to a Basis instance."""
+    if basis is None:
+        basis = "default"
+    if isinstance(basis, Basis):
+        return basis
+    if isinstance(basis, str):
+        if basis not in BASIS_REGISTRY:
+            raise KeyError(f"Unknown basis '{basis}'. Registered: {sorted(BASIS_REGISTRY)}")
+        basis = BASIS_REGISTRY[basis]
+    return Basis(basis)
@@ -0,0 +1,55 @@
+# bench_action_grid.py
+"""
+Action-grid study for lsmc_swing_value (K = 3 ... 50 volumes per day, plus the
+bang-bang + interior mode).
+
+Each policy is fitted on one path set and valued by lsmc_forward_value on an
+independent one; the in-sample value is shown next to it. With --dp the
+quota-grid DP (swing_dp.py, same K) prices the independent paths as a reference.
+On the demo contract the payoff is linear in the volume and the continuation is
+close to linear in the remaining quota, so the optimal lift sits at a bound and
+all columns are flat in K up to Monte Carlo error; the grid only pays off for
+bases whose quota value bends within a day's feasible range.
+
+Usage: python bench_action_grid.py [--n-paths 50000] [--basis spline_quota] [--dp]
+"""
+import argparse, time
+
+from simulators import MultiFactorOU
+from swing import SwingSpec
+from lsmc import lsmc_swing_value, lsmc_forward_value
+from swing_dp import grid_swing_value
+
+S0, B0 = {'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, {'B_JKM_TTF': 2.0}
+
+def main(n_paths=50_000, basis="spline_quota", dp=False):
+    T = 30
+    spec = SwingSpec(T=T, q_min=0.5, q_max=1.5, Q_min=20, Q_max=30,
+                     index='HH', spread_addon=1.2, destination='TTF', fee=0.1)
+    train = MultiFactorOU(rng=42).simulate_paths(S0, B0, T=T, n_paths=n_paths)
+    test = MultiFactorOU(rng=7).simulate_paths(S0, B0, T=T, n_paths=n_paths)
+
+    runs = [("grid", K) for K in (3, 5, 9, 17, 33, 50)] + [("bang_bang", 3)]
+    print(f"n_paths={n_paths}  T={T}  basis={basis}")
+    print(f"{'mode':>10} {'K':>4} {'in_sample':>10} {'forward':>10} {'stderr':>7} {'fit_s':>7}"
+          + (f" {'grid_dp':>10} {'dp_s':>7}" if dp else ""))
+    for mode, K in runs:
+        t0 = time.perf_counter()
+        value, _, _, _, policy = lsmc_swing_value(train, spec, basis=basis, n_actions=K, actions=mode,
+                                                  return_policy=True)
+        dt = time.perf_counter() - t0
+        fwd = lsmc_forward_value(policy, test)
+        line = f"{mode:>10} {K:>4} {value:>10.4f} {fwd['value']:>10.4f} {fwd['stderr']:>7.4f} {dt:>7.2f}"
+        if dp and mode == "grid":
+            t0 = time.perf_counter()
+            v_dp = grid_swing_value(test, spec, n_actions=K)[0]
+            line += f" {v_dp:>10.4f} {time.perf_counter() - t0:>7.2f}"
+        print(line)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--n-paths", type=int, default=50_000)
+    ap.add_argument("--basis", default="spline_quota")
+    ap.add_argument("--dp", action="store_true", help="also price the test paths with the grid DP")
+    args = ap.parse_args()
+    main(args.n_paths, args.basis, args.dp)
@@ -0,0 +1,41 @@
+# bench_numba.py
+"""
+NumPy vs Numba backend for lsmc_swing_value: runtime and numerical equivalence.
+Exits non-zero if exercise decisions, cashflows or value differ beyond tolerance.
+Usage: python bench_numba.py [n_paths]
+"""
+import sys, time
+import numpy as np
+
+from simulators import MultiFactorOU
+from swing import SwingSpec
+from lsmc import lsmc_swing_value
+from basis import BASIS_REGISTRY
+
+def main(n_paths=100_000):
+    T = 30
+    spec = SwingSpec(T=T, q_min=0.5, q_max=1.5, Q_min=20, Q_max=30,
+                     index='HH', spread_addon=1.2, destination='TTF', fee=0.1)
+    paths = MultiFactorOU(rng=42).simulate_paths(
+        S0={'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, B0={'B_JKM_TTF': 2.0}, T=T, n_paths=n_paths)
+
+    ok = True
+    print(f"n_paths={n_paths}  T={T}")
+    print(f"{'basis':>15} {'K':>3} {'numpy_s':>8} {'numba_s':>8} {'speedup':>7} {'|dV|':>9} {'max|dq|':>8} {'max|d_dlt|':>10}")
+    for basis in BASIS_REGISTRY:
+        lsmc_swing_value(paths, spec, basis=basis, backend="numba")   # compile outside the timing
+        for K in (3, 9):
+            t0 = time.perf_counter()
+            v0, q0, cf0, d0 = lsmc_swing_value(paths, spec, basis=basis, n_actions=K)
+            t1 = time.perf_counter()
+            v1, q1, cf1, d1 = lsmc_swing_value(paths, spec, basis=basis, n_actions=K, backend="numba")
+            t2 = time.perf_counter()
+            dv, dq, dd = abs(v0 - v1), np.abs(q0 - q1).max(), np.abs(d0 - d1).max()
+            ok &= dv < 1e-8 * max(1.0, abs(v0)) and dq < 1e-12 and np.allclose(cf0, cf1, atol=1e-10)
+            print(f"{basis:>15} {K:>3} {t1-t0:>8.3f} {t2-t1:>8.3f} {(t1-t0)/(t2-t1):>7.1f} "
+                  f"{dv:>9.2e} {dq:>8.1e} {dd:>10.2e}")
+    print("equivalent:", ok)
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000) else 1)
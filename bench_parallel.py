@@ -0,0 +1,38 @@
+# bench_parallel.py
+"""
+Strong-scaling benchmark for parallel.py: LSMC backward pass with reduced
+cross-products and forward valuation + hedge PnL, 1..N worker processes.
+Usage: python bench_parallel.py [n_paths] [max_workers]
+"""
+import os, sys, time
+import numpy as np
+
+from simulators import MultiFactorOU
+from swing import SwingSpec
+from parallel import parallel_lsmc_swing_value, parallel_forward_hedge
+
+def main(n_paths=200_000, max_workers=None):
+    T = 30
+    spec = SwingSpec(T=T, q_min=0.5, q_max=1.5, Q_min=20, Q_max=30,
+                     index='HH', spread_addon=1.2, destination='TTF', fee=0.1)
+    S0, B0 = {'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, {'B_JKM_TTF': 2.0}
+    max_workers = max_workers or os.cpu_count() or 1
+    workers = sorted({1, *[2**k for k in range(1, 8) if 2**k <= max_workers], max_workers})
+
+    print(f"n_paths={n_paths}  T={T}  cores={os.cpu_count()}")
+    print(f"{'workers':>7} {'backward_s':>10} {'forward_s':>9} {'speedup':>7} {'value':>12} {'fwd_value':>12}")
+    base = None
+    for w in workers:
+        t0 = time.perf_counter()
+        value, _, _, _, policy = parallel_lsmc_swing_value(MultiFactorOU(rng=42), S0, B0, T, n_paths, spec,
+                                                           n_workers=w, return_policy=True)
+        t1 = time.perf_counter()
+        pnl_u, _ = parallel_forward_hedge(policy, MultiFactorOU(rng=7), S0, B0, T, n_paths,
+                                          H=np.zeros((T, 2)), n_workers=w)
+        t2 = time.perf_counter()
+        base = base or (t2 - t0)
+        print(f"{w:>7} {t1-t0:>10.2f} {t2-t1:>9.2f} {base/(t2-t0):>7.2f} {value:>12.6f} {pnl_u.mean():>12.6f}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 200_000, int(args[1]) if len(args) > 1 else None)
@@ -0,0 +1,189 @@
+# bench_pipeline.py
+"""
+Benchmark sweep over the simulate -> price -> hedge -> risk pipeline.
+
+Each case varies one knob around a base point (n_paths, T, basis, n_actions):
+  simulate   MultiFactorOU.simulate_paths         n_paths x T
+  lsmc       lsmc_swing_value                      n_paths x T x basis x n_actions
+  hedge.*    level strip, daily regression, rolling delta, pathwise delta
+  risk       var_es_summary                        n_paths
+Inputs (paths, cashflows) are built outside the timed region. Per case: best wall
+time over --repeat untraced runs, peak traced memory (tracemalloc, one extra run,
+which also records the profiling.py stage breakdown) and throughput in path-days/s.
+
+Usage:
+  python bench_pipeline.py [--quick] [--out bench.json] [--repeat 3]
+  python bench_pipeline.py --baseline bench_old.json [--tolerance 0.25]
+With --baseline, cases slower than (1 + tolerance) x baseline are flagged and the
+exit status is 1.
+"""
+import sys, json, time, argparse, platform, tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+
+import profiling
+from simulators import MultiFactorOU
+from swing import SwingSpec
+from lsmc import lsmc_swing_value
+from level_strip_hedge import hedge_level_strip
+from regression_hedge import hedge_regression_daily
+from delta_hedge import rolling_delta_hedge
+from delta_hedge_grad import hedge_with_pathwise_deltas
+from risk_metrics import var_es_summary
+
+S0, B0 = {'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, {'B_JKM_TTF': 2.0}
+
+def make_spec(T):
+    # the demo contract, quotas scaled with the tenor
+    return SwingSpec(T=T, q_min=0.5, q_max=1.5, Q_min=20*T/30, Q_max=30*T/30,
+                     index='HH', spread_addon=1.2, destination='TTF', fee=0.1)
+
+def sweeps(quick=False):
+    """List of (bench, params) cases: one knob at a time around the base point."""
+    base = {"n_paths": 5_000 if quick else 20_000, "T": 30, "basis": "default", "n_actions": 3}
+    ns = (2_000, 5_000, 10_000) if quick else (10_000, 50_000, 200_000)
+    Ts = (30, 90) if quick else (30, 90, 365)
+    cases = []
+    add = lambda bench, **kw: cases.append((bench, {**base, **kw}))
+    for n in ns:
+        add("simulate", n_paths=n)
+        add("lsmc", n_paths=n)
+        add("risk", n_paths=n * 10)
+    for T in Ts:
+        add("simulate", T=T)
+        add("lsmc", T=T)
+    for basis in ("market", "poly3_spread", "spline_quota"):
+        add("lsmc", basis=basis)
+    for K in ((5, 9) if quick else (5, 9, 17)):
+        add("lsmc", n_actions=K)
+    for bench in ("hedge.level_strip", "hedge.regression", "hedge.rolling_delta", "hedge.pathwise"):
+        for n in ns[:2]:
+            add(bench, n_paths=n)
+    # drop the duplicates of the base point
+    seen, out = set(), []
+    for bench, p in cases:
+        key = (bench, json.dumps(p, sort_keys=True))
+        if key not in seen:
+            seen.add(key)
+            out.append((bench, p))
+    return out
+
+class _Inputs:
+    """Paths and LSMC outputs per (n_paths, T), built once and reused across cases."""
+    def __init__(self):
+        self._paths, self._lsmc = {}, {}
+
+    def paths(self, n, T):
+        if (n, T) not in self._paths:
+            self._paths[(n, T)] = MultiFactorOU(rng=42).simulate_paths(S0, B0, T=T, n_paths=n, method="cumsum")
+        return self._paths[(n, T)]
+
+    def lsmc(self, n, T):
+        if (n, T) not in self._lsmc:
+            self._lsmc[(n, T)] = lsmc_swing_value(self.paths(n, T), make_spec(T))
+        return self._lsmc[(n, T)]
+
+def make_case(bench, p, inputs):
+    """Zero-argument callable running one case, and its work in path-days."""
+    n, T = p["n_paths"], p["T"]
+    spec = make_spec(T)
+    if bench == "simulate":
+        sim = MultiFactorOU(rng=42)
+        return (lambda: sim.simulate_paths(S0, B0, T=T, n_paths=n, method="cumsum")), n * T
+    if bench == "risk":
+        pnl = np.random.default_rng(0).standard_normal(n)
+        return (lambda: var_es_summary(pnl, "bench", alpha=(0.01, 0.05))), n
+    paths = inputs.paths(n, T)
+    if bench == "lsmc":
+        return (lambda: lsmc_swing_value(paths, spec, basis=p["basis"], n_actions=p["n_actions"])), n * T
+    cf, dlt = inputs.lsmc(n, T)[2], inputs.lsmc(n, T)[3]
+    if bench == "hedge.level_strip":
+        return (lambda: hedge_level_strip(paths, spec, cf, two_assets=True, ridge=1e-6)), n * T
+    if bench == "hedge.regression":
+        return (lambda: hedge_regression_daily(paths, spec, cf, two_assets=True)), n * T
+    if bench == "hedge.rolling_delta":
+        return (lambda: rolling_delta_hedge(paths, spec, rebalance_days=5)), n * T
+    if bench == "hedge.pathwise":
+        stored = inputs.lsmc(n, T)
+        return (lambda: hedge_with_pathwise_deltas(paths, spec, lambda *_: stored)), n * T
+    raise ValueError(f"Unknown benchmark: {bench}")
+
+def run_case(fn, work, repeat):
+    # traced run: peak memory and the stage breakdown (not timed)
+    tracemalloc.start()
+    with profiling.profiled() as stages:
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times = []
+    for _ in range(int(repeat)):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    wall = min(times)
+    return {"wall_s": wall, "wall_all_s": times, "peak_mb": peak / 2**20,
+            "throughput": work / wall, "stages": {k: v["total_s"] for k, v in stages.items()}}
+
+def _key(r):
+    return r["bench"] + " " + json.dumps(r["params"], sort_keys=True)
+
+def compare(results, baseline, tolerance=0.25, min_diff=0.005):
+    """
+    Rows (key, wall, base wall, ratio, flag) for cases present in both runs; a case
+    is flagged when slower by more than `tolerance` and by at least min_diff seconds
+    (millisecond cases are timer noise).
+    """
+    base = {_key(r): r for r in baseline["results"]}
+    rows = []
+    for r in results:
+        b = base.get(_key(r))
+        if b is None:
+            continue
+        ratio = r["wall_s"] / b["wall_s"]
+        slow = ratio > 1.0 + tolerance and r["wall_s"] - b["wall_s"] >= min_diff
+        rows.append((_key(r), r["wall_s"], b["wall_s"], ratio, slow))
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--quick", action="store_true", help="small sizes (smoke run)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default="bench_pipeline.json")
+    ap.add_argument("--baseline", default=None, help="earlier --out file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    ap.add_argument("--only", default=None, help="run benches whose name starts with this prefix")
+    args = ap.parse_args(argv)
+
+    inputs = _Inputs()
+    results = []
+    print(f"{'bench':<20} {'n_paths':>8} {'T':>4} {'basis':>13} {'K':>3} {'wall_s':>8} {'peak_MB':>8} {'Mpd/s':>7}")
+    for bench, p in sweeps(args.quick):
+        if args.only and not bench.startswith(args.only):
+            continue
+        fn, work = make_case(bench, p, inputs)
+        r = {"bench": bench, "params": p, **run_case(fn, work, args.repeat)}
+        results.append(r)
+        print(f"{bench:<20} {p['n_paths']:>8} {p['T']:>4} {p['basis']:>13} {p['n_actions']:>3} "
+              f"{r['wall_s']:>8.3f} {r['peak_mb']:>8.1f} {r['throughput']/1e6:>7.2f}")
+
+    meta = {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "processor": platform.processor(),
+            "quick": args.quick, "repeat": args.repeat}
+    with open(args.out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+    print(f"wrote {len(results)} cases to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(results, json.load(f), args.tolerance)
+        print(f"\n{'case':<80} {'wall_s':>8} {'base_s':>8} {'ratio':>6}")
+        for key, w, b, ratio, slow in rows:
+            print(f"{key:<80} {w:>8.3f} {b:>8.3f} {ratio:>6.2f}{'  SLOWER' if slow else ''}")
+        n_slow = sum(r[-1] for r in rows)
+        print(f"{n_slow} of {len(rows)} cases slower than {1 + args.tolerance:.2f}x baseline")
+        return 1 if n_slow else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# bench_portfolio.py
+"""
+Book of swing contracts on shared scenarios (portfolio.py) vs pricing every
+contract on its own: runtime and value agreement.
+Usage: python bench_portfolio.py [n_contracts] [n_paths]
+"""
+import sys, time
+import numpy as np
+
+from simulators import MultiFactorOU
+from swing import SwingSpec
+from lsmc import lsmc_swing_value
+from portfolio import Portfolio, Contract
+
+def random_book(n_contracts, rng):
+    book = []
+    for _ in range(n_contracts):
+        T, q_max = int(rng.choice([20, 30])), float(rng.choice([1.0, 1.5, 2.0]))
+        spec = SwingSpec(T=T, q_min=0.5, q_max=q_max, Q_min=0.6*T, Q_max=float(rng.choice([0.6, 0.8]))*T*q_max,
+                         index='HH', spread_addon=float(rng.choice([1.0, 1.2, 1.5])),
+                         destination=str(rng.choice(["TTF", "JKM"])), fee=0.1)
+        book.append(Contract(spec, start=int(rng.choice([0, 10, 30])), size=float(rng.integers(1, 4))))
+    return book
+
+def main(n_contracts=500, n_paths=5000):
+    pf = Portfolio(random_book(n_contracts, np.random.default_rng(0)))
+    paths = pf.simulate(MultiFactorOU(rng=42), {'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, {'B_JKM_TTF': 2.0},
+                        n_paths=n_paths, method="cumsum")
+    n_specs = sum(len(g) for g in pf.groups().values())
+    print(f"contracts={n_contracts}  distinct={n_specs}  shapes={len(pf.groups())}  n_paths={n_paths}  H={pf.horizon}")
+
+    t0 = time.perf_counter()
+    res = pf.price(paths)
+    t1 = time.perf_counter()
+    H_pnl, H = pf.hedge_strips(paths, res, tc_bps=1.0)
+    t2 = time.perf_counter()
+    print(f"portfolio price {t1-t0:.2f}s   hedge strips {t2-t1:.2f}s   book value {res.value:.4f}")
+    print(res.risk())
+
+    # reference: each contract priced separately (first 50 for time)
+    sample = pf.contracts[:50]
+    t0 = time.perf_counter()
+    err = 0.0
+    for c in sample:
+        sub = {k: v[:, c.start:c.start + c.spec.T + 1] for k, v in paths.items()}
+        err = max(err, abs(c.size * lsmc_swing_value(sub, c.spec)[0] - res.values[c.name]))
+    t1 = time.perf_counter()
+    print(f"standalone: {(t1-t0)/len(sample)*n_contracts:.2f}s est. for the book   max |value diff| {err:.2e}")
+    if err > 1e-8:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 500, int(args[1]) if len(args) > 1 else 5000)
@@ -0,0 +1,73 @@
+# costs.py
+"""
+Shared transaction-cost engine for the hedge strategies.
+
+Positions are (T, k) strips shared by all paths or (n, T, k) per-path tensors:
+pos[:, t] is the holding over [t, t+1), traded at the day-t price. Costs are
+charged per path and per day on the turnover |pos_t - pos_{t-1}| (pos_{-1} = 0):
+
+    cost = |trade| * (tc_bps*1e-4 * S_t + spread_t / 2) + fee_per_lot * |trade| / lot
+"""
+from dataclasses import dataclass
+import numpy as np
+
+def round_lots(pos, lot):
+    """Round positions to multiples of lot (no-op for lot None / <= 0)."""
+    if lot is None or lot <= 0:
+        return pos
+    return np.round(pos / lot) * lot
+
+def hedge_legs(paths, spec, k):
+    """Trade prices S[:, :-1] and increments dS for the k legs (index[, destination]) -> (n, T, k) each."""
+    names = [spec.index, spec.destination][:k]
+    S = np.stack([paths[nm] for nm in names], axis=-1)
+    return S[:, :-1], S[:, 1:] - S[:, :-1]
+
+@dataclass(frozen=True)
+class CostModel:
+    """
+    tc_bps: proportional cost in bps of the traded price.
+    spread: full bid/ask width in price units; scalar, (T,) curve, (T, k) or (n, T, k).
+    fee_per_lot: fixed fee per lot traded (per unit if lot is None).
+    lot: lot size; positions are rounded to it before trading.
+    """
+    tc_bps: float = 0.0
+    spread: object = 0.0
+    fee_per_lot: float = 0.0
+    lot: float = None
+
+    def positions(self, pos):
+        return round_lots(np.asarray(pos, dtype=float), self.lot)
+
+    def day_costs(self, pos, prices):
+        """Per-path, per-day, per-leg costs (n, T, k) of trading into (rounded) pos at prices (n, T, k)."""
+        pos = self.positions(pos)
+        if pos.ndim == 2:
+            pos = pos[None]
+        trade = np.abs(np.diff(pos, axis=1, prepend=0.0))
+        unit = np.zeros_like(prices)
+        if self.tc_bps:
+            unit = prices * (self.tc_bps * 1e-4)
+        spread = np.asarray(self.spread, dtype=float)
+        if spread.any():
+            unit = unit + 0.5 * (spread[:, None] if spread.ndim == 1 else spread)
+        cost = trade * unit
+        if self.fee_per_lot:
+            cost = cost + self.fee_per_lot * trade / (self.lot if self.lot else 1.0)
+        return cost
+
+    def path_costs(self, pos, prices):
+        """Total cost per path (n,)."""
+        return self.day_costs(pos, prices).sum(axis=(1, 2))
+
+    def hedge_pnl(self, pos, prices, dS):
+        """Net hedge PnL per path: sum_t pos_t · dS_t - costs (pos rounded to lots)."""
+        p = self.positions(pos)
+        gross = np.einsum('ntk,ntk->n', np.broadcast_to(p, dS.shape), dS)
+        if not (self.tc_bps or np.any(self.spread) or self.fee_per_lot):
+            return gross
+        return gross - self.path_costs(p, prices)
+
+def cost_model(tc_bps=0.0, lot=None, costs=None):
+    """The CostModel to use: `costs` if given, else one built from the legacy tc_bps/lot arguments."""
+    return costs if costs is not None else CostModel(tc_bps=tc_bps or 0.0, lot=lot)
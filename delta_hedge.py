@@ -1,36 +1,129 @@
+from collections import OrderedDict
+from dataclasses import astuple
 import numpy as np
 
+from lsmc import lsmc_swing_value, bumped_values
+from costs import hedge_legs, cost_model
+from profiling import timed
+
 def finite_diff_delta(price_paths, spec, lsmc_pricer, bump=0.01):
     """
     Pathwise delta to underlying index (e.g., HH) at each t by bump-and-reprice.
     Expensive but simple & defensible in interviews.
+    Works with any pricer returning (value, q, cf[, dlt]).
     """
-    base_val, _, _ = lsmc_pricer(price_paths, spec)
+    base_val = lsmc_pricer(price_paths, spec)[0]
     bumped = {k:v.copy() for k,v in price_paths.items()}
     bumped[spec.index] = bumped[spec.index] * (1 + bump)
-    bump_val, _, _ = lsmc_pricer(bumped, spec)
+    bump_val = lsmc_pricer(bumped, spec)[0]
     return (bump_val - base_val) / (price_paths[spec.index].mean()*bump)
 
-def rolling_delta_hedge(paths, spec, lsmc_pricer, rebalance_days, tc_bps=0.5):
+class SensitivityEngine:
+    """
+    Index/destination deltas and gammas of the swing value with common random numbers.
+
+    The base LSMC run is fitted once and its regressions (SwingPolicy) are cached;
+    base, up and down scenarios for both legs are stacked along the path axis and
+    valued by one forward pass of that policy. Results are memoized per
+    (paths, spec, bump), so repeated requests (e.g. rebalance dates) are free.
+    Bumps are relative (S * (1 ± bump)); deltas are per unit of the average price.
+    The base value is lsmc_swing_value's price on the same paths (its in-sample
+    value is the forward pass of its policy); bumped scenarios keep that policy
+    (no refit), which moves deltas by ~1e-4 relative vs bump-and-reprice
+    (finite_diff_delta, tests/test_delta_hedge.py).
+    """
+    def __init__(self, basis=None, n_actions=3, max_cache=32):
+        self.basis, self.n_actions = basis, n_actions
+        self.max_cache = int(max_cache)
+        self._policies = OrderedDict()
+        self._results = OrderedDict()
+
+    @staticmethod
+    def _paths_key(paths, spec):
+        # identity of the price arrays the pricer reads (arrays are not copied or hashed)
+        return tuple((k, id(paths[k]), paths[k].shape) for k in (spec.index, spec.destination)) + astuple(spec)
+
+    @staticmethod
+    def _lookup(cache, key, paths, spec):
+        # entries keep references to their arrays: an id reused after garbage
+        # collection can then never match a stale entry
+        hit = cache.get(key)
+        if hit is None or any(hit[0][i] is not paths[k] for i, k in enumerate((spec.index, spec.destination))):
+            return None
+        return hit[1]
+
+    def _remember(self, cache, key, paths, spec, value):
+        cache[key] = ((paths[spec.index], paths[spec.destination]), value)
+        while len(cache) > self.max_cache:
+            cache.popitem(last=False)
+        return value
+
+    def policy(self, paths, spec):
+        """Base-run policy (fitted once per paths/spec)."""
+        key = self._paths_key(paths, spec)
+        policy = self._lookup(self._policies, key, paths, spec)
+        if policy is None:
+            out = lsmc_swing_value(paths, spec, basis=self.basis, n_actions=self.n_actions,
+                                   return_policy=True)
+            policy = self._remember(self._policies, key, paths, spec, out[4])
+        return policy
+
+    def sensitivities(self, paths, spec, bump=0.01):
+        """
+        Dict with value, delta_idx, delta_dst, gamma_idx, gamma_dst (central differences).
+        """
+        key = self._paths_key(paths, spec) + (float(bump),)
+        res = self._lookup(self._results, key, paths, spec)
+        if res is not None:
+            return res
+
+        # base, idx up/down, dst up/down -- valued in one pass of the cached policy
+        v0, vi_up, vi_dn, vd_up, vd_dn = bumped_values(self.policy(paths, spec), paths, bump)
+        h_idx = paths[spec.index].mean() * bump
+        h_dst = paths[spec.destination].mean() * bump
+        res = {
+            "value":     float(v0),
+            "delta_idx": float((vi_up - vi_dn) / (2*h_idx)),
+            "delta_dst": float((vd_up - vd_dn) / (2*h_dst)),
+            "gamma_idx": float((vi_up - 2*v0 + vi_dn) / h_idx**2),
+            "gamma_dst": float((vd_up - 2*v0 + vd_dn) / h_dst**2),
+        }
+        return self._remember(self._results, key, paths, spec, res)
+
+    def delta(self, paths, spec, bump=0.01):
+        return self.sensitivities(paths, spec, bump)["delta_idx"]
+
+@timed("hedge.rolling_delta")
+def rolling_delta_hedge(paths, spec, lsmc_pricer=None, rebalance_days=1, tc_bps=0.5, engine=None,
+                        lot=None, costs=None):
     """
     Rebalance a futures hedge on index (HH) and/or destination (TTF/JKM).
     PnL_t = Δ_{t-1} * (S_t - S_{t-1}) - costs; compare unhedged vs hedged.
+    Deltas come from a (memoized) SensitivityEngine; a custom lsmc_pricer other
+    than lsmc_swing_value falls back to finite_diff_delta, computed once.
+    Costs (tc_bps/lot or a costs.CostModel) are charged per path and day on that
+    path's prices, including the opening trade.
     """
     HH = paths[spec.index]
     n, T = HH.shape[0], HH.shape[1]-1
 
+    if lsmc_pricer is None or lsmc_pricer is lsmc_swing_value:
+        engine = engine or SensitivityEngine()
+        get_delta = lambda: engine.delta(paths, spec, bump=0.01)
+    else:
+        d_fd = finite_diff_delta(paths, spec, lsmc_pricer, bump=0.01)   # bump-and-reprice once
+        get_delta = lambda: d_fd
+
     # Compute a simple time-constant delta for demo (or recompute every k days)
-    base_val, _, _ = lsmc_pricer(paths, spec)
     deltas = []
     hedge_pos = np.zeros((n, T+1))
     for t in range(T+1):
         if t % rebalance_days == 0:
-            d = finite_diff_delta(paths, spec, lsmc_pricer, bump=0.01)
+            d = get_delta()
         deltas.append(d)
         hedge_pos[:, t] = d
 
-    # Hedge PnL across paths
-    dS = HH[:,1:] - HH[:,:-1]
-    pnl_hedge = (hedge_pos[:,:-1] * dS).sum(axis=1)
-    costs = tc_bps*1e-4 * np.abs(np.diff(hedge_pos, axis=1)).sum(axis=1) * HH[:, :-1].mean(axis=1)
-    return pnl_hedge - costs, np.array(deltas)
+    # Hedge PnL across paths, net of per-path turnover costs
+    prices, dS = hedge_legs(paths, spec, 1)
+    pnl_hedge = cost_model(tc_bps, lot, costs).hedge_pnl(hedge_pos[:, :-1, None], prices, dS)
+    return pnl_hedge, np.array(deltas)
@@ -1,13 +1,17 @@
 # delta_hedge_grad.py (or modify your existing file)
 import numpy as np
+from costs import hedge_legs, cost_model
+from profiling import timed
 
-def hedge_with_pathwise_deltas(paths, spec, lsmc_pricer):
+@timed("hedge.pathwise")
+def hedge_with_pathwise_deltas(paths, spec, lsmc_pricer, tc_bps=0.0, lot=None, costs=None):
     """
     Daily re-hedge using Δ from LSMC gradients. Position = -Δ_t (classic delta hedge).
+    Costs (tc_bps/lot or a costs.CostModel) are charged per path via costs.py.
+    Index leg only and reprices; m2m_hedge.py hedges both legs from a stored policy.
     """
-    _, _, _, deltas = lsmc_pricer(paths, spec)   # shape (n_paths, T)
-    S = paths[spec.index]                        # shape (n_paths, T+1)
+    _, _, _, deltas = lsmc_pricer(paths, spec)[:4]   # shape (n_paths, T)
     pos = -deltas                                # hedge position per day
-    dS = S[:,1:] - S[:,:-1]
-    pnl_hedge = (pos * dS).sum(axis=1)
+    prices, dS = hedge_legs(paths, spec, 1)
+    pnl_hedge = cost_model(tc_bps, lot, costs).hedge_pnl(pos[:, :, None], prices, dS)
     return pnl_hedge
@@ -0,0 +1,103 @@
+# diversion.py
+"""
+Swing contract with diversion optionality: each day the lifted volume is sold
+at one of several destinations (e.g. TTF or JKM), net of a per-destination
+shipping/regas cost.
+
+The regression state is the one of lsmc with the destination column replaced by
+the best netback price max_d (S_d - dest_fee_d), so the spread column is that
+netback minus the index. Each day the joint action set (destination x volume)
+is valued as one (D, K, n) tensor and the argmax is taken over both axes.
+"""
+import numpy as np
+from swing import SwingSpec, feasible_bounds_batch
+from basis import get_basis
+from lsmc import regress, candidate_actions, reachable_quota, quota_samples
+from profiling import timed
+
+def destinations(spec: SwingSpec):
+    """(names, per-unit fees) of the destinations; a plain SwingSpec has one, fee 0."""
+    names = tuple(getattr(spec, "destinations", ()) or (spec.destination,))
+    fees = tuple(getattr(spec, "dest_fees", ()) or (0.0,) * len(names))
+    if len(fees) != len(names):
+        raise ValueError("dest_fees must have one entry per destination")
+    return names, np.asarray(fees, dtype=float)
+
+@timed("diversion")
+def diversion_swing_value(paths, spec: SwingSpec, basis=None, n_actions=3, return_legs=False):
+    """
+    LSMC for a swing contract whose daily decision is (volume, destination).
+    spec: DiversionSpec (destinations, dest_fees); a SwingSpec reduces to lsmc_swing_value.
+    Returns (value, q, cf, dlt) with total cashflows and index deltas, plus, if
+    return_legs=True, a dict with per-leg results:
+      'choice' (n, T) destination index per day,
+      'cf'     {name: (n, T)} cashflows sold at each destination,
+      'delta'  {name: (n, T)} pathwise deltas to each destination price.
+    """
+    B = get_basis(basis)
+    names, fees = destinations(spec)
+    D, K = len(names), int(n_actions)
+    S_idx = paths[spec.index]
+    netback = np.stack([paths[nm] for nm in names]) - fees[:, None, None]   # (D, n, T+1)
+    n, T = S_idx.shape[0], S_idx.shape[1]-1
+    ar = np.arange(n)
+
+    def step(t, rem_quota, beta):
+        # joint (destination, volume) decision for all paths at remaining quota rem_quota
+        idx, nb = S_idx[:, t], netback[:, :, t]
+        best = np.argmax(nb, axis=0)                       # best netback market per path
+        dest = nb[best, ar]
+        state = np.column_stack([idx, dest, rem_quota/spec.Q_max, np.full(n, (t+1)/T), dest - idx])
+        lo, hi = feasible_bounds_batch(spec, t, rem_quota)
+        cand = candidate_actions(lo, hi, K)                # (K, n)
+        margin = nb - (idx + spec.spread_addon) - spec.fee  # (D, n)
+        cont_fixed = B.matrix(state)[:, B.fixed_cols] @ beta[B.fixed_cols]
+        qv = B.quota_value(B.quota_multipliers(state), (rem_quota - cand)/spec.Q_max,
+                           beta[B.quota_cols])             # (K, n)
+        vals = margin[:, None, :]*cand[None] + cont_fixed + qv[None]   # (D, K, n)
+        take = np.argmax(vals.reshape(D*K, n), axis=0)
+        d_star, k_star = np.divmod(take, K)
+        return state, best, d_star, cand[k_star, ar], margin, vals.reshape(D*K, n)[take, ar]
+
+    # backward: regressions on sampled reachable quota states (as lsmc_swing_value)
+    betas = np.zeros((T, B.size))
+    rem_lo, rem_hi = reachable_quota(spec, T)
+    target = np.zeros(n)
+    for t in reversed(range(T)):
+        rem = quota_samples(rem_lo[t], rem_hi[t], t, n)
+        if t + 1 < T:
+            target = step(t+1, rem, betas[t+1])[-1]
+        idx, nb = S_idx[:, t], netback[:, :, t]
+        dest = nb.max(axis=0)
+        state = np.column_stack([idx, dest, rem/spec.Q_max, np.full(n, (t+1)/T), dest - idx])
+        betas[t] = regress(B.matrix(state), target)
+
+    # forward: the fitted policy on the same paths
+    q       = np.zeros((n, T))
+    choice  = np.zeros((n, T), dtype=int)
+    cf_leg  = np.zeros((D, n, T))
+    dlt     = np.zeros((n, T))
+    dlt_leg = np.zeros((D, n, T))
+    rem_quota = np.full(n, spec.Q_max)
+    for t in range(T):
+        beta = betas[t]
+        state, best, d_star, a, margin, _ = step(t, rem_quota, beta)
+        q[:, t] = a
+        choice[:, t] = d_star
+        cf_leg[d_star, ar, t] = margin[d_star, ar] * a
+        rem_quota = rem_quota - a
+
+        # deltas: payoff -a to the index, +a to the chosen market; the continuation
+        # depends on the destinations through the best netback only
+        dlt[:, t] = -a + B.dindex(state) @ beta
+        dlt_leg[d_star, ar, t] += a
+        dlt_leg[best, ar, t] += B.ddest(state) @ beta
+
+    cf = cf_leg.sum(axis=0)
+    value_est = cf.sum(axis=1).mean()
+    if not return_legs:
+        return value_est, q, cf, dlt
+    legs = {"choice": choice,
+            "cf": {nm: cf_leg[d] for d, nm in enumerate(names)},
+            "delta": {nm: dlt_leg[d] for d, nm in enumerate(names)}}
+    return value_est, q, cf, dlt, legs
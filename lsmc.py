@@ -1,74 +1,286 @@
+import json
+from dataclasses import dataclass, asdict
 import numpy as np
-from swing import SwingState, SwingSpec
-
-def basis_functions(state_vec):
-    # [1, x0(index), x1(dest), x2(rem_quota_frac), x0*x1, x1*x2, x0^2, x1^2]
-    x0, x1, x2, tf, b = state_vec
-    return np.array([1.0, x0, x1, x2, x0*x1, x1*tf, x0**2, x1**2])
-
-def dbasis_dindex(state_vec):
-    x0, x1, x2, tf, b = state_vec
-    # d/dx0 of the basis above
-    return np.array([0.0, 1.0, 0.0, 0.0, x1, 0.0, 2.0*x0, 0.0])
-
-def lsmc_swing_value(paths, spec: SwingSpec):
-    n, T = paths['HH'].shape[0], paths['HH'].shape[1]-1
-    q   = np.zeros((n, T))
-    cf  = np.zeros((n, T))
-    dlt = np.zeros((n, T))  # pathwise deltas wrt index
-
-    rem_quota = np.full(n, spec.Q_max)
-    cont_val  = np.zeros(n)
-
-    for t in reversed(range(T)):
-        idx  = paths[spec.index][:, t]
-        dest = paths[spec.destination][:, t]
-        basis_spread = dest - idx
-        time_frac = (t+1)/T
-
-        state = np.vstack([idx, dest, rem_quota/spec.Q_max,
-                           np.full(n, time_frac), basis_spread]).T
-
-        # feasible bounds
-        lo, hi = [], []
-        for i in range(n):
-            s = SwingState(spec); s.cum = spec.Q_max - rem_quota[i]
-            a, b = s.feasible_bounds(t)
-            lo.append(a); hi.append(b)
-        lo  = np.array(lo); hi = np.array(hi); mid = 0.5*(lo+hi)
-
-        spread = dest - (idx + spec.spread_addon) - spec.fee
-        payoff_lo  = spread * lo
-        payoff_mid = spread * mid
-        payoff_hi  = spread * hi
-
-        X = np.stack([basis_functions(sv) for sv in state])
-        beta = np.linalg.lstsq(X, cont_val, rcond=None)[0]
-
-        def cont_next(rem_after):
-            st = state.copy()
-            st[:,2] = rem_after/spec.Q_max
-            return np.stack([basis_functions(sv) for sv in st]) @ beta
-
-        val_lo  = payoff_lo  + cont_next(rem_quota - lo)
-        val_mid = payoff_mid + cont_next(rem_quota - mid)
-        val_hi  = payoff_hi  + cont_next(rem_quota - hi)
-
-        take = np.argmax(np.stack([val_lo, val_mid, val_hi]), axis=0)
-        chosen_q = np.where(take==0, lo, np.where(take==1, mid, hi))
-
-        # cashflow + state update
-        q[:, t]  = chosen_q
-        cf[:, t] = spread * chosen_q
-        rem_quota = rem_quota - chosen_q
-        cont_val = np.maximum.reduce([val_lo, val_mid, val_hi])
+from swing import SwingSpec, DiversionSpec, feasible_bounds_batch
+from basis import BasisSpec, get_basis
+from profiling import timed, stage
+
+def basis_functions(state_vec, basis=None):
+    # default: [1, x0(index), x1(dest), x2(rem_quota_frac), x0*x1, x1*tf, x0^2, x1^2]
+    return get_basis(basis).matrix(np.asarray(state_vec, dtype=float)[None, :])[0]
+
+def dbasis_dindex(state_vec, basis=None):
+    # d/dx0 of the basis above (generated from the basis terms)
+    return get_basis(basis).dindex(np.asarray(state_vec, dtype=float)[None, :])[0]
+
+def cross_products(X, y):
+    """Normal-equation blocks (XᵀX, Xᵀy); additive over path subsets."""
+    return X.T @ X, X.T @ y
+
+def solve_normal(XtX, Xty):
+    """
+    Least-squares coefficients from accumulated normal equations.
+    Min-norm solve, so rank-deficient designs (e.g. constant quota column on
+    early steps, constant prices at t=0) give the same fit as lstsq on X.
+    Directions below 1e-12 of the largest eigenvalue (~1e-6 in X) are treated
+    as null, which keeps beta stable under rounding differences in XᵀX
+    (sharded or compiled accumulation).
+    """
+    return np.linalg.lstsq(XtX, Xty, rcond=1e-12)[0]
+
+def regress(X, y):
+    return solve_normal(*cross_products(X, y))
+
+_GOLDEN = 0.5*(np.sqrt(5.0) - 1.0)
+
+def candidate_actions(lo, hi, n_actions=3):
+    """Evenly spaced volumes between feasible bounds, shape (K, n); K=3 -> lo/mid/hi."""
+    w = np.linspace(0.0, 1.0, int(n_actions))[:, None]
+    return (1.0 - w)*lo + w*hi
+
+def _best_interior(lo, hi, value_fn, n_iter=20):
+    """Vectorized golden-section search of value_fn (n,)->(n,) on [lo, hi] per path."""
+    a, b = lo.copy(), hi.copy()
+    c = b - _GOLDEN*(b - a); d = a + _GOLDEN*(b - a)
+    fc, fd = value_fn(c), value_fn(d)
+    for _ in range(n_iter):
+        left = fc >= fd                       # maximum lies in [a, d]
+        b = np.where(left, d, b); a = np.where(left, a, c)
+        c_new = b - _GOLDEN*(b - a); d_new = a + _GOLDEN*(b - a)
+        c, d = np.where(left, c_new, d), np.where(left, c, d_new)
+        fc, fd = value_fn(c), value_fn(d)
+    return 0.5*(a + b)
+
+@dataclass
+class SwingPolicy:
+    """
+    Exercise policy from an LSMC backward pass: per-day regression coefficients
+    plus everything needed to re-apply them to fresh paths.
+    """
+    spec: SwingSpec
+    basis: BasisSpec
+    betas: np.ndarray          # (T, n_basis), betas[t] values continuation after day t
+    n_actions: int = 3
+    actions: str = "grid"
+
+    def to_dict(self):
+        """JSON-serializable representation."""
+        return {"spec_class": type(self.spec).__name__, "spec": asdict(self.spec), "basis": asdict(self.basis),
+                "betas": np.asarray(self.betas).tolist(),
+                "n_actions": int(self.n_actions), "actions": self.actions}
+
+    @classmethod
+    def from_dict(cls, d):
+        basis = {k: _as_tuple(v) for k, v in d["basis"].items()}
+        spec_cls = _SPEC_CLASSES[d.get("spec_class", "SwingSpec")]
+        spec = spec_cls(**{k: _as_tuple(v) for k, v in d["spec"].items()})
+        return cls(spec=spec, basis=BasisSpec(**basis),
+                   betas=np.asarray(d["betas"], dtype=float),
+                   n_actions=int(d["n_actions"]), actions=d["actions"])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+_SPEC_CLASSES = {"SwingSpec": SwingSpec, "DiversionSpec": DiversionSpec}
+
+def _as_tuple(v):
+    return tuple(_as_tuple(x) for x in v) if isinstance(v, list) else v
+
+def _swing_state(paths, spec, t, T, rem_quota, col=None):
+    # col: path column of day t (paths starting mid-tenor have col = t - t0)
+    col = t if col is None else col
+    idx  = paths[spec.index][:, col]
+    dest = paths[spec.destination][:, col]
+    n = idx.shape[0]
+    return np.column_stack([idx, dest, rem_quota/spec.Q_max,
+                            np.full(n, (t+1)/T), dest - idx])
 
-        # ---- analytic delta wrt index ----
-        # immediate payoff derivative wrt index is -q_t (since spread = dest - (idx + k) - fee)
-        d_immediate = -chosen_q
-        # continuation derivative via regression gradient:
-        grad = np.stack([dbasis_dindex(sv) for sv in state]) @ beta
-        dlt[:, t] = d_immediate + grad
+def _exercise_step(B, X, beta, spec, t, state, rem_quota, n_actions, actions):
+    """
+    One day's decision for all paths. X = B.matrix(state).
+    Returns (chosen_q, value of the chosen action, spread).
+    """
+    idx, dest = state[:, 0], state[:, 1]
+    # feasible bounds
+    lo, hi = feasible_bounds_batch(spec, t, rem_quota)
 
-    value_est = cf.sum(axis=1).mean()
+    spread = dest - (idx + spec.spread_addon) - spec.fee
+
+    # index/destination terms are shared by every candidate action
+    cont_fixed = X[:, B.fixed_cols] @ beta[B.fixed_cols]
+    qmult = B.quota_multipliers(state)
+    beta_q = beta[B.quota_cols]
+
+    def action_value(a):
+        # a: (..., n) volumes -> payoff + continuation, same shape
+        return spread*a + cont_fixed + B.quota_value(qmult, (rem_quota - a)/spec.Q_max, beta_q)
+
+    if actions == "grid":
+        cand = candidate_actions(lo, hi, n_actions)
+    else:
+        cand = np.stack([lo, _best_interior(lo, hi, action_value), hi])
+
+    vals = action_value(cand)                      # (K, n)
+    take = np.argmax(vals, axis=0)[None, :]
+    chosen_q = np.take_along_axis(cand, take, axis=0)[0]
+    return chosen_q, np.take_along_axis(vals, take, axis=0)[0], spread
+
+def reachable_quota(spec, T, t0=0, cum_lifted=0.0):
+    """
+    Remaining quota after each day t = t0..T-1 (post-decision) that feasible exercise
+    from day t0 with cum_lifted taken can reach: (rem_lo, rem_hi), each (T - t0, ...).
+    The extremes are the max- and min-lifting strategies (c + lo(c) and c + hi(c)
+    increase in c, so every state in between is reachable). Spec fields may be
+    arrays (stacked contracts); the results then carry their shape.
+    """
+    c = np.full((2,) + np.shape(spec.Q_max), float(cum_lifted))    # [min, max] cumulative volume
+    rem = []
+    for t in range(t0, T):
+        lo, hi = feasible_bounds_batch(spec, t, spec.Q_max - c)
+        c = c + np.stack([lo[0], hi[1]])
+        rem.append(spec.Q_max - c[::-1])
+    rem = np.array(rem)
+    return rem[:, 0], rem[:, 1]
+
+def quota_samples(rem_lo, rem_hi, t, n, start=0):
+    """
+    Training quota states for day t's regression: n remaining quotas spread evenly
+    over [rem_lo, rem_hi] by a golden-ratio sequence in the global path number
+    (start + i), so shards of a path set draw the same states as the full set.
+    """
+    u = ((np.arange(start, start + n) + 0.5) * _GOLDEN + t * _GOLDEN**2) % 1.0
+    return rem_lo + u * (np.asarray(rem_hi) - rem_lo)
+
+@timed("lsmc")
+def lsmc_swing_value(paths, spec: SwingSpec, basis=None, n_actions=3, actions="grid",
+                     return_policy=False, backend="numpy", t0=0, cum_lifted=0.0):
+    """
+    Backward-induction LSMC for a swing contract.
+    Day t's continuation value C_t(prices, remaining quota after day t) is regressed
+    on quota states sampled over the range reachable from the start (quota_samples),
+    with target max_a [payoff_{t+1}(a) + C_{t+1}] at day t+1's prices. The fitted
+    policy is then exercised forward on the same paths, so value/q/cf/dlt are
+    in-sample (see lsmc_forward_value for independent paths).
+    basis: registry name, BasisSpec or Basis (see basis.py); None = 'default'.
+    actions: 'grid' -> n_actions evenly spaced volumes in [lo, hi] (3 = lo/mid/hi);
+             'bang_bang' -> lo, hi and the best interior volume (golden-section search).
+    All candidates are valued as one (K, n) tensor per step.
+    backend: 'numpy' or 'numba' (compiled fused step, see lsmc_numba.py).
+    t0, cum_lifted: value the remaining tenor from day t0 with cum_lifted already
+    taken; paths then start at day t0 (T - t0 steps). Features keep the full-tenor
+    normalization, so the betas are comparable with a full run (rows < t0 stay 0).
+    Returns (value, q, cf, dlt), plus a SwingPolicy if return_policy=True.
+    """
+    if backend == "numba" and (t0 or cum_lifted):
+        raise ValueError("backend='numba' does not support t0/cum_lifted")
+    if backend == "numba":
+        from lsmc_numba import lsmc_swing_value_numba
+        return lsmc_swing_value_numba(paths, spec, basis, n_actions, actions, return_policy)
+    if backend != "numpy":
+        raise ValueError(f"Unknown backend: {backend}")
+    if actions not in ("grid", "bang_bang"):
+        raise ValueError(f"Unknown actions mode: {actions}")
+    B = get_basis(basis)
+    n, Tp = paths[spec.index].shape[0], paths[spec.index].shape[1]-1
+    T = t0 + Tp
+    betas = np.zeros((T, B.size))
+    rem_lo, rem_hi = reachable_quota(spec, T, t0, cum_lifted)
+
+    target = np.zeros(n)                      # no value after the last day
+    for t in reversed(range(t0, T)):
+        j = t - t0
+        rem = quota_samples(rem_lo[j], rem_hi[j], t, n)
+        if t + 1 < T:
+            with stage("lsmc.exercise"):
+                nxt = _swing_state(paths, spec, t+1, T, rem, col=j+1)
+                _, target, _ = _exercise_step(B, B.matrix(nxt), betas[t+1], spec, t+1, nxt, rem,
+                                              n_actions, actions)
+        with stage("lsmc.basis"):
+            X = B.matrix(_swing_state(paths, spec, t, T, rem, col=j))
+        with stage("lsmc.regress"):
+            betas[t] = regress(X, target)
+
+    policy = SwingPolicy(spec, B.spec, betas, n_actions, actions)
+    value_est, q, cf, dlt = apply_policy(policy, paths, t0, cum_lifted)
+    if return_policy:
+        return value_est, q, cf, dlt, policy
     return value_est, q, cf, dlt
+
+@timed("lsmc.forward")
+def apply_policy(policy: SwingPolicy, paths, t0=0, cum_lifted=0.0):
+    """
+    Forward pass: exercise a stored policy along (fresh) paths from day t0
+    (paths start at day t0) with cum_lifted volume already taken.
+    Returns (value, q, cf, dlt) like lsmc_swing_value.
+    """
+    spec = policy.spec
+    B = get_basis(policy.basis)
+    n, Tp = paths[spec.index].shape[0], paths[spec.index].shape[1]-1
+    T = policy.betas.shape[0]
+    if t0 + Tp != T:
+        raise ValueError(f"Paths cover days {t0}..{t0 + Tp}, policy was fitted for {T}")
+    q   = np.zeros((n, Tp))
+    cf  = np.zeros((n, Tp))
+    dlt = np.zeros((n, Tp))
+    rem_quota = np.full(n, spec.Q_max - cum_lifted)
+
+    for t in range(t0, T):
+        j = t - t0
+        state = _swing_state(paths, spec, t, T, rem_quota, col=j)
+        beta = policy.betas[t]
+        chosen_q, _, spread = _exercise_step(B, B.matrix(state), beta, spec, t, state, rem_quota,
+                                             policy.n_actions, policy.actions)
+        q[:, j]  = chosen_q
+        cf[:, j] = spread * chosen_q
+        dlt[:, j] = -chosen_q + B.dindex(state) @ beta
+        rem_quota = rem_quota - chosen_q
+
+    return cf.sum(axis=1).mean(), q, cf, dlt
+
+def bumped_values(policy: SwingPolicy, paths, bump, t0=0, cum_lifted=0.0):
+    """
+    Common-random-number scenario values of a fixed policy: base, index up/down,
+    destination up/down (prices scaled by 1 ± bump), stacked along the path axis
+    and valued by one apply_policy pass. Returns the 5 mean values in that order.
+    """
+    spec = policy.spec
+    S_i, S_d = paths[spec.index], paths[spec.destination]
+    up, dn = 1.0 + bump, 1.0 - bump
+    stacked = {spec.index:       np.concatenate([S_i, S_i*up, S_i*dn, S_i, S_i]),
+               spec.destination: np.concatenate([S_d, S_d, S_d, S_d*up, S_d*dn])}
+    _, _, cf, _ = apply_policy(policy, stacked, t0=t0, cum_lifted=cum_lifted)
+    return tuple(float(v) for v in cf.sum(axis=1).reshape(5, S_i.shape[0]).mean(axis=1))
+
+def iter_path_chunks(paths, chunk_size):
+    """Yield zero-copy row blocks of a paths dict."""
+    if chunk_size is not None and int(chunk_size) <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    n = next(iter(paths.values())).shape[0]
+    step = max(n, 1) if chunk_size is None else int(chunk_size)
+    for i in range(0, n, step):
+        yield {k: v[i:i+step] for k, v in paths.items()}
+
+def lsmc_forward_value(policy: SwingPolicy, paths, chunk_size=None):
+    """
+    Out-of-sample value: apply the policy to independent paths block by block.
+    paths: a paths dict (split into chunk_size blocks) or any iterable of path
+    dicts (e.g. a streaming simulator). Only per-path totals are accumulated.
+    Returns {"value", "stderr", "n_paths"}.
+    """
+    blocks = iter_path_chunks(paths, chunk_size) if isinstance(paths, dict) else paths
+    n_tot, s1, s2 = 0, 0.0, 0.0
+    for block in blocks:
+        _, _, cf, _ = apply_policy(policy, block)
+        v = cf.sum(axis=1)
+        n_tot += v.size; s1 += v.sum(); s2 += (v*v).sum()
+    if n_tot == 0:
+        raise ValueError("lsmc_forward_value needs at least one path")
+    mean = s1 / n_tot
+    var = (s2 - n_tot*mean*mean) / max(n_tot - 1, 1)
+    return {"value": float(mean), "stderr": float(np.sqrt(max(var, 0.0) / n_tot)), "n_paths": n_tot}
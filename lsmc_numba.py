@@ -0,0 +1,199 @@
+# lsmc_numba.py
+"""
+Numba backend for lsmc_swing_value (select with backend="numba").
+
+Each step is a compiled pass over the paths, with no (n, k) temporaries: the
+backward sweep accumulates the regression cross-products XᵀX, Xᵀy row by row;
+the exercise kernel fuses feasible bounds, basis evaluation, candidate-action
+valuation, argmax, cashflow/quota update and the index delta per path, and
+serves both the regression targets and the forward (in-sample) pass.
+
+The kernels are generated from the Basis term list (straight-line expressions,
+one njit compile per BasisSpec), so they stay in sync with basis.py without any
+hand-written formulas.
+"""
+import numpy as np
+from numpy.polynomial import laguerre, hermite_e, polynomial
+
+try:
+    from numba import njit
+except ImportError:  # optional dependency
+    njit = None
+
+from basis import get_basis, QUOTA_COL
+from lsmc import SwingPolicy, solve_normal, reachable_quota, quota_samples
+
+_KERNELS = {}
+
+# ---------------- code generation ----------------
+
+def _horner(coefs, z):
+    expr = repr(float(coefs[-1]))
+    for c in coefs[-2::-1]:
+        expr = f"({expr} * {z} + {float(c)!r})"
+    return expr
+
+def _power(z, k):
+    return " * ".join([z] * k) if k > 0 else "1.0"
+
+def _factor_exprs(f, var):
+    """(value expr, derivative expr) for one factor on variable `var`."""
+    if f.center == 0.0 and f.scale == 1.0:
+        z = var
+    else:
+        z = f"(({var} - {f.center!r}) / {f.scale!r})"
+    if f.kind == "poly":
+        val = _power(z, f.k)
+        der = f"({f.k} * {_power(z, f.k - 1)}) / {f.scale!r}" if f.k > 1 else f"1.0 / {f.scale!r}"
+    elif f.kind == "hinge":
+        h = f"max({z} - {f.knot!r}, 0.0)"
+        val = _power(h, f.k)
+        der = f"(({f.k} * {_power(h, f.k - 1)}) if {z} > {f.knot!r} else 0.0) / {f.scale!r}"
+    else:
+        e = np.zeros(f.k + 1); e[-1] = 1.0
+        c = laguerre.lag2poly(e) if f.kind == "laguerre" else hermite_e.herme2poly(e)
+        val = _horner(c, z)
+        der = f"{_horner(polynomial.polyder(c), z)} / {f.scale!r}"
+    return val, der
+
+def _kernel_source(B):
+    terms = B.terms
+    quota = [any(f.col == QUOTA_COL for f in term) for term in terms]
+    xs = [f"x{c}" for c in range(5)]
+
+    factors, rows, fixed, mult, cand, grad = [], [], [], [], [], []
+    for j, term in enumerate(terms):
+        names = [f"f{j}_{i}" for i in range(len(term))]
+        factors += [f"{nm} = {_factor_exprs(f, xs[f.col])[0]}" for nm, f in zip(names, term)]
+        prod = " * ".join(["1.0"] + names)
+        rows.append(f"r[{j}] = {prod}")
+        if not quota[j]:
+            fixed.append(f"cont_fixed += ({prod}) * beta[{j}]")
+        else:
+            mult.append(f"m{j} = " + " * ".join(["1.0"] + [nm for nm, f in zip(names, term)
+                                                             if f.col != QUOTA_COL]))
+            qf = [f"({_factor_exprs(f, 'rf')[0]})" for f in term if f.col == QUOTA_COL]
+            cand.append(f"qv += beta[{j}] * (" + " * ".join([f"m{j}"] + qf) + ")")
+        # total derivative wrt index: d/d(col 0) - d/d(col 4), since spread = dest - index
+        for i, f in enumerate(term):
+            if f.col not in (0, 4):
+                continue
+            others = [names[l] for l in range(len(term)) if l != i]
+            sign = "+" if f.col == 0 else "-"
+            grad.append(f"g {sign}= (" + " * ".join([f"({_factor_exprs(f, xs[f.col])[1]})"] + others)
+                        + f") * beta[{j}]")
+
+    def ind(lines, k):
+        return "\n".join(" " * k + ln for ln in lines) or " " * k + "pass"
+
+    m = len(terms)
+    return f'''
+def cross_kernel(idx, dest, rem, tf, Qmax, y):
+    XtX = np.zeros(({m}, {m})); Xty = np.zeros({m}); r = np.empty({m})
+    for p in range(idx.size):
+        x0 = idx[p]; x1 = dest[p]; x2 = rem[p] / Qmax; x3 = tf; x4 = x1 - x0
+{ind(factors, 8)}
+{ind(rows, 8)}
+        yp = y[p]
+        for a in range({m}):
+            ra = r[a]
+            Xty[a] += ra * yp
+            for b in range(a, {m}):
+                XtX[a, b] += ra * r[b]
+    for a in range({m}):
+        for b in range(a):
+            XtX[a, b] = XtX[b, a]
+    return XtX, Xty
+
+def exercise_kernel(idx, dest, rem, cont_val, tf, t, beta, w,
+                    T, qmin, qmax, Qmin, Qmax, addon, fee, q_out, cf_out, dlt_out):
+    rem_days = T - t
+    nf = rem_days - 1 if rem_days > 1 else 0
+    max_future = qmax * nf; min_future = qmin * nf
+    for p in range(idx.size):
+        x0 = idx[p]; x1 = dest[p]; x2 = rem[p] / Qmax; x3 = tf; x4 = x1 - x0
+        # feasible bounds (as feasible_bounds_batch)
+        cum = Qmax - rem[p]
+        lo = max(max(qmin, Qmin - cum - max_future), 0.0)
+        hi = max(min(qmax, Qmax - cum - min_future), 0.0)
+        lo = min(lo, hi)
+        spread = x1 - (x0 + addon) - fee
+
+{ind(factors, 8)}
+        cont_fixed = 0.0
+{ind(fixed, 8)}
+{ind(mult, 8)}
+
+        best = -np.inf; a_best = lo
+        for k in range(w.size):
+            a = (1.0 - w[k]) * lo + w[k] * hi
+            rf = (rem[p] - a) / Qmax
+            qv = 0.0
+{ind(cand, 12)}
+            val = spread * a + cont_fixed + qv
+            if val > best:
+                best = val; a_best = a
+
+        g = 0.0
+{ind(grad, 8)}
+        q_out[p] = a_best
+        cf_out[p] = spread * a_best
+        dlt_out[p] = -a_best + g
+        rem[p] = rem[p] - a_best
+        cont_val[p] = best
+'''
+
+def compile_kernels(basis=None):
+    """(cross_kernel, exercise_kernel) for a basis; compiled once per BasisSpec."""
+    if njit is None:
+        raise ImportError("backend='numba' requires the numba package")
+    B = get_basis(basis)
+    if B.spec not in _KERNELS:
+        ns = {"np": np}
+        exec(_kernel_source(B), ns)
+        _KERNELS[B.spec] = (njit(ns["cross_kernel"]), njit(ns["exercise_kernel"]))
+    return _KERNELS[B.spec]
+
+# ---------------- pricer ----------------
+
+def lsmc_swing_value_numba(paths, spec, basis=None, n_actions=3, actions="grid", return_policy=False):
+    """Compiled twin of lsmc.lsmc_swing_value (grid actions only)."""
+    if actions != "grid":
+        raise ValueError("backend='numba' supports actions='grid' only")
+    B = get_basis(basis)
+    cross_kernel, exercise_kernel = compile_kernels(B)
+    S_idx = np.asarray(paths[spec.index], dtype=float)
+    S_dst = np.asarray(paths[spec.destination], dtype=float)
+    n, T = S_idx.shape[0], S_idx.shape[1]-1
+    q, cf, dlt = np.zeros((T, n)), np.zeros((T, n)), np.zeros((T, n))
+    betas = np.zeros((T, B.size))
+    w = np.linspace(0.0, 1.0, int(n_actions))
+    bounds = (spec.T, float(spec.q_min), float(spec.q_max), float(spec.Q_min),
+              float(spec.Q_max), float(spec.spread_addon), float(spec.fee))
+    day = lambda t: (np.ascontiguousarray(S_idx[:, t]), np.ascontiguousarray(S_dst[:, t]), (t+1)/T)
+    rem_lo, rem_hi = reachable_quota(spec, T)
+
+    # backward: regressions on sampled reachable quota states (as lsmc_swing_value)
+    target = np.zeros(n)
+    scratch = np.empty((3, n))
+    for t in reversed(range(T)):
+        rem = quota_samples(rem_lo[t], rem_hi[t], t, n)
+        if t + 1 < T:
+            idx, dest, tf = day(t+1)
+            exercise_kernel(idx, dest, rem.copy(), target, tf, t+1, betas[t+1], w, *bounds,
+                            scratch[0], scratch[1], scratch[2])
+        idx, dest, tf = day(t)
+        XtX, Xty = cross_kernel(idx, dest, rem, tf, float(spec.Q_max), target)
+        betas[t] = solve_normal(XtX, Xty)
+
+    # forward: the fitted policy on the same paths (as apply_policy)
+    rem = np.full(n, float(spec.Q_max))
+    for t in range(T):
+        idx, dest, tf = day(t)
+        exercise_kernel(idx, dest, rem, scratch[0], tf, t, betas[t], w, *bounds, q[t], cf[t], dlt[t])
+
+    q, cf, dlt = q.T, cf.T, dlt.T
+    value_est = cf.sum(axis=1).mean()
+    if return_policy:
+        return value_est, q, cf, dlt, SwingPolicy(spec, B.spec, betas, n_actions, actions)
+    return value_est, q, cf, dlt
@@ -0,0 +1,152 @@
+# m2m_hedge.py
+"""
+Two-asset mark-to-market delta hedge from a stored LSMC policy.
+
+One forward pass of the stored regressions (SwingPolicy.betas; no second pricing
+run) gives, per path and day t, the post-decision value and its price gradients
+
+    W_t = X(state after day t's lift) · beta_t        value of days t+1..T-1
+    g_t = (dW_t/dS_idx, dW_t/dS_dst)                  basis derivatives (envelope theorem)
+
+Day t's cashflow is fixed at day-t prices, so the exposure carried over [t, t+1)
+is g_t (the lsmc `dlt` adds -q_t, the already realized lift). The contract's
+daily M2M PnL over (t, t+1] is
+
+    P_t = cf_{t+1} + W_{t+1} - W_t          (cf_T = W_T = 0; sum_t P_t = sum cf - V_0)
+
+and the hedge is short g in the index and destination futures. Positions on a
+sparse rebalance schedule are the last refreshed gradients, so any number of
+schedules is evaluated from the one cached gradient set.
+"""
+import numpy as np
+
+from basis import get_basis
+from lsmc import SwingPolicy, _swing_state, _exercise_step
+from costs import hedge_legs, cost_model
+from profiling import timed
+
+@timed("hedge.m2m_gradients")
+def m2m_gradients(policy: SwingPolicy, paths, t0=0, cum_lifted=0.0):
+    """
+    Forward pass of `policy` on paths (starting at day t0, cum_lifted taken).
+    Returns dict of (n, T - t0) arrays q, cf, W, d_idx, d_dst, plus V0 (n,)
+    (value at the first day, cashflow included) and value = mean(sum cf).
+    """
+    spec = policy.spec
+    B = get_basis(policy.basis)
+    n, Tp = paths[spec.index].shape[0], paths[spec.index].shape[1]-1
+    T = policy.betas.shape[0]
+    if t0 + Tp != T:
+        raise ValueError(f"Paths cover days {t0}..{t0 + Tp}, policy was fitted for {T}")
+    q, cf, W = np.zeros((n, Tp)), np.zeros((n, Tp)), np.zeros((n, Tp))
+    d_idx, d_dst = np.zeros((n, Tp)), np.zeros((n, Tp))
+    rem_quota = np.full(n, spec.Q_max - cum_lifted)
+
+    for t in range(t0, T):
+        j = t - t0
+        state = _swing_state(paths, spec, t, T, rem_quota, col=j)
+        beta = policy.betas[t]
+        chosen_q, _, spread = _exercise_step(B, B.matrix(state), beta, spec, t, state, rem_quota,
+                                             policy.n_actions, policy.actions)
+        rem_quota = rem_quota - chosen_q
+        post = state.copy()
+        post[:, 2] = rem_quota / spec.Q_max
+        q[:, j], cf[:, j] = chosen_q, spread * chosen_q
+        W[:, j] = B.matrix(post) @ beta
+        d_idx[:, j] = B.dindex(post) @ beta
+        d_dst[:, j] = B.ddest(post) @ beta
+
+    if Tp > 1 and np.ptp(paths[spec.index][:, 0]) == 0 and np.ptp(paths[spec.destination][:, 0]) == 0:
+        # common start: the first day's regression is rank-deficient, so W and g come
+        # from the next day instead: W = E[V_1], g = E[dV_1/dS_1 * S_1/S_0] (pathwise, GBM-type
+        # dynamics), with dV_1/dS_1 = (-q_1 + g_idx_1, q_1 + g_dst_1) by the envelope theorem
+        V1 = cf[:, 1] + W[:, 1]
+        r_i = paths[spec.index][:, 1] / paths[spec.index][:, 0]
+        r_d = paths[spec.destination][:, 1] / paths[spec.destination][:, 0]
+        W[:, 0] = V1.mean()
+        d_idx[:, 0] = ((d_idx[:, 1] - q[:, 1]) * r_i).mean()
+        d_dst[:, 0] = ((d_dst[:, 1] + q[:, 1]) * r_d).mean()
+
+    return {"q": q, "cf": cf, "W": W, "d_idx": d_idx, "d_dst": d_dst,
+            "V0": cf[:, 0] + W[:, 0], "value": float(cf.sum(axis=1).mean())}
+
+def rebalance_mask(schedule, T):
+    """
+    (T,) bool mask of rebalance days. schedule: None or 1 (daily), int k (every k
+    days), a sequence of days or a (T,) bool array. Day 0 (opening trade) is always on.
+    """
+    if schedule is None:
+        schedule = 1
+    if np.isscalar(schedule) and not isinstance(schedule, (bool, np.bool_)):
+        mask = np.arange(T) % int(schedule) == 0
+    else:
+        s = np.asarray(schedule)
+        if s.dtype == bool:
+            if s.shape != (T,):
+                raise ValueError(f"Rebalance mask must have shape ({T},)")
+            mask = s.copy()
+        else:
+            mask = np.zeros(T, dtype=bool)
+            mask[s.astype(int)] = True
+    mask[0] = True
+    return mask
+
+def hedge_positions(grads, schedule=None):
+    """(n, T, 2) futures positions (index, destination): -g at the last rebalance day."""
+    G = -np.stack([grads["d_idx"], grads["d_dst"]], axis=-1)
+    T = G.shape[1]
+    mask = rebalance_mask(schedule, T)
+    last = np.maximum.accumulate(np.where(mask, np.arange(T), 0))
+    return G[:, last]
+
+@timed("hedge.m2m")
+def replication_report(grads, paths, spec, schedule=None, tc_bps=0.0, lot=None, costs=None):
+    """
+    Per-day replication-error decomposition for one rebalance schedule.
+    Returns dict of (n, T) arrays
+      m2m     P_t, unhedged M2M change of the contract
+      hedge   gross hedge PnL pos_t · dS_t (hedge_idx / hedge_dst per leg)
+      costs   trading costs (costs.py)
+      error   m2m + hedge - costs
+    and per-day cross-path summaries (T,) var_m2m, var_error, explained
+    (1 - var_error/var_m2m), plus path totals pnl_unhedged (sum cf - V0),
+    pnl_hedge (net of costs), he_var and n_rebalances.
+    """
+    model = cost_model(tc_bps, lot, costs)
+    cf, W = grads["cf"], grads["W"]
+    n, T = cf.shape
+    nxt = lambda a: np.concatenate([a[:, 1:], np.zeros((n, 1))], axis=1)
+    m2m = nxt(cf) + nxt(W) - W
+
+    pos = model.positions(hedge_positions(grads, schedule))
+    prices, dS = hedge_legs(paths, spec, 2)
+    legs = pos * dS
+    day_costs = model.day_costs(pos, prices).sum(axis=-1)
+    hedge = legs.sum(axis=-1)
+    error = m2m + hedge - day_costs
+
+    var_m2m, var_err = m2m.var(axis=0, ddof=1), error.var(axis=0, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        explained = np.where(var_m2m > 0, 1.0 - var_err / var_m2m, np.nan)
+    pnl_u = m2m.sum(axis=1)
+    pnl_h = (hedge - day_costs).sum(axis=1)
+    he = 1.0 - np.var(pnl_u + pnl_h, ddof=1) / np.var(pnl_u, ddof=1)
+    return {"m2m": m2m, "hedge": hedge, "hedge_idx": legs[..., 0], "hedge_dst": legs[..., 1],
+            "costs": day_costs, "error": error,
+            "var_m2m": var_m2m, "var_error": var_err, "explained": explained,
+            "pnl_unhedged": pnl_u, "pnl_hedge": pnl_h, "he_var": float(he),
+            "n_rebalances": int(rebalance_mask(schedule, T).sum())}
+
+def compare_schedules(grads, paths, spec, schedules, tc_bps=0.0, lot=None, costs=None):
+    """
+    {name: summary} for several rebalance schedules ({name: schedule}) on the same
+    cached gradients: he_var, stdev of total replication error, mean costs, n_rebalances.
+    """
+    out = {}
+    for name, sched in schedules.items():
+        r = replication_report(grads, paths, spec, sched, tc_bps, lot, costs)
+        out[name] = {"he_var": r["he_var"],
+                     "error_stdev": float(r["error"].sum(axis=1).std(ddof=1)),
+                     "costs_mean": float(r["costs"].sum(axis=1).mean()),
+                     "n_rebalances": r["n_rebalances"]}
+    return out
@@ -1,17 +1,147 @@
 import numpy as np
+from scipy.optimize import linprog, minimize
+from scipy.special import expit
+from risk_metrics import var_es
 
 def cvar(pnl, alpha=0.05):
-    # Expected shortfall estimator
-    q = np.quantile(pnl, alpha)
-    tail = pnl[pnl <= q]
-    return tail.mean()
+    # Expected shortfall estimator (same convention as risk_metrics.var_es)
+    return var_es(pnl, alpha)[1]
 
-def mean_cvar_optimize(weights_init, pnl_matrix, lam=2.0):
+def _free_fixed(weights_init, m, fixed):
+    w0 = np.ones(m) if weights_init is None else np.asarray(weights_init, dtype=float).copy()
+    fixed = sorted(j % m for j in fixed)
+    free = [j for j in range(m) if j not in fixed]
+    return w0, free, fixed
+
+def _ru_lp(P, mu, free, fixed, w0, lam, alpha, bounds, active, tol, max_rounds):
+    """
+    Rockafellar–Uryasev LP with scenario (constraint) generation: only scenarios in
+    `active` carry u_i >= L_i - t; violated ones are added until none remain, which
+    gives the optimum of the full LP. Returns (w, t, active).
+
+    Each round solves the LP dual (one multiplier per active scenario, len(free)+1
+    equality rows), which HiGHS handles much faster than the primal; w and t are
+    read from the equality marginals.
     """
-    Maximize E[PnL] - λ * ES_5%
+    n, f = P.shape[0], len(free)
+    chunk = max(int(alpha * n), 100)
+    Pf = P[:, free]
+    # the relaxed LP (few scenarios) can be unbounded although the full one is not:
+    # solve inside an artificial box and only report unboundedness if it binds at the end
+    big = 1e6 * (1.0 + np.abs(w0).max())
+    lo = np.full(f, -big if bounds[0] is None else bounds[0])
+    hi = np.full(f, big if bounds[1] is None else bounds[1])
+    base = P[:, fixed] @ w0[fixed]                       # PnL of the fixed legs
+    kappa = lam / (alpha * n)
+    I = np.eye(f)
+    for _ in range(max_rounds):
+        k = active.size
+        # dual: min base.y + hi.r - lo.s  s.t.  Pf^T y - r + s = -mu_free,  sum(y) = lam,
+        #       0 <= y <= kappa, r, s >= 0   (primal: -P_i w - t - u_i <= base_i, u >= 0)
+        c = np.concatenate([base[active], hi, -lo])
+        A_eq = np.block([[Pf[active].T, -I, I],
+                         [np.ones((1, k)), np.zeros((1, 2 * f))]])
+        b_eq = np.append(-mu[free], lam)
+        bnds = [(0, kappa)] * k + [(0, None)] * (2 * f)
+        res = linprog(c, A_eq=A_eq, b_eq=b_eq, bounds=bnds, method="highs")
+        if not res.success:
+            raise RuntimeError(f"linprog failed: {res.message}")
+        wf, t = -res.eqlin.marginals[:f], -res.eqlin.marginals[f]
+        w = w0.copy(); w[free] = wf
+        excess = -(P @ w) - t
+        excess[active] = -np.inf
+        new = np.flatnonzero(excess > tol * (1.0 + np.abs(t)))
+        if new.size > chunk:                             # most violated first
+            new = new[np.argpartition(excess[new], new.size - chunk)[new.size - chunk:]]
+        if new.size == 0:
+            if np.any(np.abs(wf) >= 0.999 * big):
+                raise ValueError("mean-CVaR LP is unbounded; pass finite weight bounds")
+            return w, t, active
+        active = np.union1d(active, new)
+    raise RuntimeError("constraint generation did not converge")
+
+def _smooth_cvar(P, mu, free, fixed, w0, lam, alpha, bounds, t0, smooth):
+    """Smoothed RU objective (softplus excess loss) minimized with L-BFGS-B."""
+    n = P.shape[0]
+    Pf = P[:, free]
+    base = P[:, fixed] @ w0[fixed]
+    eps = smooth * max(np.std(P @ w0), 1e-12)            # smoothing width in PnL units
+
+    def fun(z):
+        wf, t = z[:-1], z[-1]
+        e = (-(base + Pf @ wf) - t) / eps
+        sp = eps * np.logaddexp(0.0, e)
+        s = expit(e)
+        obj = -(mu[fixed] @ w0[fixed] + mu[free] @ wf) + lam * (t + sp.sum() / (alpha * n))
+        g_w = -mu[free] - lam * (Pf.T @ s) / (alpha * n)
+        g_t = lam * (1.0 - s.sum() / (alpha * n))
+        return obj, np.append(g_w, g_t)
+
+    # as in _ru_lp: solve inside an artificial box, unbounded if it binds
+    big = 1e6 * (1.0 + np.abs(w0).max())
+    box = (-big if bounds[0] is None else bounds[0], big if bounds[1] is None else bounds[1])
+    z0 = np.append(w0[free], t0)
+    res = minimize(fun, z0, jac=True, method="L-BFGS-B",
+                   bounds=[box] * len(free) + [(None, None)])
+    if not res.success:
+        raise RuntimeError(f"L-BFGS-B failed: {res.message}")
+    wf = res.x[:-1]
+    if np.any(np.abs(wf) >= 0.999 * big):
+        raise ValueError("mean-CVaR problem is unbounded; pass finite weight bounds")
+    w = w0.copy(); w[free] = wf
+    return w, res.x[-1]
+
+def mean_cvar_optimize(weights_init, pnl_matrix, lam=2.0, alpha=0.05, method="lp",
+                       fixed=(0,), bounds=(None, None), active=None, smooth=1e-3,
+                       tol=1e-9, max_rounds=50):
+    """
+    Maximize E[PnL] - λ * CVaR_α (CVaR = expected loss in the worst α tail).
     pnl_matrix: shape (n_paths, n_assets) where assets = [unhedged_contract, HH_hedge, TTF_hedge, ...]
-    Solve a small unconstrained quadratic-like problem or grid-search for demo.
+    fixed: asset indices held at weights_init (default: the contract leg).
+    bounds: (lo, hi) for every free weight (None = unbounded).
+    method: 'lp'     Rockafellar–Uryasev LP (HiGHS) with scenario generation, exact;
+            'smooth' softplus-smoothed CVaR, L-BFGS-B (relative width `smooth`).
+    Without a warm start the LP scenario set is seeded from the smoothed solution.
+    Warm start: pass the previous result's weights as weights_init (and its
+    'active' scenario set for 'lp'); efficient_frontier does this across λ.
+    Returns dict(weights, objective, mean, cvar, var, active).
+    """
+    P = np.asarray(pnl_matrix, dtype=float)
+    n, m = P.shape
+    w0, free, fixed = _free_fixed(weights_init, m, fixed)
+    mu = P.mean(axis=0)
+    loss0 = -(P @ w0)
+    t0 = np.quantile(loss0, 1.0 - alpha)
+
+    if method == "lp":
+        if active is None:
+            # seed the scenario set with the tail of the (cheap) smoothed solution
+            ws, _ = _smooth_cvar(P, mu, free, fixed, w0, lam, alpha, bounds, t0, smooth)
+            loss_s = -(P @ ws)
+            k = min(n, int(np.ceil(1.5 * alpha * n)) + len(free) + 1)
+            active = np.argpartition(loss_s, n - k)[n - k:]
+        w, t, active = _ru_lp(P, mu, free, fixed, w0, lam, alpha, bounds,
+                              np.unique(np.asarray(active, dtype=int)), tol, max_rounds)
+    elif method == "smooth":
+        w, t = _smooth_cvar(P, mu, free, fixed, w0, lam, alpha, bounds, t0, smooth)
+        active = None
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+    pnl = P @ w
+    loss = -pnl
+    cv = t + np.maximum(loss - t, 0.0).sum() / (alpha * n)   # RU CVaR at the optimal VaR t
+    return {"weights": w, "objective": float(pnl.mean() - lam * cv), "mean": float(pnl.mean()),
+            "cvar": float(cv), "var": float(t), "active": active}
+
+def efficient_frontier(pnl_matrix, lams, weights_init=None, **kw):
+    """
+    mean_cvar_optimize over a sequence of λ, each warm-started from the previous
+    solution (weights and active scenarios). Returns list of result dicts.
     """
-    W = weights_init
-    # simple projected gradient or grid search in examples/run_demo.py
-    ...
+    out, w, active = [], weights_init, None
+    for lam in lams:
+        res = mean_cvar_optimize(w, pnl_matrix, lam=lam, active=active, **kw)
+        w, active = res["weights"], res["active"]
+        out.append(res)
+    return out
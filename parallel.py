@@ -0,0 +1,149 @@
+# parallel.py
+"""
+Multi-process execution over path shards.
+
+Shards are contiguous path ranges [start, stop). Every worker simulates its own
+shard with MultiFactorOU.simulate_block_range, whose per-block RNG streams make
+path i independent of the shard layout, so no paths are shipped between
+processes. LSMC runs in lockstep: each day the workers send their regression
+cross-products (XᵀX, Xᵀy), the parent sums them in shard order and broadcasts
+beta back. Results are deterministic for a given seed and worker count.
+"""
+import os
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from basis import get_basis
+from lsmc import (SwingPolicy, _swing_state, _exercise_step, cross_products, solve_normal, apply_policy,
+                  reachable_quota, quota_samples)
+from level_strip_hedge import apply_strip_positions
+
+def shard_ranges(n_paths, n_workers):
+    """Contiguous (start, stop) ranges, as equal as possible."""
+    edges = np.linspace(0, int(n_paths), int(n_workers) + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+def _prepare(sim, n_workers):
+    sim._stream_entropy()      # fix the stream seed before the simulator is pickled
+    return int(n_workers or os.cpu_count() or 1)
+
+# ---------------- path generation ----------------
+
+def _simulate_shard(args):
+    sim, S0, B0, T, a, b, stream_block, dtype = args
+    return sim.simulate_block_range(S0, B0, T, a, b, stream_block=stream_block, dtype=dtype)
+
+def parallel_simulate(sim, S0, B0=None, T=30, n_paths=1000, n_workers=None,
+                      stream_block=4096, dtype=float):
+    """simulate_block_range(0, n_paths) split across processes; returns one paths dict."""
+    n_workers = _prepare(sim, n_workers)
+    jobs = [(sim, S0, B0, T, a, b, stream_block, dtype) for a, b in shard_ranges(n_paths, n_workers)]
+    with ProcessPoolExecutor(len(jobs)) as ex:
+        shards = list(ex.map(_simulate_shard, jobs))
+    return {k: np.concatenate([s[k] for s in shards]) for k in shards[0]}
+
+# ---------------- LSMC with reduced cross-products ----------------
+
+def _lsmc_worker(conn, sim, S0, B0, T, a, b, stream_block, spec, basis_spec, n_actions, actions):
+    try:
+        paths = sim.simulate_block_range(S0, B0, T, a, b, stream_block=stream_block)
+        B = get_basis(basis_spec)
+        n = b - a
+        betas = np.zeros((T, B.size))
+        rem_lo, rem_hi = reachable_quota(spec, T)
+        target = np.zeros(n)
+        for t in reversed(range(T)):
+            rem = quota_samples(rem_lo[t], rem_hi[t], t, n, start=a)     # global path numbers
+            if t + 1 < T:
+                nxt = _swing_state(paths, spec, t+1, T, rem)
+                _, target, _ = _exercise_step(B, B.matrix(nxt), betas[t+1], spec, t+1, nxt, rem,
+                                              n_actions, actions)
+            conn.send(cross_products(B.matrix(_swing_state(paths, spec, t, T, rem)), target))
+            betas[t] = conn.recv()
+        _, q, cf, dlt = apply_policy(SwingPolicy(spec, basis_spec, betas, n_actions, actions), paths)
+        conn.send((q, cf, dlt))
+    except BaseException:
+        # ship the traceback: the parent re-raises it instead of hitting EOFError
+        conn.send(traceback.format_exc())
+    finally:
+        conn.close()
+
+def _recv(conn):
+    msg = conn.recv()
+    if isinstance(msg, str):
+        raise RuntimeError(f"LSMC worker failed:\n{msg}")
+    return msg
+
+def parallel_lsmc_swing_value(sim, S0, B0, T, n_paths, spec, n_workers=None, basis=None,
+                              n_actions=3, actions="grid", stream_block=4096, return_policy=False):
+    """
+    lsmc_swing_value over n_paths simulated shard-wise on n_workers processes.
+    Returns (value, q, cf, dlt) on the concatenated paths (+ SwingPolicy if requested).
+    """
+    n_workers = _prepare(sim, n_workers)
+    B = get_basis(basis)
+    basis_spec = B.spec
+    ctx = mp.get_context()
+    conns, procs = [], []
+    for a, b in shard_ranges(n_paths, n_workers):
+        parent, child = ctx.Pipe()
+        p = ctx.Process(target=_lsmc_worker, args=(child, sim, S0, B0, T, a, b, stream_block,
+                                                    spec, basis_spec, n_actions, actions))
+        p.start(); child.close()
+        conns.append(parent); procs.append(p)
+    try:
+        betas = np.zeros((T, B.size))
+        for t in reversed(range(T)):
+            parts = [_recv(c) for c in conns]                  # fixed shard order -> deterministic
+            XtX = sum(p[0] for p in parts); Xty = sum(p[1] for p in parts)
+            betas[t] = solve_normal(XtX, Xty)
+            for c in conns:
+                c.send(betas[t])
+        outs = [_recv(c) for c in conns]
+    finally:
+        # a failed shard leaves the others blocked in conn.recv(): stop them before joining
+        for c in conns:
+            c.close()
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+            p.join()
+    q, cf, dlt = (np.concatenate([o[i] for o in outs]) for i in range(3))
+    value = cf.sum(axis=1).mean()
+    if return_policy:
+        return value, q, cf, dlt, SwingPolicy(spec, basis_spec, betas, n_actions, actions)
+    return value, q, cf, dlt
+
+# ---------------- forward valuation + hedge PnL per shard ----------------
+
+def _forward_shard(args):
+    policy, H, sim, S0, B0, T, a, b, stream_block, tc_bps, lot, risk = args
+    paths = sim.simulate_block_range(S0, B0, T, a, b, stream_block=stream_block)
+    _, _, cf, _ = apply_policy(policy, paths)
+    pnl = cf.sum(axis=1)
+    pnl_hedge = (apply_strip_positions(paths, policy.spec, H, tc_bps=tc_bps, lot=lot)
+                 if H is not None else np.zeros(b - a))
+    if risk is not None:
+        risk.update({"Unhedged": pnl, "Hedged": pnl + pnl_hedge})
+    return pnl, pnl_hedge, risk
+
+def parallel_forward_hedge(policy: SwingPolicy, sim, S0, B0, T, n_paths, H=None, n_workers=None,
+                           stream_block=4096, tc_bps=0.0, lot=None, risk=None):
+    """
+    Apply a policy (and optionally a strip H) to fresh shard-simulated paths.
+    risk: optional RiskAccumulator; every shard fills an empty() copy with its
+          "Unhedged" and "Hedged" PnL and the copies are merged into it in shard order.
+    Returns (pnl_unhedged, pnl_hedge), each (n_paths,), concatenated in path order.
+    """
+    n_workers = _prepare(sim, n_workers)
+    part = risk.empty() if risk is not None else None
+    jobs = [(policy, H, sim, S0, B0, T, a, b, stream_block, tc_bps, lot, part)
+            for a, b in shard_ranges(n_paths, n_workers)]
+    with ProcessPoolExecutor(len(jobs)) as ex:
+        outs = list(ex.map(_forward_shard, jobs))
+    if risk is not None:
+        for o in outs:
+            risk.merge(o[2])
+    return np.concatenate([o[0] for o in outs]), np.concatenate([o[1] for o in outs])
@@ -0,0 +1,239 @@
+# portfolio.py
+"""
+Book-level pricing and hedging of many swing contracts on shared scenarios.
+
+* One simulation for the longest horizon; contract k delivers on book days
+  [start_k, start_k + T_k) and sees the path slice [start_k, start_k + T_k].
+* Identical contracts (same spec and start) are priced once and scaled by size.
+* Contracts with the same shape (start, T, index, destination) run their LSMC
+  backward passes stacked: market features and the quota-free design columns are
+  computed once per day for the group, the per-contract regressions are solved
+  as one batch, and the action grid is valued as a (K, G, n) tensor.
+* Cashflows and index/destination deltas are aggregated on the book day grid,
+  giving book PnL, VaR/ES and per-market hedge strips.
+"""
+from dataclasses import dataclass, astuple, field
+from types import SimpleNamespace
+import numpy as np
+
+from swing import SwingSpec, DiversionSpec, feasible_bounds_batch
+from basis import get_basis
+from diversion import diversion_swing_value, destinations
+from level_strip_hedge import ols_batched
+from lsmc import reachable_quota, quota_samples
+from costs import cost_model
+from risk_metrics import var_es_summary
+from profiling import timed
+
+@dataclass
+class Contract:
+    spec: SwingSpec
+    name: str = ""
+    start: int = 0          # first delivery day on the book's day grid
+    size: float = 1.0       # volume multiplier (e.g. number of cargoes)
+
+@dataclass
+class BookResult:
+    values: dict            # contract name -> value (size included)
+    pnl: np.ndarray         # (n,) book PnL per path
+    cf: np.ndarray          # (n, H) book cashflows per day
+    delta: dict             # market -> (n, H) pathwise delta of the book per day
+    contract_pnl: np.ndarray = field(repr=False, default=None)   # (n, n_contracts)
+
+    @property
+    def value(self):
+        return float(self.pnl.mean())
+
+    def risk(self, alpha=0.05, name="Book"):
+        return var_es_summary(self.pnl, name, alpha)
+
+def solve_normal_batched(XtX, Xty, rcond=1e-12):
+    """Stacked lsmc.solve_normal: XtX (G, m, m), Xty (G, m) -> (G, m) min-norm solutions."""
+    return (np.linalg.pinv(XtX, rcond=rcond) @ Xty[..., None])[..., 0]
+
+def _stacked_lsmc(S_idx, S_dst, specs, B, n_actions):
+    """
+    lsmc_swing_value for G same-shape specs on shared paths (n, T+1).
+    Returns per contract cf (G, n, T), index deltas and destination deltas (G, n, T).
+    Decisions and cashflows match the single-contract pricer; deltas agree up to
+    rounding except on rank-deficient days (t=0), where only the min-norm
+    convention defines them.
+    """
+    G = len(specs)
+    n, T = S_idx.shape[0], S_idx.shape[1]-1
+    col = lambda f: np.array([getattr(s, f) for s in specs], dtype=float)[:, None]   # (G, 1)
+    P = SimpleNamespace(T=T, q_min=col("q_min"), q_max=col("q_max"),
+                        Q_min=col("Q_min"), Q_max=col("Q_max"))
+    addon, fee, Qmax = col("spread_addon"), col("fee"), P.Q_max
+    w = np.linspace(0.0, 1.0, int(n_actions))[:, None, None]
+    fixed, qcols, m = B.fixed_cols, B.quota_cols, B.size
+    rows = np.arange(G)[:, None]; ar = np.arange(n)[None, :]
+
+    def market(t):
+        idx, dest = S_idx[:, t], S_dst[:, t]
+        m_state = np.column_stack([idx, dest, np.zeros(n), np.full(n, (t+1)/T), dest - idx])
+        return idx, dest, m_state, B.matrix(m_state)[:, fixed], B.quota_multipliers(m_state)
+
+    def step(t, rem, beta):
+        # stacked exercise decision at remaining quota rem (G, n)
+        idx, dest, m_state, Xf, mult = market(t)
+        lo, hi = feasible_bounds_batch(P, t, rem)              # (G, n)
+        cand = (1.0 - w)*lo + w*hi                             # (K, G, n)
+        spread = dest - (idx + addon) - fee                    # (G, n)
+        cont_fixed = (Xf @ beta[:, fixed].T).T
+        qv = B.quota_value(mult, (rem - cand) / Qmax, beta[:, qcols].T[:, :, None])
+        vals = spread*cand + cont_fixed + qv
+        take = np.argmax(vals, axis=0)                         # (G, n)
+        return cand[take, rows, ar], vals[take, rows, ar], spread, m_state, mult
+
+    # backward: regressions on sampled reachable quota states (as lsmc_swing_value)
+    betas = np.zeros((T, G, m))
+    rem_lo, rem_hi = reachable_quota(P, T)                     # (T, G, 1) each
+    target = np.zeros((G, n))
+    for t in reversed(range(T)):
+        rem = quota_samples(rem_lo[t], rem_hi[t], t, n)        # (G, n)
+        if t + 1 < T:
+            target = step(t+1, rem, betas[t+1])[1]
+        _, _, _, Xf, mult = market(t)                          # Xf shared by the group
+        Xq = B.quota_columns(mult, rem / Qmax)                 # (G, n, mq)
+        # normal equations from the shared block Xf and the per-contract quota block
+        XtX = np.empty((G, m, m)); Xty = np.empty((G, m))
+        XtX[:, fixed[:, None], fixed] = Xf.T @ Xf
+        fq = np.einsum('nf,gnq->gfq', Xf, Xq)
+        XtX[:, fixed[:, None], qcols] = fq
+        XtX[:, qcols[:, None], fixed] = fq.transpose(0, 2, 1)
+        XtX[:, qcols[:, None], qcols] = np.einsum('gnq,gnr->gqr', Xq, Xq)
+        Xty[:, fixed] = target @ Xf
+        Xty[:, qcols] = np.einsum('gnq,gn->gq', Xq, target)
+        betas[t] = solve_normal_batched(XtX, Xty)             # (G, m)
+
+    # forward: the fitted policies on the same paths
+    cf = np.zeros((G, n, T)); dlt_i = np.zeros((G, n, T)); dlt_d = np.zeros((G, n, T))
+    rem = np.repeat(Qmax, n, axis=1)
+    for t in range(T):
+        beta = betas[t]
+        a, _, spread, m_state, mult = step(t, rem, beta)
+        # deltas: fixed columns from the shared market state, quota columns as
+        # d(multiplier) * quota factor (the quota factor does not depend on prices)
+        qf = B.quota_columns(np.ones_like(mult), rem / Qmax)   # (G, n, mq)
+        dXi, dXd = B.dindex(m_state)[:, fixed], B.ddest(m_state)[:, fixed]
+        dmi = B.multiplier_deriv(m_state, "index") - B.multiplier_deriv(m_state, "spread")
+        dmd = B.multiplier_deriv(m_state, "dest") + B.multiplier_deriv(m_state, "spread")
+        bq = beta[:, qcols]
+        cf[:, :, t] = spread * a
+        dlt_i[:, :, t] = -a + (dXi @ beta[:, fixed].T).T + np.einsum('gnq,gq->gn', qf * dmi, bq)
+        dlt_d[:, :, t] = a + (dXd @ beta[:, fixed].T).T + np.einsum('gnq,gq->gn', qf * dmd, bq)
+        rem = rem - a
+    return cf, dlt_i, dlt_d
+
+class Portfolio:
+    """
+    A book of swing contracts priced on shared scenarios.
+    max_stack bounds the number of contracts per stacked backward pass (memory ~ max_stack * n * n_basis).
+    """
+    def __init__(self, contracts, basis=None, n_actions=3, max_stack=32):
+        self.contracts = [c if c.name else Contract(c.spec, f"c{i}", c.start, c.size)
+                          for i, c in enumerate(contracts)]
+        self.basis, self.n_actions, self.max_stack = basis, int(n_actions), int(max_stack)
+        self._features = {}
+
+    @property
+    def horizon(self):
+        return max(c.start + c.spec.T for c in self.contracts)
+
+    @property
+    def markets(self):
+        names = set()
+        for c in self.contracts:
+            names.add(c.spec.index)
+            names.update(destinations(c.spec)[0])
+        return sorted(names)
+
+    def simulate(self, sim, S0, B0=None, n_paths=1000, **kw):
+        """Scenarios for the whole book: one simulate_paths call over the longest horizon."""
+        self._features = {}
+        return sim.simulate_paths(S0, B0, T=self.horizon, n_paths=n_paths, **kw)
+
+    def increments(self, paths, market):
+        """Price increments dS (n, H) of one market, cached for the latest paths only."""
+        S = paths[market]
+        key = ("dS", market)
+        hit = self._features.get(key)
+        # one entry per market, matched by identity: a new path set replaces it
+        if hit is None or hit[0] is not S:
+            hit = self._features[key] = (S, S[:, 1:] - S[:, :-1])
+        return hit[1]
+
+    def groups(self):
+        """{shape: {spec key: [contract indices]}}; shape = (start, T, index, destination, diversion)."""
+        out = {}
+        for i, c in enumerate(self.contracts):
+            s = c.spec
+            shape = (c.start, s.T, s.index, s.destination, isinstance(s, DiversionSpec))
+            out.setdefault(shape, {}).setdefault(astuple(s), []).append(i)
+        return out
+
+    @timed("portfolio.price")
+    def price(self, paths):
+        """Price every contract on the shared paths and aggregate to the book."""
+        B = get_basis(self.basis)
+        n, H = paths[self.contracts[0].spec.index].shape[0], self.horizon
+        if paths[self.contracts[0].spec.index].shape[1] < H + 1:
+            raise ValueError(f"Paths cover fewer than the book horizon of {H} days")
+        cf_book = np.zeros((n, H))
+        delta = {mk: np.zeros((n, H)) for mk in self.markets}
+        contract_pnl = np.zeros((n, len(self.contracts)))
+        values = {}
+
+        def book(ids, cf, legs):
+            for i in ids:
+                c = self.contracts[i]
+                days = slice(c.start, c.start + c.spec.T)
+                cf_book[:, days] += c.size * cf
+                for mk, d in legs.items():
+                    delta[mk][:, days] += c.size * d
+                contract_pnl[:, i] = c.size * cf.sum(axis=1)
+                values[c.name] = float(contract_pnl[:, i].mean())
+
+        for (start, T, index, dest, diversion), specs in self.groups().items():
+            window = slice(start, start + T + 1)
+            spec_ids = list(specs.values())
+            if diversion:
+                for ids in spec_ids:
+                    spec = self.contracts[ids[0]].spec
+                    sub = {k: v[:, window] for k, v in paths.items()}
+                    _, _, cf, dlt, legs = diversion_swing_value(sub, spec, B, self.n_actions,
+                                                                return_legs=True)
+                    per_mk = {index: dlt}
+                    for mk, d in legs["delta"].items():
+                        per_mk[mk] = per_mk.get(mk, 0.0) + d
+                    book(ids, cf, per_mk)
+                continue
+            S_idx, S_dst = paths[index][:, window], paths[dest][:, window]
+            for a in range(0, len(spec_ids), self.max_stack):
+                chunk = spec_ids[a:a + self.max_stack]
+                specs_c = [self.contracts[ids[0]].spec for ids in chunk]
+                cf, dlt_i, dlt_d = _stacked_lsmc(S_idx, S_dst, specs_c, B, self.n_actions)
+                for g, ids in enumerate(chunk):
+                    legs = {index: dlt_i[g]}
+                    legs[dest] = legs.get(dest, 0.0) + dlt_d[g]
+                    book(ids, cf[g], legs)
+
+        return BookResult(values, cf_book.sum(axis=1), cf_book, delta, contract_pnl)
+
+    def hedge_strips(self, paths, result: BookResult, markets=None, ridge=1e-6,
+                     tc_bps=0.0, lot=None, costs=None):
+        """
+        Level → futures strip hedge of the book cashflows (as hedge_level_strip) on
+        several markets at once. Returns (pnl_hedge (n,), H (H_days, k)), columns in `markets` order.
+        """
+        markets = list(markets or self.markets)
+        n, Hd = result.cf.shape
+        levels = [paths[mk][:, :Hd].T for mk in markets]
+        X = np.stack([np.ones((Hd, n))] + levels, axis=1)      # (H, 1+k, n)
+        betas = ols_batched(X, result.cf.T, ridge=ridge)[:, 1:]
+        model = cost_model(tc_bps, lot, costs)
+        Hpos = model.positions(-np.flip(np.cumsum(np.flip(betas, axis=0), axis=0), axis=0))
+        prices = np.stack([paths[mk][:, :Hd] for mk in markets], axis=-1)
+        dS = np.stack([self.increments(paths, mk)[:, :Hd] for mk in markets], axis=-1)
+        return model.hedge_pnl(Hpos, prices, dS), Hpos
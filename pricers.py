@@ -0,0 +1,16 @@
+# pricers.py
+"""Engine switch for swing pricing; every engine returns (value, q, cf, dlt)."""
+from lsmc import lsmc_swing_value
+from swing_dp import grid_swing_value
+from diversion import diversion_swing_value
+
+PRICERS = {
+    "lsmc": lsmc_swing_value,   # single global regression over (prices, remaining quota)
+    "grid": grid_swing_value,   # quota-grid DP with per-node regressions
+    "diversion": diversion_swing_value,   # daily (volume, destination) choice, DiversionSpec
+}
+
+def price_swing(paths, spec, engine="lsmc", **kwargs):
+    if engine not in PRICERS:
+        raise ValueError(f"Unknown pricing engine '{engine}'. Available: {sorted(PRICERS)}")
+    return PRICERS[engine](paths, spec, **kwargs)
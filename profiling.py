@@ -0,0 +1,102 @@
+# profiling.py
+"""
+Per-stage wall-clock timers for the simulate -> price -> hedge -> risk pipeline.
+
+Off by default: an instrumented call then costs one flag check. Switch at runtime
+with profiling.enable() / disable(), the profiled() context, or SWING_PROFILE=1.
+
+    @timed("lsmc")                 whole function
+    with stage("lsmc.regress"):    block inside a function
+
+Stages nest and record inclusive times under their own names. Stats are
+per process (workers of parallel.py keep their own).
+"""
+import os
+import time
+import functools
+from contextlib import contextmanager, nullcontext
+
+_enabled = os.environ.get("SWING_PROFILE", "") not in ("", "0")
+_stats = {}        # name -> [calls, total seconds]
+_NULL = nullcontext()
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+def disable():
+    enable(False)
+
+def enabled():
+    return _enabled
+
+def reset():
+    _stats.clear()
+
+def _record(name, dt):
+    s = _stats.get(name)
+    if s is None:
+        _stats[name] = [1, dt]
+    else:
+        s[0] += 1
+        s[1] += dt
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, time.perf_counter() - self.t0)
+        return False
+
+def stage(name):
+    """Context manager timing a block under `name` (a no-op when profiling is off)."""
+    return _Stage(name) if _enabled else _NULL
+
+def timed(name=None):
+    """Decorator timing every call of a function under `name` (default: its qualified name)."""
+    def deco(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(label, time.perf_counter() - t0)
+        return wrapper
+    return deco
+
+def report():
+    """{stage: {'calls', 'total_s', 'mean_s'}}, slowest first."""
+    rows = sorted(_stats.items(), key=lambda kv: -kv[1][1])
+    return {k: {"calls": c, "total_s": tot, "mean_s": tot / c} for k, (c, tot) in rows}
+
+def format_report(rep=None):
+    rep = report() if rep is None else rep
+    lines = [f"{'stage':<28} {'calls':>7} {'total_s':>10} {'mean_ms':>10}"]
+    lines += [f"{k:<28} {v['calls']:>7} {v['total_s']:>10.4f} {1e3*v['mean_s']:>10.3f}" for k, v in rep.items()]
+    return "\n".join(lines)
+
+@contextmanager
+def profiled(reset_stats=True):
+    """Enable profiling inside the block; yields a dict filled with report() on exit."""
+    prev = _enabled
+    if reset_stats:
+        reset()
+    enable()
+    out = {}
+    try:
+        yield out
+    finally:
+        enable(prev)
+        out.update(report())
@@ -1,9 +1,14 @@
 # hedging/regression_hedge.py
 import numpy as np
+from level_strip_hedge import ols_batched
+from costs import hedge_legs, cost_model
+from profiling import timed
 
-def hedge_regression_daily(paths, spec, cf, two_assets=True):
+@timed("hedge.regression")
+def hedge_regression_daily(paths, spec, cf, two_assets=True, tc_bps=0.0, lot=None, costs=None):
     """
     Choose daily hedge positions to minimize Var( cf_t + h_t · dS_t )
+    Costs (tc_bps/lot or a costs.CostModel) are charged per path via costs.py.
     Returns: (pnl_hedge, hedge_weights) where pnl_hedge is per-path sum over t
     """
     S_idx  = paths[spec.index]         # (n_paths, T+1)
@@ -14,19 +19,14 @@ def hedge_regression_daily(paths, spec, cf, two_assets=True):
         dS_dst = S_dst[:, 1:] - S_dst[:, :-1]
 
     n, T = dS_idx.shape
-    pnl_hedge = np.zeros(n)
-    H = []
 
-    for t in range(T):
-        y = cf[:, t]                              # current day's cashflow
-        if two_assets:
-            X = np.column_stack([dS_idx[:, t], dS_dst[:, t]])  # (n,2)
-        else:
-            X = dS_idx[:, t:t+1]                               # (n,1)
+    # Solve h_t = argmin_h || y_t + X_t h ||_2 for every day at once (least squares on -y)
+    cols = [dS_idx.T] + ([dS_dst.T] if two_assets else [])
+    X = np.stack(cols, axis=1)                    # (T, 1 or 2, n)
+    H = ols_batched(X, -cf[:, :T].T)              # (T, 1 or 2)
+    model = cost_model(tc_bps, lot, costs)
+    H = model.positions(H)
+    prices, dS = hedge_legs(paths, spec, H.shape[1])
+    pnl_hedge = model.hedge_pnl(H, prices, dS)
 
-        # Solve h_t = argmin_h || y + X h ||_2  => least-squares on (-y)
-        h_t, *_ = np.linalg.lstsq(X, -y, rcond=None)
-        pnl_hedge += X @ h_t
-        H.append(h_t)
-
-    return pnl_hedge, np.array(H)  # shapes: (n,), (T, 2 or 1)
+    return pnl_hedge, H  # shapes: (n,), (T, 2 or 1)
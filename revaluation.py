@@ -0,0 +1,71 @@
+# revaluation.py
+"""
+Incremental revaluation of a swing contract when only spot prices move.
+
+Unit-start paths (HH/TTF/JKM starting at 1) are drawn once; for a new S0 they
+are rescaled, not redrawn (MultiFactorOU paths are proportional to S0). The
+LSMC policy is fitted once and either reused as is (forward pass only) or refitted
+on the remaining days. Elapsed days are skipped: from day `day` with the
+realized cumulative volume (a SwingState or a number), only the remaining tenor
+is valued, with the same feature normalization as the full run.
+"""
+from swing import SwingSpec, SwingState
+from lsmc import lsmc_swing_value, apply_policy, bumped_values
+
+def _lifted(lifted):
+    return float(lifted.cum) if isinstance(lifted, SwingState) else float(lifted)
+
+class Revaluator:
+    """
+    sim: MultiFactorOU (its draws are consumed once, at construction).
+    Typical use: rv.fit(S0) once per batch, then rv.revalue(S0_tick, day, state) per tick.
+    """
+    def __init__(self, sim, spec: SwingSpec, n_paths=5000, basis=None, n_actions=3, dtype=float):
+        self.sim, self.spec = sim, spec
+        self.basis, self.n_actions = basis, n_actions
+        self.unit = sim.simulate_unit_paths(spec.T, n_paths, dtype)     # (3, n, T+1)
+        self.policy = None
+
+    def paths(self, S0, B0=None, day=0):
+        """Paths over the remaining days [day, T], starting at S0 (no new draws)."""
+        return self.sim.scale_paths(self.unit[:, :, :self.spec.T - day + 1], S0, B0)
+
+    def fit(self, S0, B0=None, day=0, lifted=0.0):
+        """
+        Backward pass over the remaining days; betas from `day` on replace the stored
+        ones (earlier days are kept). Returns the in-sample value.
+        """
+        value, _, _, _, policy = lsmc_swing_value(self.paths(S0, B0, day), self.spec, basis=self.basis,
+                                                  n_actions=self.n_actions, return_policy=True,
+                                                  t0=day, cum_lifted=_lifted(lifted))
+        if self.policy is not None and day > 0:
+            policy.betas[:day] = self.policy.betas[:day]
+        self.policy = policy
+        return value
+
+    def revalue(self, S0, B0=None, day=0, lifted=0.0, mode="reuse", bump=0.01, deltas=True):
+        """
+        Value and spot deltas at new start prices.
+        mode: 'reuse' forward pass of the stored policy (no regressions; fits once if none);
+              'refit' backward pass over the remaining days first.
+        Deltas are central differences in S0 (relative bump) on the same unit paths,
+        valued with base/up/down scenarios stacked in one forward pass
+        (lsmc.bumped_values, shared with SensitivityEngine; deltas=False values the
+        base scenario only).
+        Returns dict(value, delta_idx, delta_dst).
+        """
+        if mode == "refit" or self.policy is None:
+            self.fit(S0, B0, day, lifted)
+        elif mode != "reuse":
+            raise ValueError(f"Unknown revaluation mode: {mode}")
+        spec = self.spec
+        base = self.paths(S0, B0, day)
+        if not deltas:
+            return {"value": float(apply_policy(self.policy, base, t0=day, cum_lifted=_lifted(lifted))[0])}
+        v0, vi_up, vi_dn, vd_up, vd_dn = bumped_values(self.policy, base, bump, t0=day,
+                                                       cum_lifted=_lifted(lifted))
+        # whole paths scale with S0, so the bump is relative to the start price
+        h_i, h_d = base[spec.index][0, 0] * bump, base[spec.destination][0, 0] * bump
+        return {"value": float(v0),
+                "delta_idx": float((vi_up - vi_dn) / (2*h_i)),
+                "delta_dst": float((vd_up - vd_dn) / (2*h_d))}
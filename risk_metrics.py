@@ -1,5 +1,6 @@
 # src/hedging/risk_metrics.py
 import numpy as np
+from profiling import timed
 
 def var_es(pnl, alpha: float = 0.05):
     """Return (VaR_alpha, ES_alpha) for a 1D PnL array."""
@@ -8,17 +9,22 @@ def var_es(pnl, alpha: float = 0.05):
     es = pnl[pnl <= q].mean() if np.any(pnl <= q) else q
     return float(q), float(es)
 
-def var_es_summary(pnl, name: str = "Series", alpha: float = 0.05):
-    """Small dict with mean/std/VaR/ES, handy for printing/logging."""
+@timed("risk.var_es")
+def var_es_summary(pnl, name: str = "Series", alpha=0.05):
+    """Small dict with mean/std/VaR/ES, handy for printing/logging.
+    alpha may be a sequence: one VaR/ES pair per level from a single quantile call."""
     pnl = np.asarray(pnl)
-    q, es = var_es(pnl, alpha=alpha)
-    return {
+    alphas = np.atleast_1d(alpha)
+    out = {
         "name": name,
         "mean": float(np.mean(pnl)),
         "stdev": float(np.std(pnl, ddof=1)),
-        f"VaR_{int(alpha*100)}%": q,
-        f"ES_{int(alpha*100)}%": es,
     }
+    for a, q in zip(alphas, np.atleast_1d(np.quantile(pnl, alphas))):
+        tail = pnl[pnl <= q]
+        out[f"VaR_{int(a*100)}%"] = float(q)
+        out[f"ES_{int(a*100)}%"] = float(tail.mean()) if tail.size else float(q)
+    return out
 
 def hedge_effectiveness_var(unhedged, hedged):
     """HE_var = 1 - Var(hedged)/Var(unhedged), with ddof=1 and safety guards."""
@@ -42,3 +48,191 @@ def hedge_effectiveness_es_from_stats(stats_u, stats_h, key="ES_5%"):
     if es_u <= 0:
         return np.nan
     return 1.0 - (es_h / es_u)
+
+# ---------------- streaming / mergeable accumulators ----------------
+
+class TailReservoir:
+    """
+    Exact lower tail: keeps the `capacity` smallest values seen (mergeable).
+    With capacity >= alpha*(n-1) + 2 it reproduces var_es exactly.
+    """
+    error_bound = 0.0
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.values = np.empty(0)
+        self.n = 0
+
+    def update(self, x):
+        x = np.asarray(x, dtype=float).ravel()
+        self.n += x.size
+        v = np.concatenate([self.values, x])
+        if v.size > self.capacity:
+            v = np.partition(v, self.capacity - 1)[:self.capacity]
+        self.values = v
+        return self
+
+    def merge(self, other):
+        n = self.n + other.n
+        self.update(other.values)
+        self.n = n
+        return self
+
+    def var_es(self, alpha):
+        h = alpha * (self.n - 1)
+        if int(np.floor(h)) + 2 > self.capacity and self.n > self.capacity:
+            raise ValueError(f"Reservoir of {self.capacity} too small for alpha={alpha} at n={self.n}")
+        s = np.sort(self.values)
+        i = int(np.floor(h)); j = min(i + 1, s.size - 1)
+        # same linear interpolation as np.quantile (numpy's lerp)
+        g = h - i
+        a, b = s[i], s[j]
+        q = float(b - (b - a) * (1 - g) if g >= 0.5 else a + (b - a) * g)
+        tail = s[s <= q]
+        return q, float(tail.mean()) if tail.size else q
+
+class QuantileSketch:
+    """
+    Mergeable relative-error quantile sketch (log-spaced buckets, DDSketch-style).
+    Quantiles are within a relative error `rel_acc` of the true order statistic;
+    buckets also keep value sums so tail means (ES) use exact in-bucket totals.
+    """
+    def __init__(self, rel_acc=0.005, min_value=1e-12):
+        self.rel_acc = float(rel_acc)
+        self.gamma = (1 + self.rel_acc) / (1 - self.rel_acc)
+        self._log_gamma = np.log(self.gamma)
+        self.min_value = float(min_value)
+        self.pos, self.neg = {}, {}          # key -> [count, sum]
+        self.zero = [0, 0.0]
+        self.n = 0
+
+    def _add(self, store, keys, x):
+        uniq, inv = np.unique(keys, return_inverse=True)
+        cnt = np.bincount(inv, minlength=uniq.size)
+        sm = np.bincount(inv, weights=x, minlength=uniq.size)
+        for k, c, s in zip(uniq.tolist(), cnt.tolist(), sm.tolist()):
+            b = store.setdefault(k, [0, 0.0])
+            b[0] += c; b[1] += s
+
+    def update(self, x):
+        x = np.asarray(x, dtype=float).ravel()
+        self.n += x.size
+        a = np.abs(x)
+        z = a < self.min_value
+        self.zero[0] += int(z.sum()); self.zero[1] += float(x[z].sum())
+        keys = np.ceil(np.log(np.where(z, 1.0, a)) / self._log_gamma).astype(np.int64)
+        for store, m in ((self.pos, (x > 0) & ~z), (self.neg, (x < 0) & ~z)):
+            if m.any():
+                self._add(store, keys[m], x[m])
+        return self
+
+    def merge(self, other):
+        if other.rel_acc != self.rel_acc:
+            raise ValueError("Cannot merge sketches with different rel_acc")
+        for mine, theirs in ((self.pos, other.pos), (self.neg, other.neg)):
+            for k, (c, s) in theirs.items():
+                b = mine.setdefault(k, [0, 0.0])
+                b[0] += c; b[1] += s
+        self.zero[0] += other.zero[0]; self.zero[1] += other.zero[1]
+        self.n += other.n
+        return self
+
+    def _buckets(self):
+        """(representative value, count, sum) in ascending value order."""
+        rep = lambda k: 2.0 * self.gamma**k / (self.gamma + 1)
+        out = [(-rep(k), *self.neg[k]) for k in sorted(self.neg, reverse=True)]
+        if self.zero[0]:
+            out.append((0.0, *self.zero))
+        out += [(rep(k), *self.pos[k]) for k in sorted(self.pos)]
+        return out
+
+    def var_es(self, alpha):
+        """(VaR_alpha, ES_alpha) with the lowest floor(alpha*(n-1)) + 1 values in the tail."""
+        k = int(np.floor(alpha * (self.n - 1))) + 1
+        seen, total = 0, 0.0
+        for v, c, s in self._buckets():
+            if seen + c >= k:
+                take = k - seen
+                total += s * take / c
+                return float(v), float(total / k)
+            seen += c; total += s
+        raise ValueError("Empty sketch")
+
+    @property
+    def error_bound(self):
+        return self.rel_acc
+
+class RiskAccumulator:
+    """
+    Single-pass, mergeable risk statistics for many PnL series and alpha levels.
+
+    update({"Unhedged": pnl_u, "Hedged": pnl_h}) chunk by chunk (or per worker,
+    then merge()). Mean/stdev use Welford/Chan updates. VaR/ES come from exact tail
+    reservoirs when max_paths bounds the total path count (memory ~ alpha*max_paths),
+    otherwise from a QuantileSketch with relative error rel_acc.
+    """
+    def __init__(self, alphas=(0.05,), max_paths=None, rel_acc=0.005):
+        self.alphas = tuple(float(a) for a in np.atleast_1d(alphas))
+        self.max_paths = max_paths
+        self.rel_acc = rel_acc
+        self.stats = {}     # name -> [n, mean, M2]
+        self.tails = {}
+
+    def empty(self):
+        """A new accumulator with the same alphas and tail settings (e.g. one per worker)."""
+        return RiskAccumulator(self.alphas, self.max_paths, self.rel_acc)
+
+    def _new_tail(self):
+        if self.max_paths is not None:
+            return TailReservoir(int(np.floor(max(self.alphas) * (self.max_paths - 1))) + 2)
+        return QuantileSketch(self.rel_acc)
+
+    @staticmethod
+    def _combine(a, b):
+        n = a[0] + b[0]
+        if n == 0:
+            return [0, 0.0, 0.0]
+        d = b[1] - a[1]
+        return [n, a[1] + d * b[0] / n, a[2] + b[2] + d * d * a[0] * b[0] / n]
+
+    def update(self, series):
+        for name, x in series.items():
+            x = np.asarray(x, dtype=float).ravel()
+            if x.size == 0:
+                continue
+            m = x.mean()
+            chunk = [x.size, m, float(((x - m)**2).sum())]
+            self.stats[name] = self._combine(self.stats.get(name, [0, 0.0, 0.0]), chunk)
+            self.tails.setdefault(name, self._new_tail()).update(x)
+        return self
+
+    def merge(self, other):
+        for name, st in other.stats.items():
+            self.stats[name] = self._combine(self.stats.get(name, [0, 0.0, 0.0]), st)
+            # merged into a fresh tail when new: never share other's reservoir/sketch
+            self.tails.setdefault(name, self._new_tail()).merge(other.tails[name])
+        return self
+
+    def variance(self, name):
+        n, _, M2 = self.stats[name]
+        return M2 / (n - 1) if n > 1 else np.nan
+
+    def summary(self, name):
+        """Same keys as var_es_summary (one VaR/ES pair per alpha), plus the error bound."""
+        n, mean, _ = self.stats[name]
+        out = {"name": name, "mean": float(mean), "stdev": float(np.sqrt(self.variance(name)))}
+        for a in self.alphas:
+            q, es = self.tails[name].var_es(a)
+            out[f"VaR_{int(a*100)}%"] = q
+            out[f"ES_{int(a*100)}%"] = es
+        out["n"] = int(n)
+        out["rel_error_bound"] = self.tails[name].error_bound
+        return out
+
+    def hedge_effectiveness(self, unhedged, hedged, alpha=None):
+        """Dict with HE_var (variance ratio) and HE_ES at alpha (default: first alpha)."""
+        var_u, var_h = self.variance(unhedged), self.variance(hedged)
+        key = f"ES_{int((alpha or self.alphas[0])*100)}%"
+        return {"HE_var": (1.0 - var_h / var_u) if var_u > 0 else np.nan,
+                "HE_ES": hedge_effectiveness_es_from_stats(self.summary(unhedged),
+                                                           self.summary(hedged), key=key)}
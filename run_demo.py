@@ -14,9 +14,12 @@ from plots import plot_pnl_hist
 from delta_hedge_grad import hedge_with_pathwise_deltas
 from regression_hedge import hedge_regression_daily
 from level_strip_hedge import hedge_level_strip
+from bootstrap import bootstrap_ci
+from optimizer import mean_cvar_optimize
+from scenario_store import open_or_create
 import numpy as np
 
-def main():
+def main(store_dir=None):
     # 0) config
     T, n_paths = 30, 5000   # one month
     spec = SwingSpec(T=T, q_min=0.5, q_max=1.5, Q_min=20, Q_max=30,
@@ -24,14 +27,16 @@ def main():
 
     # 1) simulate prices (fill with synthetic params)
     sim = MultiFactorOU(rng=42)  # uses default mu/sigma/corr, dt=1/252
-    paths = sim.simulate_paths(
-    S0={'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0},
-    B0={'B_JKM_TTF': 2.0},
-    T=T,
-    n_paths=n_paths
-)
-    # 2) LSMC price & cashflows
-    value, q, cf, deltas = lsmc_swing_value(paths, spec)
+    S0, B0 = {'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, {'B_JKM_TTF': 2.0}
+    if store_dir is None:
+        paths = sim.simulate_paths(S0=S0, B0=B0, T=T, n_paths=n_paths)
+        # 2) LSMC price & cashflows
+        value, q, cf, deltas = lsmc_swing_value(paths, spec)
+    else:
+        # 2') shared on-disk scenarios and cached LSMC outputs (scenario_store.py)
+        store = open_or_create(store_dir, sim, S0, B0, T=T, n_paths=n_paths)
+        paths = store.paths(0, n_paths)
+        value, q, cf, deltas = store.price(spec, n_paths=n_paths)
 
     # 3) Hedge & PnL
     #pnl_hedge, deltas = rolling_delta_hedge(paths, spec, lsmc_pricer=lsmc_swing_value, rebalance_days=5)
@@ -62,6 +67,12 @@ def main():
     lam_star = - cov / varh
     he_star  = hedge_effectiveness_var(u, u + lam_star*h)
     print(lam_star, he_star)
+    ci = bootstrap_ci(u, h, n_boot=1000, alpha=0.05, rng=1)
+    print("95% bootstrap CIs:", ci)
+    # mean-CVaR hedge ratio (contract weight fixed at 1)
+    opt = mean_cvar_optimize([1.0, 1.0], np.column_stack([u, h]), lam=2.0, alpha=0.05)
+    print("Mean-CVaR hedge ratio:", opt["weights"][1], "CVaR_5%:", opt["cvar"])
 
 if __name__ == "__main__":
-    main()
+    import sys
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -9,12 +9,14 @@ from lsmc import lsmc_swing_value
 # If in hedging/ subpackage, use: from hedging.risk_metrics import var_es_summary
 from risk_metrics import var_es_summary
 from level_strip_hedge import hedge_level_strip, apply_strip_positions
+from bootstrap import bootstrap_ci
+from scenario_store import open_or_create
 
 def hedg_eff(u, h):
     # Variance reduction (higher is better)
     return 1.0 - (np.var(h, ddof=1) / np.var(u, ddof=1))
 
-def main():
+def main(store_dir=None):
     rng = np.random.default_rng(0)
     T = 30
     n_paths = 6000
@@ -31,12 +33,7 @@ def main():
         dt=1/252,
         rng=42
     )
-    paths = sim.simulate_paths(
-        S0={'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0},
-        B0={'B_JKM_TTF': 2.0},
-        T=T,
-        n_paths=n_paths
-    )
+    S0, B0 = {'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, {'B_JKM_TTF': 2.0}
 
     # --- swing spec ---
     spec = SwingSpec(
@@ -44,17 +41,27 @@ def main():
         index='HH', spread_addon=1.2, destination='TTF', fee=0.1
     )
 
-    # --- LSMC valuation; we only need cf (cashflows) ---
-    out = lsmc_swing_value(paths, spec)
-    value, q, cf = out[:3]  # tolerant if your function returns 4 values (deltas)
+    if store_dir is None:
+        paths = sim.simulate_paths(S0=S0, B0=B0, T=T, n_paths=n_paths)
+
+        # --- LSMC valuation; we only need cf (cashflows) ---
+        out = lsmc_swing_value(paths, spec)
+        value, q, cf = out[:3]  # tolerant if your function returns 4 values (deltas)
 
-    # --- OOS split ---
-    idx = rng.permutation(n_paths)
-    tr, te = idx[: n_paths//2], idx[n_paths//2 :]
+        # --- OOS split ---
+        idx = rng.permutation(n_paths)
+        tr, te = idx[: n_paths//2], idx[n_paths//2 :]
 
-    paths_tr = {k: v[tr] for k, v in paths.items()}
-    paths_te = {k: v[te] for k, v in paths.items()}
-    cf_tr, cf_te = cf[tr], cf[te]
+        paths_tr = {k: v[tr] for k, v in paths.items()}
+        paths_te = {k: v[te] for k, v in paths.items()}
+        cf_tr, cf_te = cf[tr], cf[te]
+    else:
+        # shared on-disk scenarios (scenario_store.py): simulated and priced once,
+        # train/test are contiguous zero-copy views of the memory-mapped columns
+        store = open_or_create(store_dir, sim, S0, B0, T=T, n_paths=n_paths)
+        paths_tr, paths_te = store.split(0.5, n_paths)
+        cf = store.price(spec, n_paths=n_paths)[2]
+        cf_tr, cf_te = cf[: n_paths//2], cf[n_paths//2 :]
 
     # --- Train: fit level→strip hedge (two-asset) ---
     pnl_hedge_tr, H = hedge_level_strip(
@@ -79,10 +86,13 @@ def main():
     print(var_es_summary(pnl_unhedged_te, "Unhedged"))
     print(var_es_summary(pnl_hedged_te,   "Hedged (test, tc=1bp)"))
     print({"HedgeEffectiveness_var_test": hedg_eff(pnl_unhedged_te, pnl_hedged_te)})
+    # 95% bootstrap intervals (1000 paired resamples, blocked under a memory budget)
+    ci = bootstrap_ci(pnl_unhedged_te, pnl_hedge_te, n_boot=1000, alpha=0.05, rng=1)
+    print({"HE_var_test_CI95": ci["he_var"], "HE_ES_test_CI95": ci["he_es"]})
 
 if __name__ == "__main__":
     # ensure local imports work if you run from repo root
     import os, sys
     ROOT = os.path.dirname(os.path.abspath(__file__))
     if ROOT not in sys.path: sys.path.append(ROOT)
-    main()
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
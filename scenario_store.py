@@ -0,0 +1,244 @@
+# scenario_store.py
+"""
+On-disk scenario sets shared across runs.
+
+Layout of a store directory:
+
+    manifest.json                    simulator class/params, stream seed, S0, T, n_paths, dtype
+    paths/HH.npy, TTF.npy, ...       one (n_paths, T+1) array per column
+    lsmc/<key>/q.npy, cf.npy, dlt.npy, policy.json, meta.json
+                                     pricer outputs per (spec, basis, n_actions, rows [0, n)),
+                                     key = hash
+
+Paths are written chunk by chunk from MultiFactorOU.simulate_block_range (path i
+does not depend on the chunking, so a store extends or splits deterministically
+and writing needs memory for one chunk only). Each column is a single .npy file
+filled through np.lib.format.open_memmap, so readers memory-map it and every
+row range [a, b) is a zero-copy view; no dataset has to fit in RAM.
+"""
+import os
+import json
+import shutil
+import hashlib
+from dataclasses import asdict
+import numpy as np
+
+from basis import get_basis
+from lsmc import lsmc_swing_value, SwingPolicy
+
+PATH_COLUMNS = ("HH", "TTF", "JKM", "B_JKM_TTF")
+LSMC_COLUMNS = ("q", "cf", "dlt")
+
+def _jsonable(v):
+    if isinstance(v, np.ndarray):
+        return v.tolist()
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, dict):
+        return {k: _jsonable(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    return v
+
+def params_hash(obj):
+    """Short stable hash of a JSON-serializable object."""
+    blob = json.dumps(_jsonable(obj), sort_keys=True).encode()
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+def sim_params(sim):
+    """Simulator class, parameters and stream seed (everything that defines its paths)."""
+    skip = {"rng", "L", "_entropy", "phi", "shock_sd"}
+    params = {k: _jsonable(v) for k, v in vars(sim).items() if k not in skip}
+    return {"class": type(sim).__name__, "params": params, "stream_seed": sim._stream_entropy()}
+
+def _write_json(path, obj):
+    # atomic replace: concurrent readers (e.g. sweep workers) never see a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=1)
+    os.replace(tmp, path)
+
+def _S0_dict(S0vec):
+    return dict(zip(PATH_COLUMNS[:3], (float(s) for s in S0vec)))
+
+def spec_key(spec, basis=None, n_actions=3, actions="grid", n_paths=None):
+    """Hash of everything that defines the pricer outputs on a given scenario set (its first n_paths rows)."""
+    return params_hash({"spec_class": type(spec).__name__, "spec": asdict(spec),
+                        "basis": asdict(get_basis(basis).spec),
+                        "n_actions": int(n_actions), "actions": actions,
+                        "n_paths": None if n_paths is None else int(n_paths)})
+
+class ScenarioStore:
+    """
+    Read side of a store (see ScenarioStore.create / open_or_create to build one).
+    Arrays are read-only memmaps; paths(a, b) and lsmc(...) return zero-copy views.
+    """
+    def __init__(self, root):
+        self.root = str(root)
+        with open(os.path.join(self.root, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self._cols = {}
+
+    @property
+    def n_paths(self):
+        return int(self.manifest["n_paths"])
+
+    @property
+    def T(self):
+        return int(self.manifest["T"])
+
+    def _load(self, rel):
+        if rel not in self._cols:
+            self._cols[rel] = np.load(os.path.join(self.root, rel), mmap_mode="r")
+        return self._cols[rel]
+
+    @staticmethod
+    def _view(mm, rows):
+        # plain ndarray view of the memmap: no copy, no memmap subclass in results
+        return np.asarray(mm[rows])
+
+    # ---------------- writing ----------------
+
+    @classmethod
+    def create(cls, root, sim, S0, B0=None, T=30, n_paths=1000, chunk_size=65536,
+               stream_block=4096, dtype=float, seed=None, overwrite=False):
+        """
+        Simulate n_paths into `root` chunk by chunk (memory ~ one chunk).
+        seed: optional label recorded in the manifest (the stream seed is always stored).
+        """
+        root = str(root)
+        if os.path.exists(os.path.join(root, "manifest.json")):
+            if not overwrite:
+                raise FileExistsError(f"Scenario store already exists: {root}")
+            shutil.rmtree(root)
+        os.makedirs(os.path.join(root, "paths"), exist_ok=True)
+        dtype = np.dtype(dtype)
+        n, Tn = int(n_paths), int(T)
+        S0vec = sim._start_prices(S0, B0)
+        manifest = {"version": 1, "seed": seed, "simulator": sim_params(sim),
+                    "S0": _S0_dict(S0vec),
+                    "T": Tn, "n_paths": n, "dtype": dtype.str, "stream_block": int(stream_block),
+                    "columns": {c: f"paths/{c}.npy" for c in PATH_COLUMNS}, "lsmc": {}}
+        manifest["key"] = params_hash({k: manifest[k] for k in
+                                       ("simulator", "S0", "T", "dtype", "stream_block")})
+        cols = {c: np.lib.format.open_memmap(os.path.join(root, rel), mode="w+",
+                                             dtype=dtype, shape=(n, Tn + 1))
+                for c, rel in manifest["columns"].items()}
+        step = max(int(chunk_size) // int(stream_block), 1) * int(stream_block)
+        for a in range(0, n, step):
+            b = min(a + step, n)
+            block = sim.simulate_block_range(_S0_dict(S0vec), None, Tn, a, b,
+                                             stream_block=stream_block, dtype=dtype)
+            for c in PATH_COLUMNS:
+                cols[c][a:b] = block[c]
+        for mm in cols.values():
+            mm.flush()
+        del cols
+        # manifest last: a store without one is incomplete
+        _write_json(os.path.join(root, "manifest.json"), manifest)
+        return cls(root)
+
+    def matches(self, sim, S0, B0=None, T=30, n_paths=1000, stream_block=4096, dtype=float):
+        """True if this store holds (at least n_paths of) the requested scenario set."""
+        S0vec = sim._start_prices(S0, B0)
+        want = {"simulator": sim_params(sim), "S0": _S0_dict(S0vec),
+                "T": int(T), "dtype": np.dtype(dtype).str, "stream_block": int(stream_block)}
+        return params_hash(want) == self.manifest["key"] and int(n_paths) <= self.n_paths
+
+    # ---------------- reading ----------------
+
+    def paths(self, start=0, stop=None):
+        """Paths dict of rows [start, stop), zero-copy views of the memmapped columns."""
+        rows = slice(int(start), self.n_paths if stop is None else int(stop))
+        return {c: self._view(self._load(rel), rows) for c, rel in self.manifest["columns"].items()}
+
+    def split(self, frac=0.5, n_paths=None):
+        """(train, test) paths dicts as contiguous row ranges (paths are i.i.d., so no shuffling is needed)."""
+        n = self.n_paths if n_paths is None else int(n_paths)
+        cut = int(round(frac * n))
+        return self.paths(0, cut), self.paths(cut, n)
+
+    # ---------------- pricer outputs ----------------
+
+    def _rows(self, n_paths):
+        n = self.n_paths if n_paths is None else int(n_paths)
+        if not 0 < n <= self.n_paths:
+            raise ValueError(f"n_paths={n} outside 1..{self.n_paths} stored paths")
+        return n
+
+    def _lsmc_key(self, spec, basis, n_actions, actions, n_paths):
+        return spec_key(spec, basis, n_actions, actions, self._rows(n_paths))
+
+    def _lsmc_dir(self, spec, basis, n_actions, actions, n_paths):
+        # looked up on disk, so outputs written through another handle are seen
+        rel = f"lsmc/{self._lsmc_key(spec, basis, n_actions, actions, n_paths)}"
+        return rel if os.path.exists(os.path.join(self.root, rel, "meta.json")) else None
+
+    def write_lsmc(self, spec, q, cf, dlt, policy=None, basis=None, n_actions=3, actions="grid",
+                   n_paths=None):
+        """Store pricer outputs fitted on paths [0, n_paths) (default: all) under their spec key."""
+        n = self._rows(n_paths)
+        key = self._lsmc_key(spec, basis, n_actions, actions, n)
+        rel = f"lsmc/{key}"
+        os.makedirs(os.path.join(self.root, rel), exist_ok=True)
+        for name, arr in zip(LSMC_COLUMNS, (q, cf, dlt)):
+            if arr.shape[0] != n:
+                raise ValueError(f"{name} has {arr.shape[0]} rows, expected {n} paths")
+            np.save(os.path.join(self.root, rel, f"{name}.npy"), np.asarray(arr))
+        if policy is not None:
+            policy.save(os.path.join(self.root, rel, "policy.json"))
+        # meta.json last: it marks the outputs as complete
+        meta = {"spec_class": type(spec).__name__, "spec": asdict(spec), "n_actions": int(n_actions),
+                "actions": actions, "n_paths": n, "value": float(np.asarray(cf).sum(axis=1).mean())}
+        _write_json(os.path.join(self.root, rel, "meta.json"), meta)
+        with open(os.path.join(self.root, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.manifest["lsmc"][key] = rel
+        _write_json(os.path.join(self.root, "manifest.json"), self.manifest)
+        return key
+
+    def lsmc(self, spec, basis=None, n_actions=3, actions="grid", start=0, stop=None, n_paths=None):
+        """
+        Stored (value, q, cf, dlt) for this spec fitted on paths [0, n_paths), rows
+        [start, stop) of it as views (value is over all n_paths); None if it has not
+        been priced yet.
+        """
+        rel = self._lsmc_dir(spec, basis, n_actions, actions, n_paths)
+        if rel is None:
+            return None
+        rows = slice(int(start), None if stop is None else int(stop))
+        with open(os.path.join(self.root, rel, "meta.json")) as f:
+            value = json.load(f)["value"]
+        return (value,) + tuple(self._view(self._load(f"{rel}/{c}.npy"), rows) for c in LSMC_COLUMNS)
+
+    def policy(self, spec, basis=None, n_actions=3, actions="grid", n_paths=None):
+        """Stored SwingPolicy for this spec (fitted on paths [0, n_paths)), or None."""
+        rel = self._lsmc_dir(spec, basis, n_actions, actions, n_paths)
+        path = None if rel is None else os.path.join(self.root, rel, "policy.json")
+        return SwingPolicy.load(path) if path and os.path.exists(path) else None
+
+    def price(self, spec, basis=None, n_actions=3, actions="grid", n_paths=None):
+        """
+        (value, q, cf, dlt) on paths [0, n_paths) (default: all stored paths), from
+        the store or priced with lsmc_swing_value and cached.
+        """
+        out = self.lsmc(spec, basis, n_actions, actions, n_paths=n_paths)
+        if out is not None:
+            return out
+        n = self._rows(n_paths)
+        _, q, cf, dlt, policy = lsmc_swing_value(self.paths(0, n), spec, basis=basis, n_actions=n_actions,
+                                                 actions=actions, return_policy=True)
+        self.write_lsmc(spec, q, cf, dlt, policy, basis, n_actions, actions, n)
+        return self.lsmc(spec, basis, n_actions, actions, n_paths=n)
+
+def open_or_create(root, sim, S0, B0=None, T=30, n_paths=1000, **kwargs):
+    """
+    Reuse the store at `root` if it holds this scenario set (at least n_paths of
+    it; read store.paths(0, n_paths) for a prefix), otherwise (re)build it.
+    """
+    if os.path.exists(os.path.join(str(root), "manifest.json")):
+        store = ScenarioStore(root)
+        if store.matches(sim, S0, B0, T, n_paths, kwargs.get("stream_block", 4096),
+                         kwargs.get("dtype", float)):
+            return store
+    return ScenarioStore.create(root, sim, S0, B0, T, n_paths, overwrite=True, **kwargs)
@@ -1,12 +1,62 @@
 # simulators.py
+import warnings
 import numpy as np
+from scipy.special import ndtri
+from scipy.stats import qmc
+from scipy.signal import lfilter
+from scipy.optimize import least_squares
+from profiling import timed
+
+def brownian_bridge_order(T):
+    """
+    Construction order for a Brownian bridge on steps 1..T: list of (m, l, r),
+    meaning W_m is drawn given W_l and W_r (l=0 is the origin, r=None for W_T).
+    """
+    order = [(T, 0, None)]
+    queue = [(0, T)]
+    while queue:
+        nxt = []
+        for l, r in queue:
+            if r - l < 2:
+                continue
+            m = (l + r) // 2
+            order.append((m, l, r))
+            nxt += [(l, m), (m, r)]
+        queue = nxt
+    return order
+
+def brownian_bridge_increments(z):
+    """
+    z: (n, T, k) normals in bridge order (z[:, 0] drives W_T) -> (n, T, k) unit-variance
+    Brownian increments. Front-loads variance on the first dims (good for Sobol).
+    """
+    n, T = z.shape[0], z.shape[1]
+    W = np.zeros((n, T + 1) + z.shape[2:], dtype=z.dtype)
+    for i, (m, l, r) in enumerate(brownian_bridge_order(T)):
+        if r is None:
+            W[:, m] = np.sqrt(m) * z[:, i]
+        else:
+            W[:, m] = ((r - m) * W[:, l] + (m - l) * W[:, r]) / (r - l) \
+                      + np.sqrt((m - l) * (r - m) / (r - l)) * z[:, i]
+    return np.diff(W, axis=1)
 
 class MultiFactorOU:
     """
-    Correlated 3-factor GBM for HH/TTF/JKM (simple, robust).
+    Correlated 3-factor GBM for HH/TTF/JKM (simple, robust; no mean reversion,
+    see SeasonalOU for the mean-reverting seasonal model).
     Returns paths for HH, TTF, JKM and the basis B_JKM_TTF = JKM - TTF.
+
+    Sampling options (all applied to the normals before the Cholesky step):
+      sampling='sobol'     scrambled Sobol points (Brownian-bridge ordered in time
+                           unless brownian_bridge=False); default 'pseudo'.
+      antithetic=True      second half of the paths uses the negated normals.
+      moment_matching=True normals rescaled to mean 0 / stdev 1 per (day, factor);
+                           needs at least 2 paths per draw (and per stream block).
+    Any of these routes simulate_paths through the vectorized construction.
     """
-    def __init__(self, mu=None, sigma=None, corr=None, dt=1/252, rng=None, **kwargs):
+    def __init__(self, mu=None, sigma=None, corr=None, dt=1/252, rng=None,
+                 sampling="pseudo", antithetic=False, moment_matching=False,
+                 brownian_bridge=True, **kwargs):
         # Annualized drifts (log space). Defaults ~0 for simplicity.
         self.mu = np.array(mu if mu is not None else [0.00, 0.00, 0.00], dtype=float)
         # Annualized vols for (HH, TTF, JKM)
@@ -24,22 +74,99 @@ class MultiFactorOU:
 
         # RNG can be an int seed or a Generator
         self.rng = np.random.default_rng(rng)
+        # Seed for the per-block streams of iter_paths (an int seed is used as-is)
+        self._entropy = int(rng) if isinstance(rng, (int, np.integer)) else None
 
-    def simulate_paths(self, S0, B0=None, T=30, n_paths=1000):
-        """
-        S0: dict with 'HH','TTF','JKM' starting prices
-        B0: optional dict with 'B_JKM_TTF' (so JKM0 ≈ TTF0 + basis)
-        """
+        if sampling not in ("pseudo", "sobol"):
+            raise ValueError(f"Unknown sampling: {sampling}")
+        self.sampling = sampling
+        self.antithetic = bool(antithetic)
+        self.moment_matching = bool(moment_matching)
+        self.brownian_bridge = bool(brownian_bridge)
+
+    @property
+    def _plain(self):
+        return self.sampling == "pseudo" and not self.antithetic and not self.moment_matching
+
+    def _normals(self, n, T, dtype, rng):
+        """(n, T, 3) standard normals with the configured sampling options."""
+        m = (n + 1) // 2 if self.antithetic else n
+        if self.sampling == "sobol":
+            sob = qmc.Sobol(d=3*T, scramble=True, seed=rng)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)   # n not a power of 2
+                u = sob.random(m)
+            z = ndtri(np.clip(u, 1e-12, 1 - 1e-12)).reshape(m, T, 3)
+            if self.brownian_bridge:
+                z = brownian_bridge_increments(z)
+            z = z.astype(dtype, copy=False)
+        else:
+            z = rng.standard_normal(size=(T, m, 3), dtype=dtype).transpose(1, 0, 2)
+        if self.antithetic:
+            z = np.concatenate([z, -z])[:n]
+        if self.moment_matching:
+            if n < 2:
+                # one row has zero stdev: (z - mean)/std would be all NaN
+                raise ValueError(f"moment_matching needs at least 2 paths per draw, got {n}")
+            z = (z - z.mean(axis=0)) / z.std(axis=0)
+        return z
+
+    def _start_prices(self, S0, B0):
         HH0 = float(S0['HH'])
         TTF0 = float(S0['TTF'])
         if B0 is not None and 'B_JKM_TTF' in B0:
             JKM0 = TTF0 + float(B0['B_JKM_TTF'])
         else:
             JKM0 = float(S0.get('JKM', TTF0 + 2.0))
+        return np.array([HH0, TTF0, JKM0])
+
+    def _log_paths(self, z, dtype):
+        """z: (n, T, 3) standard normals -> cumulative log-returns (3, n, T+1), one cumsum pass."""
+        drift = ((self.mu - 0.5 * self.sigma**2) * self.dt).astype(dtype)
+        vol_sqrt_dt = (self.sigma * np.sqrt(self.dt)).astype(dtype)
+        n, Tn = z.shape[0], z.shape[1]
+        zf = np.ascontiguousarray(np.moveaxis(z, -1, 0)).reshape(3, -1)
+        incr = (self.L.astype(dtype) @ zf).reshape(3, n, Tn)
+        incr *= vol_sqrt_dt[:, None, None]
+        incr += drift[:, None, None]
+        out = np.zeros((3, n, Tn + 1), dtype=dtype)
+        np.cumsum(incr, axis=2, out=out[:, :, 1:])
+        return out
+
+    def _to_paths(self, logS, S0vec):
+        S = np.exp(logS, out=logS)
+        S *= S0vec.astype(S.dtype)[:, None, None]
+        HH, TTF, JKM = S
+        return {"HH": HH, "TTF": TTF, "JKM": JKM, "B_JKM_TTF": JKM - TTF}
+
+    def _paths_from_normals(self, z, S0vec, dtype):
+        """(n, T, k) draws from _normals -> paths dict."""
+        return self._to_paths(self._log_paths(z, dtype), S0vec)
+
+    @timed("simulate")
+    def simulate_paths(self, S0, B0=None, T=30, n_paths=1000, method="loop", dtype=float):
+        """
+        S0: dict with 'HH','TTF','JKM' starting prices
+        B0: optional dict with 'B_JKM_TTF' (so JKM0 ≈ TTF0 + basis)
+        method: 'loop' (step-by-step, original) or 'cumsum' (one normal draw,
+                cumulative log-returns in a single pass).
+        dtype: float64 (default) or float32 (halves memory; 'cumsum' only).
+        """
+        S0vec = self._start_prices(S0, B0)
+        HH0, TTF0, JKM0 = S0vec
 
         n = int(n_paths)
         Tn = int(T)
+        dtype = np.dtype(dtype)
 
+        if method == "cumsum" or not self._plain:
+            # plain sampling uses the loop's draw order, so both methods agree up to rounding
+            z = self._normals(n, Tn, dtype, self.rng)
+            return self._paths_from_normals(z, S0vec, dtype)
+        if method != "loop":
+            raise ValueError(f"Unknown simulation method: {method}")
+        if dtype != np.float64:
+            raise ValueError("method='loop' only supports float64; use method='cumsum'")
         HH  = np.zeros((n, Tn + 1), dtype=float)
         TTF = np.zeros_like(HH)
         JKM = np.zeros_like(HH)
@@ -62,3 +189,193 @@ class MultiFactorOU:
 
         Bjt = JKM - TTF
         return {"HH": HH, "TTF": TTF, "JKM": JKM, "B_JKM_TTF": Bjt}
+
+    # ---------------- unit-start paths (rescaled on S0 moves) ----------------
+
+    def simulate_unit_paths(self, T=30, n_paths=1000, dtype=float):
+        """
+        (3, n, T+1) HH/TTF/JKM price paths starting at 1 (exp of cumulative log-returns).
+        GBM paths are proportional to S0, so scale_paths turns them into paths for any S0.
+        """
+        dtype = np.dtype(dtype)
+        z = self._normals(int(n_paths), int(T), dtype, self.rng)
+        return np.exp(self._log_paths(z, dtype))
+
+    def scale_paths(self, unit, S0, B0=None):
+        """Paths dict (as simulate_paths) from unit paths and start prices; no redraw."""
+        HH, TTF, JKM = unit * self._start_prices(S0, B0).astype(unit.dtype)[:, None, None]
+        return {"HH": HH, "TTF": TTF, "JKM": JKM, "B_JKM_TTF": JKM - TTF}
+
+    # ---------------- streaming / chunked mode ----------------
+
+    def _stream_entropy(self):
+        # Fixed once per simulator so every block stream is reproducible.
+        if self._entropy is None:
+            self._entropy = int(self.rng.integers(2**63))
+        return self._entropy
+
+    def block_rng(self, b):
+        """Independent Generator for stream block b (same for any chunking/worker)."""
+        ss = np.random.SeedSequence(self._stream_entropy(), spawn_key=(int(b),))
+        return np.random.default_rng(ss)
+
+    @timed("simulate.block")
+    def simulate_block_range(self, S0, B0=None, T=30, start=0, stop=1000,
+                             stream_block=4096, dtype=float):
+        """
+        Paths [start, stop) of the stream. Normals come from per-block generators
+        of `stream_block` paths, so path i is identical however the range is split.
+        """
+        S0vec = self._start_prices(S0, B0)
+        dtype = np.dtype(dtype)
+        Tn, sb = int(T), int(stream_block)
+        b0, b1 = start // sb, (stop - 1) // sb
+        z = np.concatenate([self._normals(sb, Tn, dtype, self.block_rng(b))
+                            for b in range(b0, b1 + 1)])
+        z = z[start - b0*sb: stop - b0*sb]
+        return self._paths_from_normals(z, S0vec, dtype)
+
+    def iter_paths(self, S0, B0=None, T=30, n_paths=1000, chunk_size=4096,
+                   stream_block=4096, dtype=float):
+        """
+        Generator of path blocks (dicts like simulate_paths) with at most
+        chunk_size paths each; memory is bounded by one block. Use a chunk_size
+        that is a multiple of stream_block to avoid redrawing boundary blocks.
+        """
+        if int(chunk_size) <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        n = int(n_paths)
+        for a in range(0, n, int(chunk_size)):
+            yield self.simulate_block_range(S0, B0, T, a, min(a + int(chunk_size), n),
+                                            stream_block=stream_block, dtype=dtype)
+
+HUBS = ("HH", "TTF", "JKM")
+
+class SeasonalOU(MultiFactorOU):
+    """
+    Mean-reverting (Schwartz one-factor) log-prices with a seasonal curve and jumps,
+    per hub h = HH, TTF, JKM:
+
+        log S_t = f_h(t) + X_t,   f_h(t) = level_h + a_h cos(2πτ) + b_h sin(2πτ),  τ = t0 + t·dt
+        X_{t+1} = φ_h X_t + s_h (L z_t)_h + J_t,   φ = exp(-κ dt),  s = σ sqrt((1 - φ²) / 2κ)
+
+    (exact OU transition; correlated shocks via the Cholesky factor of corr). J_t is a
+    compound-Poisson jump (intensity lam per year, N(mu, sd) sizes) that decays with
+    the OU, i.e. mean-reverting spikes. level=None anchors the curve at S0 (X_0 = 0).
+    The time recursion runs in one lfilter call per hub (one multiply-add per step);
+    sampling options, streaming and parallel shards work as for MultiFactorOU.
+    """
+    def __init__(self, kappa=None, sigma=None, corr=None, level=None, season=None, jumps=None,
+                 dt=1/252, t0=0.0, rng=None, **kwargs):
+        super().__init__(sigma=sigma, corr=corr, dt=dt, rng=rng, **kwargs)
+        self.kappa = np.array(kappa if kappa is not None else [4.0, 3.0, 3.0], dtype=float)
+        self.level = None if level is None else np.array(level, dtype=float)
+        self.season = np.zeros((3, 2)) if season is None else np.array(season, dtype=float).reshape(3, 2)
+        self.jumps = None if jumps is None else {k: np.array(jumps[k], dtype=float)
+                                                 for k in ("lam", "mu", "sd")}
+        self.t0 = float(t0)
+        # transition moments
+        self.phi = np.exp(-self.kappa * self.dt)
+        self.shock_sd = self.sigma * np.sqrt((1.0 - self.phi**2) / (2.0 * self.kappa))
+
+    def seasonal(self, T):
+        """Seasonal component a cos(2πτ) + b sin(2πτ) on days 0..T, shape (3, T+1)."""
+        tau = 2*np.pi*(self.t0 + np.arange(int(T) + 1) * self.dt)
+        return self.season[:, :1] * np.cos(tau) + self.season[:, 1:] * np.sin(tau)
+
+    def forward_curve(self, T, S0=None, B0=None):
+        """Deterministic log-price curve f_h(t) for t=0..T, shape (3, T+1)."""
+        seas = self.seasonal(T)
+        if self.level is not None:
+            return self.level[:, None] + seas
+        if S0 is None:
+            raise ValueError("level=None: the curve is anchored at S0, pass start prices")
+        return np.log(self._start_prices(S0, B0))[:, None] - seas[:, :1] + seas
+
+    def _normals(self, n, T, dtype, rng):
+        z = super()._normals(n, T, dtype, rng)
+        if self.jumps is None:
+            return z
+        # jump channels: Poisson counts (small integers, exact in any float dtype), normals for the sizes
+        N = rng.poisson(self.jumps["lam"] * self.dt, size=(n, T, 3)).astype(dtype)
+        zj = rng.standard_normal(size=(n, T, 3), dtype=dtype)
+        return np.concatenate([z, N, zj], axis=2)
+
+    def _paths_from_normals(self, z, S0vec, dtype):
+        n, Tn = z.shape[0], z.shape[1]
+        f = self.forward_curve(Tn, {"HH": S0vec[0], "TTF": S0vec[1], "JKM": S0vec[2]}).astype(dtype)
+        X0 = np.log(S0vec).astype(dtype) - f[:, 0]
+        zf = np.ascontiguousarray(np.moveaxis(z[:, :, :3], -1, 0)).reshape(3, -1)
+        shock = (self.L.astype(dtype) @ zf).reshape(3, n, Tn)
+        shock *= self.shock_sd.astype(dtype)[:, None, None]
+        if self.jumps is not None:
+            N = np.moveaxis(z[:, :, 3:6], -1, 0)
+            Zj = np.moveaxis(z[:, :, 6:9], -1, 0)
+            shock += (N * self.jumps["mu"][:, None, None]
+                      + np.sqrt(N) * self.jumps["sd"][:, None, None] * Zj).astype(dtype)
+        logS = np.empty((3, n, Tn + 1), dtype=dtype)
+        logS[:, :, 0] = np.log(S0vec).astype(dtype)[:, None]
+        for h in range(3):
+            zi = np.full((n, 1), self.phi[h] * X0[h], dtype=dtype)
+            X, _ = lfilter([1.0], [1.0, -self.phi[h]], shock[h], axis=-1, zi=zi)
+            logS[h, :, 1:] = X + f[h, 1:]
+        return self._to_paths(logS, np.ones(3))
+
+    @timed("simulate")
+    def simulate_paths(self, S0, B0=None, T=30, n_paths=1000, method=None, dtype=float):
+        """Paths dict like MultiFactorOU.simulate_paths (always vectorized; `method` is ignored)."""
+        dtype = np.dtype(dtype)
+        z = self._normals(int(n_paths), int(T), dtype, self.rng)
+        return self._paths_from_normals(z, self._start_prices(S0, B0), dtype)
+
+    def simulate_unit_paths(self, T=30, n_paths=1000, dtype=float):
+        raise ValueError("SeasonalOU paths are not proportional to S0; use simulate_paths")
+
+    @classmethod
+    def calibrate(cls, prices, dt=1/252, t0=0.0, jump_threshold=None, **kwargs):
+        """
+        Fit to historical daily prices: dict {'HH','TTF','JKM': (N,)} or a (3, N) array.
+        All hubs are fitted in one nonlinear least-squares problem on the AR(1)
+        residuals of log S - f (level, seasonal a/b, φ per hub); σ and corr come
+        from the residuals. jump_threshold=k flags residuals beyond k robust
+        standard deviations as jumps (intensity, mean, sd) and excludes them from
+        σ/corr. The returned model starts right after the last observation.
+        """
+        P = np.stack([np.asarray(prices[h], dtype=float) for h in HUBS]) if isinstance(prices, dict) \
+            else np.asarray(prices, dtype=float)
+        Y = np.log(P)
+        N = Y.shape[1]
+        tau = 2*np.pi*(t0 + np.arange(N) * dt)
+        C, S = np.cos(tau), np.sin(tau)
+
+        def residuals(theta):
+            level, a, b, phi = theta.reshape(4, 3)[:, :, None]
+            X = Y - (level + a*C + b*S)
+            return (X[:, 1:] - phi*X[:, :-1]).ravel()
+
+        theta0 = np.concatenate([Y.mean(axis=1), np.zeros(3), np.zeros(3), np.full(3, 0.9)])
+        lo = np.r_[np.full(9, -np.inf), np.full(3, 1e-6)]
+        hi = np.r_[np.full(9, np.inf), np.full(3, 1 - 1e-9)]
+        fit = least_squares(residuals, theta0, bounds=(lo, hi))
+        level, a, b, phi = fit.x.reshape(4, 3)
+        e = residuals(fit.x).reshape(3, N - 1)
+
+        jumps = None
+        ok = np.ones(N - 1, dtype=bool)
+        if jump_threshold:
+            med = np.median(e, axis=1, keepdims=True)
+            rsd = 1.4826 * np.median(np.abs(e - med), axis=1, keepdims=True)
+            is_jump = np.abs(e - med) > jump_threshold * rsd
+            ok = ~is_jump.any(axis=0)
+            cnt = is_jump.sum(axis=1)
+            jsum = np.where(is_jump, e, 0.0)
+            mu = jsum.sum(axis=1) / np.maximum(cnt, 1)
+            sd = np.sqrt(np.where(is_jump, (e - mu[:, None])**2, 0.0).sum(axis=1) / np.maximum(cnt - 1, 1))
+            jumps = {"lam": cnt / ((N - 1) * dt), "mu": mu, "sd": sd}
+
+        s = e[:, ok].std(axis=1, ddof=1)
+        kappa = -np.log(phi) / dt
+        sigma = s * np.sqrt(2.0 * kappa / (1.0 - phi**2))
+        corr = np.corrcoef(e[:, ok])
+        return cls(kappa=kappa, sigma=sigma, corr=corr, level=level, season=np.column_stack([a, b]),
+                   jumps=jumps, dt=dt, t0=t0 + (N - 1) * dt, **kwargs)
@@ -0,0 +1,338 @@
+# sweep.py
+"""
+Batch runner for scenario sweeps: simulate -> price -> hedge -> risk over a grid
+of configurations read from a JSON or YAML file (YAML needs PyYAML).
+
+Config file:
+
+    base:                               # one full configuration
+      simulator: {class: MultiFactorOU, sigma: [0.8, 0.6, 0.7], rng: 42}
+      S0: {HH: 3.0, TTF: 9.0, JKM: 11.0}
+      B0: {B_JKM_TTF: 2.0}
+      n_paths: 5000
+      spec: {T: 30, q_min: 0.5, q_max: 1.5, Q_min: 20, Q_max: 30, index: HH,
+             spread_addon: 1.2, destination: TTF, fee: 0.1}
+      pricer: {engine: lsmc, basis: default, n_actions: 3}
+      hedge: {method: level_strip, two_assets: true, ridge: 1.0e-6, tc_bps: 0.0, lot: null}
+      alpha: 0.05
+      oos: null                         # train fraction: fit the strip on [0, f), report on the rest
+    grid:                               # cartesian product of dotted-key overrides
+      simulator.sigma: [[0.8, 0.6, 0.7], [1.2, 0.9, 1.0]]
+      spec.spread_addon: [1.0, 1.2]
+      hedge.method: [none, level_strip, regression, pathwise, rolling_delta, m2m]
+    scenarios:                          # optional named override sets, each crossed with the grid
+      - {name: base}
+      - {name: high_corr, simulator.corr: [[1, 0.7, 0.6], [0.7, 1, 0.8], [0.6, 0.8, 1]]}
+
+Shared stages run once: configurations with the same simulator, start prices, T
+and n_paths share one on-disk scenario set (scenario_store.py, memory-mapped by
+the workers), and those that also share spec and pricer share one pricing run
+(LSMC outputs are cached in the store, so a rerun skips them too). Pricing runs,
+each with its hedge variants, are spread over a process pool. Rows are appended
+to <out>.jsonl as they finish (--resume skips finished configurations and retries
+failed ones) and the consolidated table is written to <out> (CSV). A scenario set
+that fails to simulate (e.g. a non-PD corr) gives error rows for the configurations
+on it instead of stopping the sweep. A spec with `destinations` (DiversionSpec)
+needs pricer engine `diversion`; other engines would ignore the destinations, so
+such configurations are rejected up front.
+
+Usage: python sweep.py config.yaml [--workers N] [--out sweep_results.csv]
+                       [--workdir sweep_work] [--resume] [--dry-run]
+"""
+import os, csv, json, copy, time, argparse, itertools, traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # optional dependency
+    yaml = None
+
+from simulators import MultiFactorOU, SeasonalOU
+from swing import SwingSpec, DiversionSpec
+from pricers import price_swing
+from scenario_store import ScenarioStore, open_or_create, params_hash
+from level_strip_hedge import hedge_level_strip, apply_strip_positions
+from regression_hedge import hedge_regression_daily
+from delta_hedge import rolling_delta_hedge
+from delta_hedge_grad import hedge_with_pathwise_deltas
+from m2m_hedge import m2m_gradients, replication_report
+from risk_metrics import RiskAccumulator
+
+SIMULATORS = {"MultiFactorOU": MultiFactorOU, "SeasonalOU": SeasonalOU}
+HEDGES = ("none", "level_strip", "regression", "pathwise", "rolling_delta", "m2m")
+
+DEFAULT_BASE = {
+    "simulator": {"class": "MultiFactorOU", "rng": 42},
+    "S0": {"HH": 3.0, "TTF": 9.0, "JKM": 11.0},
+    "B0": {"B_JKM_TTF": 2.0},
+    "n_paths": 5000,
+    "spec": {"T": 30, "q_min": 0.5, "q_max": 1.5, "Q_min": 20.0, "Q_max": 30.0, "index": "HH",
+             "spread_addon": 1.2, "destination": "TTF", "fee": 0.1},
+    "pricer": {"engine": "lsmc"},
+    "hedge": {"method": "level_strip", "two_assets": True, "ridge": 1e-6, "tc_bps": 0.0, "lot": None},
+    "alpha": 0.05,
+    "oos": None,
+}
+
+# ---------------- config expansion ----------------
+
+def load_config(path):
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ImportError("YAML configs need PyYAML (pip install pyyaml); or use JSON")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def _merge(base, over):
+    out = copy.deepcopy(base)
+    for k, v in over.items():
+        out[k] = _merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else v
+    return out
+
+def _set(d, dotted, value):
+    *head, last = dotted.split(".")
+    for k in head:
+        d = d.setdefault(k, {})
+    d[last] = value
+
+def expand(config):
+    """[(overrides, resolved config)] for every scenario x grid point, in file order."""
+    base = _merge(DEFAULT_BASE, config.get("base", {}))
+    grid = config.get("grid", {}) or {}
+    keys = list(grid)
+    out = []
+    for scen in config.get("scenarios") or [{}]:
+        scen = dict(scen)
+        name = scen.pop("name", "")
+        for values in itertools.product(*(grid[k] for k in keys)):
+            over = {**scen, **dict(zip(keys, values))}
+            cfg = copy.deepcopy(base)
+            for k, v in over.items():
+                _set(cfg, k, v)
+            cfg["name"] = name
+            out.append((over, cfg))
+    return out
+
+def sim_key(cfg):
+    return params_hash({k: cfg[k] for k in ("simulator", "S0", "B0", "n_paths")} | {"T": cfg["spec"]["T"]})
+
+def price_key(cfg):
+    return params_hash({"sim": sim_key(cfg), "spec": cfg["spec"], "pricer": cfg["pricer"]})
+
+def config_id(cfg):
+    return params_hash(cfg)
+
+def build_sim(sim_cfg):
+    kw = dict(sim_cfg)
+    cls = kw.pop("class", "MultiFactorOU")
+    if cls not in SIMULATORS:
+        raise ValueError(f"Unknown simulator '{cls}'. Available: {sorted(SIMULATORS)}")
+    return SIMULATORS[cls](**kw)
+
+def build_spec(spec_cfg):
+    kw = dict(spec_cfg)
+    if "destinations" in kw:
+        kw["destinations"] = tuple(kw["destinations"])
+        kw["dest_fees"] = tuple(kw.get("dest_fees", (0.0,) * len(kw["destinations"])))
+        return DiversionSpec(**kw)
+    return SwingSpec(**kw)
+
+def check_config(cfg):
+    """Reject combinations that would price something other than what was asked for."""
+    engine = cfg["pricer"].get("engine", "lsmc")
+    if "destinations" in cfg["spec"] and engine != "diversion":
+        raise ValueError(f"spec with destinations (DiversionSpec) needs pricer engine 'diversion', "
+                         f"got '{engine}' (config {cfg['name'] or config_id(cfg)})")
+
+# ---------------- stages (run in worker processes) ----------------
+
+def _simulate_job(args):
+    """(root, seconds, error or None) for one scenario set."""
+    root, cfg = args
+    t0 = time.perf_counter()
+    try:
+        open_or_create(root, build_sim(cfg["simulator"]), cfg["S0"], cfg["B0"],
+                       T=cfg["spec"]["T"], n_paths=cfg["n_paths"])
+    except Exception:
+        return root, time.perf_counter() - t0, traceback.format_exc(limit=2).strip().splitlines()[-1]
+    return root, time.perf_counter() - t0, None
+
+def _hedge(paths, spec, out, h, oos, policy=None):
+    """(pnl_unhedged, pnl_hedge) on the reporting paths for one hedge variant."""
+    cf = out[2]
+    method = h.get("method", "none")
+    costs = {"tc_bps": h.get("tc_bps", 0.0), "lot": h.get("lot")}
+    if method == "none":
+        return cf.sum(axis=1), np.zeros(cf.shape[0])
+    if method == "level_strip" and oos:
+        cut = int(round(oos * cf.shape[0]))
+        train = {k: v[:cut] for k, v in paths.items()}
+        test = {k: v[cut:] for k, v in paths.items()}
+        _, H = hedge_level_strip(train, spec, cf[:cut], two_assets=h.get("two_assets", True),
+                                 ridge=h.get("ridge", 1e-6))
+        return cf[cut:].sum(axis=1), apply_strip_positions(test, spec, H, **costs)
+    if method == "level_strip":
+        pnl, _ = hedge_level_strip(paths, spec, cf, two_assets=h.get("two_assets", True),
+                                   ridge=h.get("ridge", 1e-6), **costs)
+    elif method == "regression":
+        pnl, _ = hedge_regression_daily(paths, spec, cf, two_assets=h.get("two_assets", True), **costs)
+    elif method == "pathwise":
+        pnl = hedge_with_pathwise_deltas(paths, spec, lambda *_: out, **costs)
+    elif method == "m2m":
+        if policy is None:
+            raise ValueError("hedge 'm2m' needs a stored LSMC policy (pricer engine 'lsmc')")
+        # scored against the policy's own forward-pass M2M PnL: the in-sample LSMC
+        # cashflows `cf` are a different exercise stream
+        r = replication_report(m2m_gradients(policy, paths), paths, spec, h.get("rebalance_days", 1), **costs)
+        return r["pnl_unhedged"], r["pnl_hedge"]
+    elif method == "rolling_delta":
+        pnl, _ = rolling_delta_hedge(paths, spec, rebalance_days=h.get("rebalance_days", 1), **costs)
+    else:
+        raise ValueError(f"Unknown hedge method '{method}'. Available: {list(HEDGES)}")
+    return cf.sum(axis=1), pnl
+
+def _risk_row(u, hedge, alpha):
+    # exact tails (max_paths = n): same numbers as var_es on the full arrays
+    acc = RiskAccumulator(alpha, max_paths=u.size).update({"unhedged": u, "hedged": u + hedge})
+    row = {}
+    for name in ("unhedged", "hedged"):
+        s = acc.summary(name)
+        row.update({f"mean_{name}": s["mean"], f"stdev_{name}": s["stdev"],
+                    f"VaR_{name}": s[f"VaR_{int(alpha*100)}%"], f"ES_{name}": s[f"ES_{int(alpha*100)}%"]})
+    he = acc.hedge_effectiveness("unhedged", "hedged")
+    return {**row, "HE_var": float(he["HE_var"]), "HE_ES": float(he["HE_ES"])}
+
+def _price_job(args):
+    """One pricing run on a stored scenario set and all hedge variants that use it."""
+    root, cfgs = args
+    cfg0 = cfgs[0]
+    store = ScenarioStore(root)
+    paths = store.paths(0, cfg0["n_paths"])
+    spec = build_spec(cfg0["spec"])
+    pricer = dict(cfg0["pricer"])
+    engine = pricer.pop("engine", "lsmc")
+    t0 = time.perf_counter()
+    try:
+        policy = None
+        if engine == "lsmc":
+            out = store.price(spec, n_paths=cfg0["n_paths"], **pricer)
+            policy = store.policy(spec, n_paths=cfg0["n_paths"], **pricer)
+        else:
+            out = price_swing(paths, spec, engine=engine, **pricer)[:4]
+    except Exception:
+        err = traceback.format_exc(limit=2).strip().splitlines()[-1]
+        return [(config_id(cfg), {"error": err}) for cfg in cfgs]
+    price_s = time.perf_counter() - t0
+    rows = []
+    for cfg in cfgs:
+        row = {"value": float(out[0]), "price_s": price_s}
+        t1 = time.perf_counter()
+        try:
+            u, h = _hedge(paths, spec, out, cfg["hedge"], cfg.get("oos"), policy)
+            row.update(_risk_row(u, h, cfg["alpha"]))
+        except Exception:
+            row["error"] = traceback.format_exc(limit=2).strip().splitlines()[-1]
+        row["hedge_s"] = time.perf_counter() - t1
+        rows.append((config_id(cfg), row))
+    return rows
+
+# ---------------- driver ----------------
+
+def _fmt(v):
+    return json.dumps(v) if isinstance(v, (list, dict)) else v
+
+def _write_table(path, rows, lead=()):
+    cols = list(lead)
+    for r in rows:
+        cols += [k for k in r if k not in cols]
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=cols)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: _fmt(v) for k, v in r.items()})
+
+def run_sweep(config, workers=None, out="sweep_results.csv", workdir="sweep_work", resume=False,
+              dry_run=False, log=print):
+    """
+    Run every configuration of `config` (a dict, see module docstring).
+    Returns the list of result rows (also written to `out`).
+    """
+    todo = expand(config)
+    for _, cfg in todo:
+        check_config(cfg)
+    done = {}
+    journal = out + ".jsonl"
+    if resume and os.path.exists(journal):
+        with open(journal) as f:
+            for line in f:
+                r = json.loads(line)
+                if "error" not in r:      # failed configurations are retried
+                    done[r["id"]] = r
+    elif os.path.exists(journal):
+        os.remove(journal)
+
+    meta = {}
+    for over, cfg in todo:
+        cid = config_id(cfg)
+        meta[cid] = {"id": cid, "name": cfg["name"], **over,
+                     "sim_key": sim_key(cfg), "price_key": price_key(cfg)}
+    pending = [cfg for _, cfg in todo if config_id(cfg) not in done]
+    sims = {sim_key(c): c for c in pending}
+    prices = {}
+    for c in pending:
+        prices.setdefault(price_key(c), []).append(c)
+    log(f"{len(todo)} configurations ({len(done)} done): {len(sims)} scenario sets, "
+        f"{len(prices)} pricing runs, {len(pending)} hedge/risk evaluations")
+    if dry_run:
+        return []
+
+    workers = int(workers or os.cpu_count() or 1)
+    t0 = time.perf_counter()
+    roots = {k: os.path.join(workdir, "scenarios", k) for k in sims}
+    failed = {}
+    with ProcessPoolExecutor(workers) as ex:
+        for root, dt, err in ex.map(_simulate_job, [(roots[k], c) for k, c in sims.items()]):
+            if err:
+                failed[root] = err
+                log(f"  scenarios {os.path.basename(root)} failed: {err}")
+            else:
+                log(f"  scenarios {os.path.basename(root)} ready ({dt:.1f}s)")
+        futs = [ex.submit(_price_job, (roots[sim_key(cfgs[0])], cfgs)) for cfgs in prices.values()
+                if roots[sim_key(cfgs[0])] not in failed]
+        with open(journal, "a") as jf:
+            # configurations on a failed scenario set get error rows (retried by --resume)
+            for cfgs in prices.values():
+                err = failed.get(roots[sim_key(cfgs[0])])
+                for cfg in cfgs if err else ():
+                    cid = config_id(cfg)
+                    done[cid] = {**meta[cid], "error": f"simulation: {err}"}
+                    jf.write(json.dumps(done[cid]) + "\n")
+            jf.flush()
+            for i, fut in enumerate(as_completed(futs), 1):
+                for cid, row in fut.result():
+                    done[cid] = {**meta[cid], **row}
+                    jf.write(json.dumps(done[cid]) + "\n")
+                jf.flush()
+                log(f"  pricing runs {i}/{len(futs)}  ({time.perf_counter() - t0:.0f}s)")
+
+    rows = [{**meta[config_id(cfg)], **done[config_id(cfg)]} for _, cfg in todo]
+    lead = ["id", "name"] + list(dict.fromkeys(k for over, _ in todo for k in over))
+    _write_table(out, rows, lead)
+    log(f"wrote {len(rows)} rows to {out}")
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Scenario sweep runner (see sweep.py docstring for the config format)")
+    ap.add_argument("config", help="JSON or YAML grid file")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out", default="sweep_results.csv")
+    ap.add_argument("--workdir", default="sweep_work", help="scenario stores (reused across runs)")
+    ap.add_argument("--resume", action="store_true", help="skip configurations already in <out>.jsonl")
+    ap.add_argument("--dry-run", action="store_true", help="only count configurations and shared stages")
+    args = ap.parse_args(argv)
+    run_sweep(load_config(args.config), args.workers, args.out, args.workdir, args.resume, args.dry_run)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # swing.py
 from dataclasses import dataclass
+import numpy as np
 
 @dataclass
 class SwingSpec:
@@ -13,6 +14,13 @@ class SwingSpec:
     destination: str         # e.g., 'TTF' or 'JKM'
     fee: float = 0.0         # per-unit fee
 
+@dataclass
+class DiversionSpec(SwingSpec):
+    # Cargo can be sold at any of `destinations` each day; `destination` stays the
+    # reference market. dest_fees: per-unit shipping/regas cost per destination (on top of fee).
+    destinations: tuple = ("TTF", "JKM")
+    dest_fees: tuple = (0.0, 0.0)
+
 class SwingState:
     def __init__(self, spec: SwingSpec):
         self.spec = spec
@@ -48,3 +56,24 @@ class SwingState:
             # If constraints collide, pick the closest feasible (set both to a safe bound)
             lo = hi
         return lo, hi
+
+def feasible_bounds_batch(spec: SwingSpec, t: int, rem_quota):
+    """
+    Vectorized SwingState.feasible_bounds over paths.
+    rem_quota: array of remaining quota (Q_max - cumulative lifted) per path.
+    Returns (lo, hi) arrays with the same shape as rem_quota.
+    """
+    cum = spec.Q_max - np.asarray(rem_quota, dtype=float)
+
+    rem_days = spec.T - t
+    max_future = spec.q_max * max(rem_days - 1, 0)
+    min_future = spec.q_min * max(rem_days - 1, 0)
+
+    hi_cap = spec.Q_max - cum - min_future
+    lo_cap = spec.Q_min - cum - max_future
+
+    lo = np.maximum(np.maximum(spec.q_min, lo_cap), 0.0)
+    hi = np.maximum(np.minimum(spec.q_max, hi_cap), 0.0)
+    # Colliding constraints: fall back to the upper bound (as in the scalar version)
+    lo = np.minimum(lo, hi)
+    return lo, hi
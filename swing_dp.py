@@ -0,0 +1,141 @@
+# swing_dp.py
+"""
+Quota-grid dynamic programming for swing contracts.
+
+Backward induction over (time, cumulative volume): cumulative lifted volume is
+discretized on a lattice c_j = j*dq, and for every node the continuation value
+E[V_{t+1}(S, c_j) | S_t] is estimated by regression on a market-only basis.
+All nodes share one design matrix, so the per-node regressions are a single
+multi-RHS normal-equation solve. Values between nodes are linearly interpolated.
+On the demo contract the DP value is within ~0.2% of lsmc_forward_value on the
+same paths (tests/test_swing_dp.py).
+"""
+import numpy as np
+from swing import SwingSpec, feasible_bounds_batch
+from basis import get_basis
+from lsmc import cross_products, solve_normal
+
+def quota_grid(spec: SwingSpec, dq):
+    """Cumulative-volume nodes 0, dq, ..., >= Q_max."""
+    M = int(np.ceil(spec.Q_max / dq - 1e-9)) + 1
+    return np.arange(M) * dq
+
+def _node_weights(pos, M):
+    """Lower node index and linear weight for fractional node positions."""
+    j0 = np.clip(np.floor(pos).astype(int), 0, M - 2)
+    w = np.clip(pos - j0, 0.0, 1.0)
+    return j0, w
+
+def _decide(C, V_next, spread, c_r, lo, hi, dq, K):
+    """
+    Best of the K actions at nodes c_r for one block of paths: running max of
+    payoff + interpolated continuation C (M, b); returns the realized value-to-go
+    (from V_next) of the chosen action, (M_r, b).
+    """
+    M = C.shape[0]
+    best = np.full((c_r.size, spread.size), -np.inf)
+    V_r = np.zeros_like(best)
+    for k in range(K):
+        a = np.minimum(lo + k*dq, hi)[:, None]                         # (M_r, 1)
+        j0, w = _node_weights((c_r[:, None] + a) / dq, M)
+        j0 = j0[:, 0]
+        pay = spread[None, :]*a
+        val = pay + (1.0 - w)*C[j0] + w*C[j0 + 1]
+        better = val > best
+        best = np.where(better, val, best)
+        V_r = np.where(better, pay + (1.0 - w)*V_next[j0] + w*V_next[j0 + 1], V_r)
+    return V_r
+
+def _reachable(c_nodes, spec, t, dq):
+    lo = spec.q_min * t - 1e-9
+    hi = min(spec.q_max * t, spec.Q_max) + 1e-9
+    j = np.flatnonzero((c_nodes >= np.floor(lo / dq) * dq - 1e-9) & (c_nodes <= np.ceil(hi / dq) * dq + 1e-9))
+    return slice(j[0], j[-1] + 1)
+
+def _state(paths, spec, t, T, rem_frac):
+    idx  = paths[spec.index][:, t]
+    dest = paths[spec.destination][:, t]
+    n = idx.shape[0]
+    return np.column_stack([idx, dest, np.broadcast_to(rem_frac, n),
+                            np.full(n, (t+1)/T), dest - idx])
+
+def grid_swing_value(paths, spec: SwingSpec, basis="market", dq=None, n_actions=5, chunk_size=256):
+    """
+    Price a swing contract by quota-grid DP with per-node regressions.
+    dq: node spacing in volume units (default (q_max - q_min)/(n_actions - 1)).
+    n_actions: volumes per day, lo + k*dq capped at hi.
+    basis: market-only basis for the per-node regressions (quota terms are
+           replaced by the grid); registry name, BasisSpec or Basis.
+    chunk_size: paths per block in the backward decision (bounds its memory).
+    Returns (value, q, cf, dlt) like lsmc_swing_value.
+    """
+    B = get_basis(basis)
+    n, T = paths[spec.index].shape[0], paths[spec.index].shape[1]-1
+    if dq is None:
+        dq = (spec.q_max - spec.q_min) / max(n_actions - 1, 1) if spec.q_max > spec.q_min else spec.q_max
+    dq = float(dq)
+    c_nodes = quota_grid(spec, dq)
+    M = c_nodes.size
+    K = int(n_actions)
+    if chunk_size is not None and int(chunk_size) <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    step = n if not chunk_size else int(chunk_size)
+
+    betas = np.zeros((T, B.size, M))
+    V_next = np.zeros((M, n))                  # realized value-to-go per node and path
+
+    # ---------------- backward pass over (t, node) ----------------
+    for t in reversed(range(T)):
+        # only nodes reachable at t: cumulative volume in [t*q_min, t*q_max]
+        r, r_next = _reachable(c_nodes, spec, t, dq), _reachable(c_nodes, spec, t + 1, dq)
+        c_r = c_nodes[r]
+        state = _state(paths, spec, t, T, 0.0)
+        spread = state[:, 1] - (state[:, 0] + spec.spread_addon) - spec.fee
+        X = B.matrix(state)
+        XtX, XtY = cross_products(X, V_next.T)
+        beta = solve_normal(XtX, XtY)          # (m, M): one regression per node
+        betas[t] = beta
+        C = np.zeros((M, n))                   # continuation at nodes reachable at t+1
+        C[r_next] = (X @ beta[:, r_next]).T
+
+        lo, hi = feasible_bounds_batch(spec, t, spec.Q_max - c_r)       # (M_r,)
+        # decide block by block: a few (M_r, chunk_size) arrays instead of a
+        # (K, M_r, n) tensor (M ~ Q_max/dq grows with K), and cache-sized operands
+        V_t = np.zeros((M, n))
+        for a in range(0, n, step):
+            b = slice(a, a + step)
+            V_t[r, b] = _decide(C[:, b], V_next[:, b], spread[b], c_r, lo, hi, dq, K)
+        V_next = V_t
+
+    # ---------------- forward pass along each path ----------------
+    q   = np.zeros((n, T))
+    cf  = np.zeros((n, T))
+    dlt = np.zeros((n, T))
+    cum = np.zeros(n)
+    ar  = np.arange(n)
+    for t in range(T):
+        state = _state(paths, spec, t, T, 1.0 - cum/spec.Q_max)
+        spread = state[:, 1] - (state[:, 0] + spec.spread_addon) - spec.fee
+        X, dX = B.matrix(state), B.dindex(state)
+        beta = betas[t]
+        C, dC = X @ beta, dX @ beta            # (n, M) continuation and its index-gradient
+
+        lo, hi = feasible_bounds_batch(spec, t, spec.Q_max - cum)
+        best = np.full(n, -np.inf)
+        chosen = np.zeros(n); grad = np.zeros(n)
+        for k in range(K):
+            a = np.minimum(lo + k*dq, hi)
+            j0, w = _node_weights((cum + a) / dq, M)
+            val = spread*a + (1.0 - w)*C[ar, j0] + w*C[ar, j0 + 1]
+            better = val > best
+            best = np.where(better, val, best)
+            chosen = np.where(better, a, chosen)
+            grad = np.where(better, (1.0 - w)*dC[ar, j0] + w*dC[ar, j0 + 1], grad)
+
+        q[:, t]  = chosen
+        cf[:, t] = spread * chosen
+        dlt[:, t] = -chosen + grad
+        cum = cum + chosen
+
+    value_est = cf.sum(axis=1).mean()
+    return value_est, q, cf, dlt
@@ -0,0 +1,29 @@
+# tests/conftest.py
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+
+from simulators import MultiFactorOU
+from swing import SwingSpec
+
+S0, B0 = {'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, {'B_JKM_TTF': 2.0}
+
+def demo_spec(T=30):
+    """The run_demo contract (quotas scaled with the tenor)."""
+    return SwingSpec(T=T, q_min=0.5, q_max=1.5, Q_min=20*T/30, Q_max=30*T/30,
+                     index='HH', spread_addon=1.2, destination='TTF', fee=0.1)
+
+def demo_paths(n_paths=5000, rng=42, T=30):
+    return MultiFactorOU(rng=rng).simulate_paths(S0, B0, T=T, n_paths=n_paths)
+
+@pytest.fixture(scope="session")
+def spec():
+    return demo_spec()
+
+@pytest.fixture(scope="session")
+def paths():
+    return demo_paths()
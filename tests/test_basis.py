@@ -0,0 +1,70 @@
+# tests/test_basis.py
+import numpy as np
+import pytest
+
+from swing import SwingState, feasible_bounds_batch
+from basis import get_basis, BASIS_REGISTRY
+from lsmc import lsmc_swing_value, _swing_state, regress, reachable_quota, quota_samples
+
+# ---- baseline per-path reference (the original lsmc.py) ----
+
+def basis_functions(state_vec):
+    x0, x1, x2, tf, b = state_vec
+    return np.array([1.0, x0, x1, x2, x0*x1, x1*tf, x0**2, x1**2])
+
+def dbasis_dindex(state_vec):
+    x0, x1, x2, tf, b = state_vec
+    return np.array([0.0, 1.0, 0.0, 0.0, x1, 0.0, 2.0*x0, 0.0])
+
+def _states(paths, spec, t):
+    lo, hi = reachable_quota(spec, spec.T)
+    return _swing_state(paths, spec, t, spec.T, quota_samples(lo[t], hi[t], t, paths[spec.index].shape[0]))
+
+@pytest.mark.parametrize("t", (0, 1, 15, 29))
+def test_default_basis_matches_baseline(paths, spec, t):
+    st = _states(paths, spec, t)
+    B = get_basis(None)
+    # squares are x*x (vs x**2 in the baseline): equal up to the last ulp
+    np.testing.assert_allclose(B.matrix(st), np.stack([basis_functions(sv) for sv in st]), rtol=1e-15, atol=0)
+    np.testing.assert_array_equal(B.dindex(st), np.stack([dbasis_dindex(sv) for sv in st]))
+
+def test_feasible_bounds_batch_matches_swing_state(spec):
+    rem = np.linspace(-1.0, spec.Q_max + 1.0, 301)
+    for t in range(spec.T):
+        lo, hi = feasible_bounds_batch(spec, t, rem)
+        ref = []
+        for r in rem:
+            s = SwingState(spec); s.cum = spec.Q_max - r
+            ref.append(s.feasible_bounds(t))
+        np.testing.assert_array_equal(np.column_stack([lo, hi]), np.array(ref))
+
+def test_normal_equations_match_lstsq_on_x(paths, spec):
+    # the default basis is rank deficient (dest*tf is collinear with dest within a
+    # day): both solves give the min-norm fit, so fitted values and deltas agree
+    _, _, cf, _ = lsmc_swing_value(paths, spec)
+    B = get_basis(None)
+    for t in range(spec.T):
+        st = _states(paths, spec, t)
+        X, dX, y = B.matrix(st), B.dindex(st), cf[:, t+1:].sum(axis=1)
+        b_ref = np.linalg.lstsq(X, y, rcond=None)[0]
+        b = regress(X, y)
+        np.testing.assert_allclose(X @ b, X @ b_ref, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(dX @ b, dX @ b_ref, rtol=0, atol=1e-6)
+
+def _bumped(st, col, h):
+    # moving the index (dest) price also moves the spread column dest - index
+    out = st.copy()
+    out[:, col] += h
+    out[:, 4] += -h if col == 0 else h
+    return out
+
+@pytest.mark.parametrize("basis", sorted(BASIS_REGISTRY))
+def test_price_derivatives_match_finite_differences(paths, spec, basis):
+    B, h = get_basis(basis), 1e-5
+    st = _states(paths, spec, 10)[:500]
+    for col, d, dm in ((0, B.dindex(st), B.multiplier_deriv(st, "index") - B.multiplier_deriv(st, "spread")),
+                       (1, B.ddest(st), B.multiplier_deriv(st, "dest") + B.multiplier_deriv(st, "spread"))):
+        up, dn = _bumped(st, col, h), _bumped(st, col, -h)
+        np.testing.assert_allclose(d, (B.matrix(up) - B.matrix(dn)) / (2*h), rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(dm, (B.quota_multipliers(up) - B.quota_multipliers(dn)) / (2*h),
+                                   rtol=1e-6, atol=1e-6)
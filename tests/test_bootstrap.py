@@ -0,0 +1,41 @@
+# tests/test_bootstrap.py
+import numpy as np
+import pytest
+
+from bootstrap import bootstrap_weights, weighted_var_es, bootstrap_hedge_stats
+from risk_metrics import var_es, hedge_effectiveness_var
+
+def _pnl(n=400):
+    rng = np.random.default_rng(0)
+    u = rng.standard_t(4, n) * 10.0
+    return u, -0.8 * u + rng.normal(0.0, 3.0, n)
+
+def _resample(x, w):
+    return np.repeat(x, w.astype(int))
+
+@pytest.mark.parametrize("method", ("multinomial", "poisson"))
+def test_weighted_statistics_equal_explicit_resampling(method):
+    u, h = _pnl()
+    w = bootstrap_weights(u.size, 20, method, rng=1)
+    assert np.all(w == np.round(w)) and (method != "multinomial" or np.all(w.sum(axis=1) == u.size))
+    q, es = weighted_var_es(u, w, alpha=0.05)
+    for b in range(w.shape[0]):
+        ref = var_es(_resample(u, w[b]), 0.05)
+        assert (q[b], es[b]) == pytest.approx(ref, rel=1e-12)
+
+@pytest.mark.parametrize("method", ("multinomial", "poisson"))
+def test_hedge_stats_equal_explicit_resampling(method):
+    u, h = _pnl()
+    out = bootstrap_hedge_stats(u, h, n_boot=20, method=method, rng=7)
+    w = bootstrap_weights(u.size, 20, method, rng=7)           # same stream, one block
+    for b in range(20):
+        ur, hr = _resample(u, w[b]), _resample(h, w[b])
+        yr = ur + hr
+        assert out["he_var"][b] == pytest.approx(hedge_effectiveness_var(ur, yr), rel=1e-9)
+        assert out["he_es"][b] == pytest.approx(1.0 - var_es(yr)[1] / var_es(ur)[1], rel=1e-9)
+        assert out["lam_star"][b] == pytest.approx(-np.cov(ur, hr)[0, 1] / hr.var(ddof=1), rel=1e-9)
+
+def test_multinomial_counts_have_resampling_moments():
+    # counts of n draws with replacement: mean 1, variance 1 - 1/n per path
+    w = bootstrap_weights(50, 20000, "multinomial", rng=3)
+    assert w.mean() == pytest.approx(1.0) and w.var() == pytest.approx(1.0 - 1.0/50, rel=0.02)
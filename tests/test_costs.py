@@ -0,0 +1,40 @@
+# tests/test_costs.py
+import numpy as np
+import pytest
+
+from costs import CostModel, hedge_legs
+from level_strip_hedge import apply_strip_positions
+
+def _old_strip_pnl(paths, spec, H, tc_bps):
+    """The former aggregate cost: one turnover cost off the cross-path mean price."""
+    pnl, tc = 0.0, 0.0
+    for j, name in enumerate([spec.index, spec.destination][:H.shape[1]]):
+        S = paths[name]
+        pnl = pnl + (H[:, j][None, :] * (S[:, 1:] - S[:, :-1])).sum(axis=1)
+        tc += np.sum(np.abs(np.diff(np.r_[0.0, H[:, j]])) * S[:, :-1].mean(axis=0)) * (tc_bps * 1e-4)
+    return pnl - tc
+
+def _strip(T, k=2):
+    return np.random.default_rng(0).normal(size=(T, k)).cumsum(axis=0)
+
+@pytest.mark.parametrize("k", (1, 2))
+def test_per_path_costs_average_to_the_old_aggregate(paths, spec, k):
+    H = _strip(spec.T, k)
+    new = apply_strip_positions(paths, spec, H, tc_bps=5.0)
+    old = _old_strip_pnl(paths, spec, H, tc_bps=5.0)
+    # same total cost on average, now charged on each path's own prices
+    assert new.mean() == pytest.approx(old.mean(), rel=1e-12)
+    assert np.std(new - old) > 0
+    np.testing.assert_allclose(apply_strip_positions(paths, spec, H), _old_strip_pnl(paths, spec, H, 0.0),
+                               rtol=1e-12, atol=1e-12)
+
+def test_hedge_pnl_matches_explicit_per_path_costs(paths, spec):
+    H = _strip(spec.T)
+    model = CostModel(tc_bps=3.0, spread=np.linspace(0.01, 0.05, spec.T), fee_per_lot=0.2, lot=0.5)
+    prices, dS = hedge_legs(paths, spec, 2)
+    pnl = model.hedge_pnl(H, prices, dS)
+    Hr = np.round(H / 0.5) * 0.5
+    trade = np.abs(np.diff(Hr, axis=0, prepend=0.0))                  # (T, k)
+    for i in (0, 17, 999):
+        unit = prices[i] * 3e-4 + 0.5 * model.spread[:, None] + 0.2 / 0.5
+        assert pnl[i] == pytest.approx((Hr * dS[i]).sum() - (trade * unit).sum(), rel=1e-12)
@@ -0,0 +1,17 @@
+# tests/test_delta_hedge.py
+import pytest
+
+from delta_hedge import SensitivityEngine, finite_diff_delta, rolling_delta_hedge
+from lsmc import lsmc_swing_value
+
+def test_engine_value_is_the_reported_price(paths, spec):
+    assert SensitivityEngine().sensitivities(paths, spec)["value"] == lsmc_swing_value(paths, spec)[0]
+
+def test_engine_delta_matches_bump_and_reprice(paths, spec):
+    d_fd = finite_diff_delta(paths, spec, lsmc_swing_value, bump=0.01)
+    assert SensitivityEngine().delta(paths, spec, bump=0.01) == pytest.approx(d_fd, rel=1e-3)
+
+def test_rolling_hedge_uses_engine_delta(paths, spec):
+    engine = SensitivityEngine()
+    _, deltas = rolling_delta_hedge(paths, spec, rebalance_days=5, engine=engine)
+    assert deltas == pytest.approx(engine.delta(paths, spec))
@@ -0,0 +1,56 @@
+# tests/test_lsmc.py
+import numpy as np
+import pytest
+
+from conftest import demo_paths, S0, B0
+from simulators import MultiFactorOU
+from lsmc import lsmc_swing_value, lsmc_forward_value, apply_policy
+
+def test_in_sample_value_is_the_forward_pass_of_its_policy(paths, spec):
+    v, q, cf, dlt, policy = lsmc_swing_value(paths, spec, return_policy=True)
+    v2, q2, cf2, dlt2 = apply_policy(policy, paths)
+    assert v == v2
+    np.testing.assert_array_equal(cf, cf2)
+
+def test_exercise_respects_daily_and_total_bounds(paths, spec):
+    _, q, _, _ = lsmc_swing_value(paths, spec)
+    assert q.min() >= spec.q_min - 1e-12 and q.max() <= spec.q_max + 1e-12
+    tot = q.sum(axis=1)
+    assert tot.min() >= spec.Q_min - 1e-9 and tot.max() <= spec.Q_max + 1e-9
+
+@pytest.mark.parametrize("basis", (None, "spline_quota"))
+def test_forward_value_not_above_in_sample(paths, spec, basis):
+    v, _, _, _, policy = lsmc_swing_value(paths, spec, basis=basis, return_policy=True)
+    fwd = lsmc_forward_value(policy, demo_paths(20000, rng=7))
+    assert fwd["value"] <= v + 3 * fwd["stderr"]
+    # and not far below it either: the policy generalizes
+    assert fwd["value"] >= v - 1.0
+
+def test_forward_value_does_not_depend_on_chunking(paths, spec):
+    _, _, _, _, policy = lsmc_swing_value(paths, spec, return_policy=True)
+    test = demo_paths(3000, rng=7)
+    ref = lsmc_forward_value(policy, test)
+    for chunk_size in (1000, 777, 5000):
+        out = lsmc_forward_value(policy, test, chunk_size=chunk_size)
+        assert out["n_paths"] == ref["n_paths"] == 3000
+        assert out["value"] == pytest.approx(ref["value"], rel=1e-12)
+        assert out["stderr"] == pytest.approx(ref["stderr"], rel=1e-8)
+
+def test_forward_value_rejects_empty_input_and_bad_chunks(paths, spec):
+    _, _, _, _, policy = lsmc_swing_value(paths, spec, return_policy=True)
+    empty = {k: v[:0] for k, v in paths.items()}
+    with pytest.raises(ValueError, match="at least one path"):
+        lsmc_forward_value(policy, empty)
+    with pytest.raises(ValueError, match="at least one path"):
+        lsmc_forward_value(policy, empty, chunk_size=100)
+    with pytest.raises(ValueError, match="chunk_size"):
+        lsmc_forward_value(policy, paths, chunk_size=0)
+
+def test_forward_value_on_a_streaming_simulator(paths, spec):
+    _, _, _, _, policy = lsmc_swing_value(paths, spec, return_policy=True)
+    sim = MultiFactorOU(rng=7)
+    ref = lsmc_forward_value(policy, sim.simulate_block_range(S0, B0, spec.T, 0, 3000))
+    out = lsmc_forward_value(policy, sim.iter_paths(S0, B0, T=spec.T, n_paths=3000, chunk_size=1024))
+    assert out["value"] == pytest.approx(ref["value"], rel=1e-12)
+    with pytest.raises(ValueError, match="chunk_size"):
+        next(sim.iter_paths(S0, B0, T=spec.T, n_paths=3000, chunk_size=0))
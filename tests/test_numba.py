@@ -0,0 +1,34 @@
+# tests/test_numba.py
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+from simulators import MultiFactorOU
+from swing import SwingSpec
+from lsmc import lsmc_swing_value
+from basis import BASIS_REGISTRY
+
+SPEC = SwingSpec(T=30, q_min=0.5, q_max=1.5, Q_min=20, Q_max=30,
+                 index='HH', spread_addon=1.2, destination='TTF', fee=0.1)
+
+@pytest.fixture(scope="module")
+def paths():
+    return MultiFactorOU(rng=42).simulate_paths(
+        S0={'HH': 3.0, 'TTF': 9.0, 'JKM': 11.0}, B0={'B_JKM_TTF': 2.0}, T=30, n_paths=5000)
+
+@pytest.mark.parametrize("K", (3, 9))
+@pytest.mark.parametrize("basis", sorted(BASIS_REGISTRY))
+def test_numba_backend_matches_numpy(paths, basis, K):
+    v0, q0, cf0, d0 = lsmc_swing_value(paths, SPEC, basis=basis, n_actions=K)
+    v1, q1, cf1, d1 = lsmc_swing_value(paths, SPEC, basis=basis, n_actions=K, backend="numba")
+    assert v1 == pytest.approx(v0, rel=1e-12)
+    np.testing.assert_allclose(q1, q0, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(cf1, cf0, rtol=0, atol=1e-10)
+    # XᵀX is summed row by row vs by BLAS; the rounding difference is amplified by
+    # cond(XᵀX). From day 3 on that leaves < 5e-6 (laguerre3; 1e-8 for default).
+    np.testing.assert_allclose(d1[:, 3:], d0[:, 3:], rtol=0, atol=1e-5)
+    # days 0-2: all paths start at S0, so the price slope is (nearly) unidentified
+    # (cond ~1e11, exact nulls at t=0) and the min-norm split of the collinear
+    # columns follows the rounding: up to 4e-4 (spline_quota), 1e-4 (laguerre3)
+    np.testing.assert_allclose(d1[:, :3], d0[:, :3], rtol=0, atol=1e-3)
@@ -0,0 +1,26 @@
+# tests/test_optimizer.py
+import numpy as np
+import pytest
+
+from optimizer import mean_cvar_optimize
+
+def _pnl(drift=0.0, n=4000):
+    rng = np.random.default_rng(0)
+    h = rng.normal(0.0, 1.0, (n, 2))
+    u = rng.normal(1.0, 3.0, n) - 1.5*h[:, 0] + 0.8*h[:, 1]
+    h[:, 0] += drift
+    return np.column_stack([u, h])
+
+def test_smooth_matches_lp():
+    lp = mean_cvar_optimize(None, _pnl(), lam=2.0, method="lp")
+    sm = mean_cvar_optimize(None, _pnl(), lam=2.0, method="smooth")
+    np.testing.assert_allclose(sm["weights"], lp["weights"], atol=1e-2)
+    assert sm["objective"] == pytest.approx(lp["objective"], rel=1e-4)
+
+@pytest.mark.parametrize("method", ("lp", "smooth"))
+def test_unbounded_problem_raises(method):
+    # a hedge leg with drift and a small λ: mean - λ·CVaR grows without bound
+    with pytest.raises(ValueError, match="unbounded"):
+        mean_cvar_optimize(None, _pnl(drift=0.5), lam=0.1, method=method)
+    res = mean_cvar_optimize(None, _pnl(drift=0.5), lam=0.1, method=method, bounds=(-5.0, 5.0))
+    assert res["weights"][1] == pytest.approx(5.0)
@@ -0,0 +1,45 @@
+# tests/test_portfolio.py
+import numpy as np
+import pytest
+
+from conftest import S0, B0
+from simulators import MultiFactorOU
+from swing import SwingSpec, DiversionSpec
+from lsmc import lsmc_swing_value
+from diversion import diversion_swing_value
+from portfolio import Portfolio, Contract
+
+def _spec(T=20, q_max=1.5, addon=1.2, dest="TTF"):
+    return SwingSpec(T=T, q_min=0.5, q_max=q_max, Q_min=0.6*T, Q_max=0.8*T*q_max,
+                     index="HH", spread_addon=addon, destination=dest, fee=0.1)
+
+@pytest.fixture(scope="module")
+def book():
+    div = DiversionSpec(**{**_spec().__dict__, "destinations": ("TTF", "JKM"), "dest_fees": (0.0, 0.3)})
+    contracts = [Contract(_spec(), "a", start=0, size=2.0),
+                 Contract(_spec(addon=1.0), "b", start=0),           # stacked with "a"
+                 Contract(_spec(), "a2", start=0, size=0.5),          # duplicate of "a"
+                 Contract(_spec(T=30, q_max=1.0, dest="JKM"), "c", start=5),
+                 Contract(div, "d", start=10)]
+    pf = Portfolio(contracts)
+    paths = pf.simulate(MultiFactorOU(rng=42), S0, B0, n_paths=2000)
+    return pf, paths, pf.price(paths)
+
+def test_portfolio_matches_standalone_pricers(book):
+    pf, paths, res = book
+    for i, c in enumerate(pf.contracts):
+        sub = {k: v[:, c.start:c.start + c.spec.T + 1] for k, v in paths.items()}
+        pricer = diversion_swing_value if isinstance(c.spec, DiversionSpec) else lsmc_swing_value
+        v, _, cf, dlt = pricer(sub, c.spec)[:4]
+        assert res.values[c.name] == pytest.approx(c.size * v, rel=1e-10)
+        np.testing.assert_allclose(res.contract_pnl[:, i], c.size * cf.sum(axis=1), rtol=1e-10, atol=1e-10)
+    assert res.value == pytest.approx(sum(res.values.values()), rel=1e-10)
+
+def test_increments_cache_keeps_only_the_latest_paths(book):
+    pf, paths, res = book
+    pf.hedge_strips(paths, res)
+    other = MultiFactorOU(rng=7).simulate_paths(S0, B0, T=pf.horizon, n_paths=100)
+    for p in (paths, other, paths):
+        for mk in pf.markets:
+            np.testing.assert_array_equal(pf.increments(p, mk), np.diff(p[mk], axis=1))
+    assert len(pf._features) == len(pf.markets)
@@ -0,0 +1,44 @@
+# tests/test_revaluation.py
+import numpy as np
+import pytest
+
+from conftest import S0, B0, demo_spec
+from simulators import MultiFactorOU
+from swing import SwingState
+from revaluation import Revaluator
+
+@pytest.fixture
+def rv():
+    return Revaluator(MultiFactorOU(rng=3), demo_spec(), n_paths=2000)
+
+def test_paths_are_rescaled_not_redrawn(rv):
+    p1, p2 = rv.paths(S0, B0), rv.paths({**S0, "HH": 3.3}, B0)
+    np.testing.assert_allclose(p2["HH"], p1["HH"] * 1.1, rtol=1e-14)
+    np.testing.assert_array_equal(p2["TTF"], p1["TTF"])
+    assert rv.paths(S0, B0, day=10)["HH"].shape == (2000, 21)
+
+def test_reuse_at_the_fit_prices_returns_the_fitted_value(rv):
+    v = rv.fit(S0, B0)
+    assert rv.revalue(S0, B0, deltas=False)["value"] == pytest.approx(v, rel=1e-12)
+    assert rv.revalue(S0, B0)["value"] == pytest.approx(v, rel=1e-12)
+
+def test_deltas_match_repricing_bumped_start_prices(rv):
+    rv.fit(S0, B0)
+    bump, day, lifted = 0.01, 5, 4.0
+    out = rv.revalue(S0, B0, day=day, lifted=lifted, bump=bump)
+    val = lambda s: rv.revalue(s, B0, day=day, lifted=lifted, deltas=False)["value"]
+    up, dn = {**S0, "HH": S0["HH"]*(1+bump)}, {**S0, "HH": S0["HH"]*(1-bump)}
+    assert out["delta_idx"] == pytest.approx((val(up) - val(dn)) / (2*S0["HH"]*bump), rel=1e-10)
+    up, dn = {**S0, "TTF": S0["TTF"]*(1+bump)}, {**S0, "TTF": S0["TTF"]*(1-bump)}
+    # B0 fixes JKM - TTF, so only the destination leg moves with TTF
+    assert out["delta_dst"] == pytest.approx((val(up) - val(dn)) / (2*S0["TTF"]*bump), rel=1e-10)
+
+def test_refit_keeps_elapsed_days(rv):
+    rv.fit(S0, B0)
+    early = rv.policy.betas[:5].copy()
+    state = SwingState(rv.spec); state.cum = 5.0
+    out = rv.revalue({**S0, "HH": 3.2}, B0, day=5, lifted=state, mode="refit")
+    np.testing.assert_array_equal(rv.policy.betas[:5], early)
+    assert np.isfinite(out["value"]) and out["value"] > 0
+    with pytest.raises(ValueError, match="mode"):
+        rv.revalue(S0, B0, mode="bogus")
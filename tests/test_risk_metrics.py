@@ -0,0 +1,59 @@
+# tests/test_risk_metrics.py
+import numpy as np
+import pytest
+
+from risk_metrics import RiskAccumulator, var_es_summary
+from parallel import parallel_forward_hedge
+from lsmc import lsmc_swing_value
+from simulators import MultiFactorOU
+from conftest import S0, B0
+
+ALPHAS = (0.01, 0.05)
+
+def _pnl(n=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_t(4, n) * 10.0 + 100.0
+
+def test_exact_mode_matches_var_es_summary():
+    x = _pnl()
+    acc = RiskAccumulator(ALPHAS, max_paths=x.size)
+    for c in np.array_split(x, 7):
+        acc.update({"PnL": c})
+    s, ref = acc.summary("PnL"), var_es_summary(x, "PnL", ALPHAS)
+    for k, v in ref.items():
+        assert s[k] == (v if k == "name" else pytest.approx(v, rel=1e-12))
+
+def test_sketch_error_is_bounded():
+    x = _pnl()
+    acc = RiskAccumulator(ALPHAS, rel_acc=0.005).update({"PnL": x})
+    s = np.sort(x)
+    for a in ALPHAS:
+        k = int(np.floor(a * (x.size - 1))) + 1             # the sketch's order statistic
+        q, es = acc.tails["PnL"].var_es(a)
+        assert abs(q - s[k-1]) <= 0.005 * abs(s[k-1])
+        assert abs(es - s[:k].mean()) <= 0.01 * abs(s[:k].mean())
+
+@pytest.mark.parametrize("max_paths", (10_000, None))
+def test_merge_equals_one_pass_and_does_not_alias(max_paths):
+    x = _pnl()
+    one = RiskAccumulator(ALPHAS, max_paths=max_paths).update({"PnL": x})
+    a = RiskAccumulator(ALPHAS, max_paths=max_paths).update({"PnL": x[:3000]})
+    b = a.empty().update({"PnL": x[3000:]})
+    merged = a.empty().merge(a).merge(b)
+    for k, v in one.summary("PnL").items():
+        assert merged.summary("PnL")[k] == (v if isinstance(v, str) else pytest.approx(v, rel=1e-12))
+    # later updates of a merged-in accumulator must not leak into the merge target
+    before = merged.summary("PnL")
+    b.update({"PnL": x[:500] - 1e3})
+    assert merged.summary("PnL") == before
+
+def test_parallel_forward_hedge_fills_the_accumulator(paths, spec):
+    _, _, _, _, policy = lsmc_swing_value(paths, spec, return_policy=True)
+    acc = RiskAccumulator(ALPHAS, max_paths=3000)
+    u, h = parallel_forward_hedge(policy, MultiFactorOU(rng=7), S0, B0, spec.T, 3000,
+                                  H=np.zeros((spec.T, 2)), n_workers=2, risk=acc)
+    ref = var_es_summary(u, "Unhedged", ALPHAS)
+    s = acc.summary("Unhedged")
+    for k in ref:
+        assert s[k] == (ref[k] if k == "name" else pytest.approx(ref[k], rel=1e-10))
+    assert acc.summary("Hedged")["n"] == 3000
@@ -0,0 +1,49 @@
+# tests/test_simulators.py
+import numpy as np
+import pytest
+
+from conftest import S0, B0
+from simulators import MultiFactorOU, brownian_bridge_increments
+
+def _normals(n=4096, T=30, **kw):
+    return MultiFactorOU(rng=1, **kw)._normals(n, T, np.float64, np.random.default_rng(1))
+
+@pytest.mark.parametrize("bridge", (True, False))
+def test_sobol_normals_are_standard(bridge):
+    z = _normals(sampling="sobol", brownian_bridge=bridge)
+    assert z.shape == (4096, 30, 3) and np.isfinite(z).all()
+    # low-discrepancy points: moments much tighter than pseudo-random (~0.016 at this n)
+    assert np.abs(z.mean(axis=0)).max() < 0.02
+    assert np.abs(z.std(axis=0) - 1.0).max() < 0.05
+    # increments are uncorrelated across days
+    c = np.corrcoef(z[:, :, 0].T)
+    assert np.abs(c - np.eye(30)).max() < 0.1
+
+def test_brownian_bridge_increments_sum_to_the_terminal_draw():
+    z = np.random.default_rng(0).standard_normal((5, 8, 3))
+    np.testing.assert_allclose(brownian_bridge_increments(z).sum(axis=1), np.sqrt(8) * z[:, 0])
+
+@pytest.mark.parametrize("sampling", ("pseudo", "sobol"))
+def test_antithetic_halves_mirror(sampling):
+    z = _normals(n=1001, sampling=sampling, antithetic=True)
+    assert z.shape[0] == 1001
+    np.testing.assert_array_equal(z[501:], -z[:500])
+    sim = MultiFactorOU(rng=1, sampling=sampling, antithetic=True)
+    p = sim.simulate_paths(S0, B0, T=30, n_paths=1000)
+    # log-returns of the mirrored paths are 2*drift minus the originals
+    r = np.log(p["HH"][:, -1] / S0["HH"])
+    drift = 30 * (sim.mu[0] - 0.5 * sim.sigma[0]**2) * sim.dt
+    np.testing.assert_allclose(r[500:] + r[:500], 2 * drift, atol=1e-12)
+
+@pytest.mark.parametrize("sampling", ("pseudo", "sobol"))
+def test_moment_matching_is_exact(sampling):
+    z = _normals(n=999, sampling=sampling, antithetic=True, moment_matching=True)
+    np.testing.assert_allclose(z.mean(axis=0), 0.0, atol=1e-14)
+    np.testing.assert_allclose(z.std(axis=0), 1.0, rtol=1e-12)
+
+def test_moment_matching_rejects_single_path_blocks():
+    sim = MultiFactorOU(rng=1, moment_matching=True)
+    with pytest.raises(ValueError, match="at least 2 paths"):
+        sim.simulate_paths(S0, B0, T=5, n_paths=1)
+    with pytest.raises(ValueError, match="at least 2 paths"):
+        sim.simulate_block_range(S0, B0, T=5, start=0, stop=10, stream_block=1)
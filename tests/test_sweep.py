@@ -0,0 +1,58 @@
+# tests/test_sweep.py
+import json
+import numpy as np
+import pytest
+
+from sweep import run_sweep, build_spec, DEFAULT_BASE
+from scenario_store import ScenarioStore
+from m2m_hedge import m2m_gradients, replication_report
+from lsmc import SwingPolicy
+from basis import get_basis
+
+def _run(tmp_path, config):
+    return run_sweep(config, workers=1, out=str(tmp_path / "res.csv"),
+                     workdir=str(tmp_path / "work"), log=lambda *_: None)
+
+def test_m2m_row_matches_replication_report(tmp_path):
+    rows = _run(tmp_path, {"base": {"n_paths": 1000, "hedge": {"method": "m2m", "tc_bps": 0.0}}})
+    assert len(rows) == 1 and "error" not in rows[0]
+    store = ScenarioStore(tmp_path / "work" / "scenarios" / rows[0]["sim_key"])
+    spec = build_spec(DEFAULT_BASE["spec"])
+    paths = store.paths()
+    r = replication_report(m2m_gradients(store.policy(spec), paths), paths, spec)
+    assert rows[0]["HE_var"] == pytest.approx(r["he_var"], rel=1e-10)
+
+def test_diversion_spec_rejected_on_other_engines(tmp_path):
+    div = {"destinations": ["TTF", "JKM"], "dest_fees": [0.0, 0.3]}
+    with pytest.raises(ValueError, match="diversion"):
+        _run(tmp_path, {"base": {"spec": div}, "grid": {"pricer.engine": ["lsmc", "grid"]}})
+    rows = _run(tmp_path, {"base": {"n_paths": 500, "spec": div, "pricer": {"engine": "diversion"}}})
+    assert "error" not in rows[0] and rows[0]["value"] > 0
+
+def test_resume_retries_failed_rows(tmp_path):
+    config = {"base": {"n_paths": 500, "hedge": {"method": "none"}}}
+    rows = _run(tmp_path, config)
+    with open(tmp_path / "res.csv.jsonl", "w") as f:
+        f.write(json.dumps({"id": rows[0]["id"], "error": "ValueError: boom"}) + "\n")
+    rows = run_sweep(config, workers=1, out=str(tmp_path / "res.csv"), workdir=str(tmp_path / "work"),
+                     resume=True, log=lambda *_: None)
+    assert "error" not in rows[0] and rows[0]["HE_var"] == 0.0
+
+def test_policy_roundtrip_keeps_diversion_spec(tmp_path):
+    spec = build_spec({**DEFAULT_BASE["spec"], "destinations": ["TTF", "JKM"], "dest_fees": [0.0, 0.3]})
+    policy = SwingPolicy(spec, get_basis(None).spec, np.zeros((spec.T, get_basis(None).size)))
+    policy.save(tmp_path / "policy.json")
+    assert SwingPolicy.load(tmp_path / "policy.json").spec == spec
+
+def test_failed_simulation_gives_error_rows(tmp_path):
+    bad = [[1, 0.9, -0.9], [0.9, 1, 0.9], [-0.9, 0.9, 1]]           # not positive definite
+    config = {"base": {"n_paths": 500},
+              "grid": {"hedge.method": ["none", "level_strip"]},
+              "scenarios": [{"name": "base"}, {"name": "bad_corr", "simulator.corr": bad}]}
+    rows = _run(tmp_path, config)
+    assert len(rows) == 4
+    for r in rows:
+        if r["name"] == "bad_corr":
+            assert "LinAlgError" in r["error"] and "value" not in r
+        else:
+            assert "error" not in r and r["value"] > 0
@@ -0,0 +1,23 @@
+# tests/test_swing_dp.py
+import numpy as np
+import pytest
+
+from conftest import demo_paths
+from lsmc import lsmc_swing_value, lsmc_forward_value
+from swing_dp import grid_swing_value
+
+def test_grid_dp_agrees_with_lsmc_forward_value(paths, spec):
+    # LSMC policy fitted on independent paths, both priced on the same test set
+    test = demo_paths(5000, rng=7)
+    _, _, _, _, policy = lsmc_swing_value(paths, spec, return_policy=True)
+    fwd = lsmc_forward_value(policy, test)
+    v_dp = grid_swing_value(test, spec)[0]
+    assert v_dp == pytest.approx(fwd["value"], rel=5e-3)
+
+def test_grid_dp_chunks_do_not_change_the_result(spec):
+    p = demo_paths(1000, rng=3)
+    v1, q1, cf1, dlt1 = grid_swing_value(p, spec, chunk_size=None)
+    v2, q2, cf2, dlt2 = grid_swing_value(p, spec, chunk_size=97)
+    assert v1 == v2
+    np.testing.assert_array_equal(q1, q2)
+    np.testing.assert_array_equal(dlt1, dlt2)